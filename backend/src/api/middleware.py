@@ -0,0 +1,83 @@
+"""
+middleware.py
+-------------
+ASGI middleware recording request metrics (count, duration and in-flight
+requests per route) and, optionally, a Server-Timing header with the
+pipeline stages of the request.
+
+Plain ASGI rather than BaseHTTPMiddleware: streamed request and response
+bodies (bulk NDJSON, SSE chat) pass through untouched.
+"""
+
+import time
+from typing import Any, Dict, Optional
+from starlette.routing import Match, NoMatchFound
+from src.core import metrics
+
+
+def _route(scope: Dict[str, Any]) -> str:
+    """
+    Path template of the matched route ("/api/v1/jobs/{job_id}"), which keeps
+    label cardinality bounded.
+    """
+    route = scope.get("route")
+    if route is None:
+        # Older Starlette does not put the matched route in the scope
+        router = getattr(scope.get("app"), "router", None)
+        for candidate in getattr(router, "routes", ()):
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    if route is None:
+        return "unmatched"
+    try:
+        # Routes of included routers may only know their path below the prefix
+        below = route.url_path_for(route.name, **scope.get("path_params", {}))
+        if scope["path"].endswith(below):
+            return scope["path"][:len(scope["path"]) - len(below)] + route.path
+    except (NoMatchFound, AttributeError, TypeError):
+        pass
+    return route.path
+
+
+def _server_timing(timings: Dict[str, float], total: float) -> bytes:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries).encode()
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request; adds Server-Timing when `timing_headers` is set.
+    """
+
+    def __init__(self, app, timing_headers: bool = False):
+        self.app = app
+        self.timing_headers = timing_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        timings: Optional[Dict[str, float]] = metrics.start_request_timings() if self.timing_headers else None
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - started)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        metrics.HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            metrics.HTTP_IN_FLIGHT.dec()
+            route = _route(scope)
+            metrics.HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            metrics.HTTP_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route)
@@ -1,27 +1,37 @@
 """
 routes.py
 ---------
-The Axiom API: Handles Text Ingestion, PDF Ingestion, and RAG Chat.
+The Axiom API: Handles Text Ingestion, PDF Ingestion, Bulk Ingestion, RAG Chat (JSON and streaming), Filtered Search, Lifecycle Administration and Profiling.
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
+import asyncio
+import json
+import logging
+import secrets
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from openai import AsyncOpenAI
 from src.config import settings
-from src.models.schemas import IngestionRequest, SearchRequest, DocumentResponse
-from src.core.security import PIIScrubber
-from src.core.scorer import ContentScorer
-from src.core.embedder import embedder
-from src.core.parser import parse_pdf
+from src.models.schemas import IngestionRequest, SearchRequest, SearchResponse
+from src.core.parser import parse_pdf, read_pdf
+from src.core.jobs import job_queue, Job
+from src.core.batcher import embedding_batcher
+from src.core.ingestion import make_record, ingest_records, analyze_records, store_records
+from src.core.answer_cache import answer_cache, CachedAnswer
+from src.core.context import context_assembler
+from src.core.lifecycle import lifecycle_sweeper, SweepInProgressError
+from src.core.metrics import stage
+from src.core.profiler import profiler
+from src.core.sparse import SparseVector, query_vector as sparse_query
 from src.db.vector_store import vector_db 
+from src.db.filters import SearchFilter
 from datetime import datetime, timezone, timedelta
 
 router = APIRouter()
-
-# Initialize Helpers
-scrubber = PIIScrubber()
-scorer = ContentScorer()
+logger = logging.getLogger("axiom.api")
 
 # Conditional OpenAI Client Initialization
 # We only initialize the client if the key looks real (starts with "sk-") 
@@ -36,6 +46,22 @@ if is_real_key:
 else:
     openai_client = None
 
+# Green AI density thresholds (stricter for PDFs)
+TEXT_DENSITY_THRESHOLD = 0.25
+PDF_DENSITY_THRESHOLD = 0.40
+
+SYSTEM_PROMPT = """You are Axiom, UPM's AI Assistant. 
+    Answer the user query using ONLY the provided context. 
+    If the answer is not in the context, say you don't know. 
+    Keep answers professional and concise."""
+
+TEST_MODE_ANSWER = "System is running in Test Mode (Placeholder API Key detected). I cannot generate an answer, but here is the context found."
+
+NO_CONTEXT_ANSWER = "I couldn't find any internal documents matching your query."
+
+# Metadata returned with /chat context: what the UI shows plus what the answer cache checks
+CHAT_CONTEXT_FIELDS = ["filename", "owner", "quality_score", "score_tier", "content_hash"]
+
 # New Schema for Chat
 class ChatRequest(BaseModel):
     query: str
@@ -48,50 +74,19 @@ class ChatRequest(BaseModel):
 async def ingest_document(payload: IngestionRequest):
     """
     Ingest raw text via JSON.
+    Re-sending unchanged content is a cheap no-op (status 'unchanged').
     """
-    # 1. Green AI Filter
-    quality_score = scorer.calculate_score(payload.text)
+    # 1. Dedup + 2. Green AI Filter + 3. Security Layer + 4. Vectorize + 5. Storage
+    record = make_record(payload.text, _text_metadata(payload), payload.source_id)
+    result = (await ingest_records([record], TEXT_DENSITY_THRESHOLD))[0]
     
-    # Threshold 0.25 for text tests (stricter 0.4 for PDFs)
-    if quality_score < 0.25: 
+    if result["status"] == "rejected": 
         raise HTTPException(
             status_code=400, 
-            detail=f"Document rejected. Low information density score: {quality_score}."
+            detail=f"Document rejected. Low information density score: {result['quality_score']}."
         )
 
-    # 2. Security Layer
-    cleaned_text = scrubber.scrub(payload.text)
-    
-    # 3. Vectorize
-    vector = embedder.embed(cleaned_text)
-    
-    # 4. Metadata
-    expiry = payload.valid_until
-    if not expiry:
-        expiry = datetime.now(timezone.utc) + timedelta(days=365)
-
-    metadata = {
-        "owner": payload.owner,
-        "tags": payload.tags,
-        "quality_score": quality_score,
-        "valid_until": expiry,
-        "cleaned_length": len(cleaned_text),
-        "source_type": "text_json"
-    }
-
-    # 5. Storage
-    doc_id = vector_db.upsert_document(
-        text=cleaned_text,
-        vector=vector,
-        metadata=metadata
-    )
-
-    return {
-        "status": "ingested",
-        "id": doc_id,
-        "quality_score": quality_score,
-        "pii_redacted": cleaned_text != payload.text
-    }
+    return result
 
 # ---------------------------------------------------------
 # 2. File Ingestion (PDF Upload)
@@ -100,99 +95,516 @@ async def ingest_document(payload: IngestionRequest):
 async def ingest_file(
     file: UploadFile = File(...),
     owner: str = Form(...),
-    tags: str = Form("")
+    tags: str = Form(""),
+    source_id: Optional[str] = Form(None)
 ):
     # 1. Parse
     if file.content_type != "application/pdf":
         raise HTTPException(400, "Only PDF files are supported.")
     
-    raw_text = await parse_pdf(file)
+    raw_text, skipped_pages = await parse_pdf(file)
     
-    # 2. Green AI Filter (High Threshold for PDFs)
-    quality_score = scorer.calculate_score(raw_text)
+    # 2. Metadata
+    metadata = _pdf_metadata(owner, file.filename, tags)
+
+    # 3. Dedup + Green AI Filter (High Threshold for PDFs) + Security + Vectorize + Storage
+    record = make_record(raw_text, metadata, source_id)
+    result = (await ingest_records([record], PDF_DENSITY_THRESHOLD))[0]
     
-    if quality_score < 0.40: 
+    if result["status"] == "rejected": 
         raise HTTPException(
             status_code=400, 
-            detail=f"Governance Reject: Density {quality_score:.1%} is below the 40% threshold. Content contains too much boilerplate."
+            detail=f"Governance Reject: Density {result['quality_score']:.1%} is below the 40% threshold. Content contains too much boilerplate."
         )
 
-    # 3. Security
-    cleaned_text = scrubber.scrub(raw_text)
-    
-    # 4. Vectorize
-    vector = embedder.embed(cleaned_text)
-    
-    # 5. Metadata
-    tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-    expiry = datetime.now(timezone.utc) + timedelta(days=365)
-    
-    metadata = {
+    return {**result, "filename": file.filename, "skipped_pages": skipped_pages}
+
+@router.post("/ingest/file/async", status_code=202, summary="Upload a PDF for Background Processing")
+async def ingest_file_async(
+    file: UploadFile = File(...),
+    owner: str = Form(...),
+    tags: str = Form(""),
+    source_id: Optional[str] = Form(None)
+):
+    """
+    Spools the upload to disk and returns a job id immediately; poll
+    /jobs/{job_id} for per-stage progress and the ingestion result.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(400, "Only PDF files are supported.")
+
+    job_id = await job_queue.submit(
+        "ingest_pdf",
+        {"owner": owner, "filename": file.filename, "tags": tags, "source_id": source_id},
+        upload=file.file
+    )
+    return {"job_id": job_id, "status": "queued", "status_url": f"{settings.API_V1_STR}/jobs/{job_id}"}
+
+@router.get("/jobs/{job_id}", summary="Background Job Status")
+async def get_job(job_id: str):
+    """
+    Status (queued, running, completed, failed), per-stage progress and
+    timings, and the result of a background ingestion job.
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job '{job_id}' not found.")
+    return job
+
+async def _ingest_pdf_job(job: Job) -> Dict[str, Any]:
+    """
+    The /ingest/file pipeline, run by a job worker. Stages wait for pool
+    capacity instead of being shed; a governance reject is a completed job
+    with a 'rejected' result.
+    """
+    params = job.params
+    async with job.stage("parse"):
+        raw_text, skipped_pages = await read_pdf(job.spool_path, wait=True)
+
+    metadata = _pdf_metadata(params["owner"], params["filename"], params["tags"])
+    record = make_record(raw_text, metadata, params.get("source_id"))
+    async with job.stage("analyze"):
+        await analyze_records([record], PDF_DENSITY_THRESHOLD, bulk=True)
+    async with job.stage("store"):
+        result = (await store_records([record], bulk=True))[0]
+    return {**result, "filename": params["filename"], "skipped_pages": skipped_pages}
+
+job_queue.register("ingest_pdf", _ingest_pdf_job, stages=["parse", "analyze", "store"])
+
+def _pdf_metadata(owner: str, filename: Optional[str], tags: str) -> Dict[str, Any]:
+    """
+    Governance Metadata for an uploaded PDF (comma-separated tags, 1 year expiry).
+    """
+    return {
         "owner": owner,
-        "filename": file.filename,
-        "tags": tag_list,
-        "quality_score": quality_score,
-        "valid_until": expiry,
-        "cleaned_length": len(cleaned_text),
+        "filename": filename,
+        "tags": [t.strip() for t in tags.split(",") if t.strip()],
+        "valid_until": datetime.now(timezone.utc) + timedelta(days=365),
         "source_type": "file_pdf"
     }
 
-    doc_id = vector_db.upsert_document(cleaned_text, vector, metadata)
+# ---------------------------------------------------------
+# 3. Bulk Ingestion (Streaming NDJSON)
+# ---------------------------------------------------------
+@router.post("/ingest/bulk", summary="Bulk Ingest a Stream of Documents (NDJSON)")
+async def ingest_bulk(request: Request):
+    """
+    Accepts one IngestionRequest JSON object per line and streams back one
+    result per line: {"line", "status", "id", "quality_score", "score_tier", "chunks", "reason"}.
+
+    Records flow through a pipeline: while batch N is being embedded and
+    stored, batch N+1 is already being deduplicated, scored and scrubbed.
+    A record that cannot be parsed or analyzed gets an "error" line; if a
+    whole batch fails, a final "aborted" line carries "last_committed_line",
+    after which the client can resume.
+    """
+    return _DuplexStreamingResponse(_bulk_pipeline(request), media_type="application/x-ndjson")
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` alone. The stock one listens for
+    disconnects on it, which would swallow the request body we are still reading.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def _read_ndjson(request: Request) -> AsyncIterator[tuple]:
+    """
+    Yields (line_number, raw_line) from the streamed request body.
+    """
+    # Pieces of the unfinished line: joined once it ends, so long lines stay linear
+    partial_line: List[bytes] = []
+    line_no = 0
+    async for chunk in request.stream():
+        *lines, tail = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(partial_line) + lines[0]
+            partial_line = []
+        if tail:
+            partial_line.append(tail)
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    last = b"".join(partial_line)
+    if last.strip():
+        yield line_no + 1, last
+
+async def _bulk_pipeline(request: Request) -> AsyncIterator[bytes]:
+    batch_size = settings.BULK_BATCH_SIZE
+    # Bounded queues give backpressure between stages. A stage failure is
+    # forwarded downstream as the exception object; None marks the end.
+    analyzed: asyncio.Queue = asyncio.Queue(maxsize=settings.BULK_PIPELINE_DEPTH)
+    results: asyncio.Queue = asyncio.Queue(maxsize=settings.BULK_PIPELINE_DEPTH)
+
+    async def analyze_stage():
+        # Stage 1: Validate + Dedup + Green AI Filter + Security + Chunking
+        try:
+            batch = []
+            async for line_no, line in _read_ndjson(request):
+                batch.append((line_no, line))
+                if len(batch) >= batch_size:
+                    await analyzed.put(await _analyze_bulk_batch(batch))
+                    batch = []
+            if batch:
+                await analyzed.put(await _analyze_bulk_batch(batch))
+        except Exception as e:
+            await analyzed.put(e)
+            return
+        await analyzed.put(None)
+
+    async def store_stage():
+        # Stage 2: Vectorize + Storage
+        while True:
+            batch = await analyzed.get()
+            if batch is None or isinstance(batch, Exception):
+                await results.put(batch)
+                return
+            try:
+                await results.put(await _store_bulk_batch(*batch))
+            except Exception as e:
+                await results.put(e)
+                return
+
+    tasks = [asyncio.create_task(analyze_stage()), asyncio.create_task(store_stage())]
+    # Every line up to here has a result (batches are stored in order): where clients resume
+    last_line = 0
+    try:
+        while (batch_results := await results.get()) is not None:
+            if isinstance(batch_results, Exception):
+                logger.error(f"Bulk ingestion aborted after line {last_line}: {batch_results}")
+                yield json.dumps({
+                    "status": "aborted",
+                    "reason": str(batch_results),
+                    "last_committed_line": last_line
+                }).encode() + b"\n"
+                break
+            if batch_results:
+                last_line = batch_results[-1]["line"]
+            yield b"".join(json.dumps(r).encode() + b"\n" for r in batch_results)
+    finally:
+        # Client disconnected or a stage failed: stop the pipeline
+        for task in tasks:
+            task.cancel()
+
+async def _analyze_bulk_batch(batch: List[tuple]) -> tuple:
+    """
+    Returns (line_numbers, results_or_records): invalid lines are resolved to
+    an error result here, valid ones become analyzed pipeline records.
+    """
+    lines = []
+    entries = []
+    for line_no, line in batch:
+        lines.append(line_no)
+        try:
+            payload = IngestionRequest.model_validate_json(line)
+            metadata = _text_metadata(payload, source_type="bulk_ndjson")
+            entries.append(make_record(payload.text, metadata, payload.source_id))
+        except ValidationError as e:
+            entries.append({"result": {"status": "error", "reason": f"Invalid record: {e.errors()[0]['msg']}"}})
+
+    records = [e for e in entries if "result" not in e]
+    await analyze_records(records, TEXT_DENSITY_THRESHOLD, bulk=True)
+    return lines, entries
+
+async def _store_bulk_batch(lines: List[int], entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    records = [e for e in entries if "text" in e]
+    await store_records(records, bulk=True)
+    return [{"line": line_no, **entry["result"]} for line_no, entry in zip(lines, entries)]
+
+def _text_metadata(payload: IngestionRequest, source_type: str = "text_json") -> Dict[str, Any]:
+    """
+    Governance Metadata for a JSON text record.
+    """
+    expiry = payload.valid_until
+    if not expiry:
+        expiry = datetime.now(timezone.utc) + timedelta(days=365)
 
     return {
-        "status": "ingested",
-        "id": doc_id,
-        "quality_score": quality_score,
-        "filename": file.filename,
-        "pii_redacted": cleaned_text != raw_text
+        "owner": payload.owner,
+        "tags": payload.tags,
+        "valid_until": expiry,
+        "source_type": source_type
     }
 
 # ---------------------------------------------------------
-# 3. RAG Chat Endpoint
+# 4. RAG Chat Endpoint
 # ---------------------------------------------------------
 @router.post("/chat", summary="RAG Chat with GPT-4o-mini")
 async def chat_with_knowledge(payload: ChatRequest):
     """
-    1. Embed query -> 2. Retrieve Context -> 3. Generate Answer
+    1. Embed query -> 2. Semantic Cache -> 3. Retrieve Context -> 4. Assemble Prompt -> 5. Generate Answer
+    context_tokens reports the size of the context sent to the LLM (0 when cached).
     """
-    # 1. Retrieve
-    query_vector = embedder.embed(payload.query)
-    results = vector_db.search(query_vector=query_vector, limit=payload.limit)
-    
-    if not results:
-        return {"answer": "I couldn't find any internal documents matching your query.", "context": []}
+    # 1. Embed
+    with stage("query_embed"):
+        query_vector = await embedding_batcher.embed(payload.query)
+
+    # 2. Semantic Cache (only answers whose sources are all still valid)
+    with stage("cache_lookup"):
+        cached = await answer_cache.get(query_vector, payload.limit, _citation_state)
+    if cached:
+        return {"answer": cached.answer, "context": cached.context, "context_tokens": 0, "cached": True}
+
+    # Identical questions already in flight share one LLM call
+    return await answer_cache.coalesce(
+        payload.query, payload.limit, lambda: _generate_answer(payload, query_vector)
+    )
+
+def _query_terms(query: str) -> Optional[SparseVector]:
+    # Lexical half of hybrid retrieval (exact codes, part numbers, names)
+    return sparse_query(query) if settings.HYBRID_SEARCH else None
 
-    # 2. Construct Prompt
-    context_text = "\n\n".join([f"Source ({r['metadata'].get('filename', 'Doc')}): {r['text']}" for r in results])
+async def _citation_state(point_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    return await vector_db.fetch_payloads(point_ids, ["valid_until_ts", "content_hash"])
+
+async def _generate_answer(payload: ChatRequest, query_vector: List[float]) -> Dict[str, Any]:
+    # 3. Retrieve
+    with stage("search"):
+        results = await vector_db.search(
+            query_vector=query_vector,
+            limit=payload.limit,
+            fields=CHAT_CONTEXT_FIELDS,
+            query_terms=_query_terms(payload.query)
+        )
     
-    system_prompt = """You are Axiom, UPM's AI Assistant. 
-    Answer the user query using ONLY the provided context. 
-    If the answer is not in the context, say you don't know. 
-    Keep answers professional and concise."""
+    if not results:
+        return {"answer": NO_CONTEXT_ANSWER, "context": [], "context_tokens": 0}
 
-    user_prompt = f"Context:\n{context_text}\n\nQuestion: {payload.query}"
+    # 4. Assemble the prompt context within the token budget
+    with stage("context"):
+        context = await context_assembler.assemble(query_vector, results, embedding_batcher.embed_many)
 
-    # 3. Call OpenAI (Safety Check)
+    # 5. Call OpenAI (Safety Check)
     if not openai_client:
         return {
-            "answer": "System is running in Test Mode (Placeholder API Key detected). I cannot generate an answer, but here is the context found.",
-            "context": results
+            "answer": TEST_MODE_ANSWER,
+            "context": results,
+            "context_tokens": context.tokens
         }
 
     try:
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.1 
-        )
+        with stage("llm"):
+            response = await openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=_build_messages(payload.query, context.text),
+                temperature=0.1 
+            )
         answer = response.choices[0].message.content
     except Exception as e:
-        answer = f"Error generating response: {str(e)}"
+        # Errors are returned but never cached
+        return {
+            "answer": f"Error generating response: {str(e)}",
+            "context": results,
+            "context_tokens": context.tokens
+        }
+
+    answer_cache.store(query_vector, CachedAnswer(payload.query, payload.limit, answer, results))
 
     return {
         "answer": answer,
-        "context": results 
-    }
\ No newline at end of file
+        "context": results,
+        "context_tokens": context.tokens
+    }
+
+def _build_messages(query: str, context_text: str) -> List[Dict[str, str]]:
+    """
+    Construct Prompt from the assembled context.
+    """
+    user_prompt = f"Context:\n{context_text}\n\nQuestion: {query}"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+# ---------------------------------------------------------
+# 5. Streaming RAG Chat (Server-Sent Events)
+# ---------------------------------------------------------
+@router.post("/chat/stream", summary="Streaming RAG Chat (Server-Sent Events)")
+async def chat_stream(payload: ChatRequest):
+    """
+    Streams the answer as Server-Sent Events:
+    'context' (retrieved sources, sent immediately) -> 'token'* -> 'done' (with context_tokens).
+    If the client disconnects, the upstream completion is cancelled.
+    """
+    return StreamingResponse(
+        _stream_answer(payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+async def _stream_answer(payload: ChatRequest) -> AsyncIterator[bytes]:
+    # The 200 and the headers are already sent: failures must become an event.
+    # aclosing: a client disconnect closes the inner generator (and the upstream stream) now
+    try:
+        async with aclosing(_answer_events(payload)) as events:
+            async for event in events:
+                yield event
+    except Exception as e:
+        logger.error(f"Streaming chat failed: {e}")
+        yield _sse("error", {"detail": f"Error generating response: {str(e)}"})
+
+async def _answer_events(payload: ChatRequest) -> AsyncIterator[bytes]:
+    with stage("query_embed"):
+        query_vector = await embedding_batcher.embed(payload.query)
+
+    with stage("cache_lookup"):
+        cached = await answer_cache.get(query_vector, payload.limit, _citation_state)
+    if cached:
+        yield _sse("context", {"context": cached.context})
+        yield _sse("token", {"text": cached.answer})
+        yield _sse("done", {"cached": True, "context_tokens": 0})
+        return
+
+    with stage("search"):
+        results = await vector_db.search(
+            query_vector=query_vector,
+            limit=payload.limit,
+            fields=CHAT_CONTEXT_FIELDS,
+            query_terms=_query_terms(payload.query)
+        )
+    yield _sse("context", {"context": results})
+
+    tokens = 0
+    if results:
+        with stage("context"):
+            context = await context_assembler.assemble(query_vector, results, embedding_batcher.embed_many)
+        tokens = context.tokens
+
+    if not results or not openai_client:
+        yield _sse("token", {"text": NO_CONTEXT_ANSWER if not results else TEST_MODE_ANSWER})
+        yield _sse("done", {"cached": False, "context_tokens": tokens})
+        return
+
+    stream = None
+    parts = []
+    # Streamed: "llm" includes the time the client takes to read the tokens
+    with stage("llm"):
+        try:
+            stream = await openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=_build_messages(payload.query, context.text),
+                temperature=0.1,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield _sse("token", {"text": delta})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Error generating response: {str(e)}"})
+            return
+        finally:
+            # Runs on client disconnect too (the generator is cancelled):
+            # closing the stream aborts the upstream generation.
+            if stream is not None:
+                await stream.close()
+
+    answer = "".join(parts)
+    answer_cache.store(query_vector, CachedAnswer(payload.query, payload.limit, answer, results))
+    yield _sse("done", {"cached": False, "context_tokens": tokens})
+
+# ---------------------------------------------------------
+# 6. Filtered Search
+# ---------------------------------------------------------
+@router.post("/search", response_model=SearchResponse, summary="Governed Semantic Search")
+async def search_documents(payload: SearchRequest):
+    """
+    Hybrid (dense + BM25) search with governance filters (tags, owner,
+    source type, expiry window) evaluated inside Qdrant. Page with offset/next_offset.
+    """
+    # 1. Embed
+    with stage("query_embed"):
+        query_vector = await embedding_batcher.embed(payload.query)
+
+    # 2. Filter (always combined with the lifecycle filter)
+    query_filter = (
+        SearchFilter()
+        .tags(payload.filter_tags, match=payload.tags_match)
+        .owner(payload.owner)
+        .source_type(payload.source_type)
+        .expires_between(payload.expires_after, payload.expires_before)
+    )
+
+    # 3. Retrieve one page
+    with stage("search"):
+        results = await vector_db.search(
+            query_vector=query_vector,
+            limit=payload.limit,
+            query_filter=query_filter,
+            offset=payload.offset,
+            score_threshold=payload.score_threshold,
+            query_terms=_query_terms(payload.query)
+        )
+
+    next_offset = payload.offset + len(results) if len(results) == payload.limit else None
+    return {"results": results, "next_offset": next_offset}
+
+# ---------------------------------------------------------
+# 7. Lifecycle Administration
+# ---------------------------------------------------------
+async def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin endpoints answer 404 unless ADMIN_TOKEN is set, then require it.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(404, "Admin endpoints are disabled.")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(401, "Invalid or missing X-Admin-Token.")
+
+@router.post("/admin/lifecycle/sweep", summary="Delete Expired Content", dependencies=[Depends(_require_admin)])
+async def sweep_expired(dry_run: bool = False):
+    """
+    Deletes points whose valid_until is more than the grace period in the
+    past, archiving their payloads. With dry_run, only reports how many
+    points and documents would be deleted.
+    """
+    try:
+        return await lifecycle_sweeper.sweep(dry_run=dry_run)
+    except SweepInProgressError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/admin/lifecycle", summary="Lifecycle Sweeper Status", dependencies=[Depends(_require_admin)])
+async def lifecycle_status():
+    """
+    Content currently eligible for deletion and the outcome of the last sweep.
+    """
+    return {
+        "eligible": await lifecycle_sweeper.sweep(dry_run=True),
+        "last_sweep": lifecycle_sweeper.last_sweep,
+        "interval_seconds": lifecycle_sweeper.interval,
+    }
+
+# ---------------------------------------------------------
+# 8. Profiling
+# ---------------------------------------------------------
+@router.post("/admin/profiler/start", summary="Start the Sampling Profiler", dependencies=[Depends(_require_admin)])
+async def start_profiler(interval_ms: Optional[float] = None, seconds: Optional[float] = None):
+    """
+    Samples every thread of this worker process until stopped (or for
+    `seconds`, capped at PROFILER_MAX_SECONDS).
+    """
+    try:
+        profiler.start(interval_ms, seconds)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+    return profiler.status()
+
+@router.post(
+    "/admin/profiler/stop", response_class=PlainTextResponse, summary="Stop the Sampling Profiler",
+    dependencies=[Depends(_require_admin)]
+)
+async def stop_profiler():
+    """
+    Stops sampling and returns the profile as folded stacks (flamegraph.pl / speedscope).
+    """
+    return PlainTextResponse(await asyncio.to_thread(profiler.stop))
+
+@router.get("/admin/profiler", summary="Sampling Profiler Status", dependencies=[Depends(_require_admin)])
+async def profiler_status():
+    return profiler.status()
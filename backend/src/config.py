@@ -5,6 +5,7 @@ Centralized configuration management for the Axiom engine.
 Updated for Pydantic V2 and robust testing support.
 """
 
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,16 +15,169 @@ class Settings(BaseSettings):
     DEBUG_MODE: bool = False 
     SECRET_KEY: str = "super-secret-key" 
 
+    # Vector Store Backend: "qdrant" (server) or "embedded" (in-process NumPy, no server needed)
+    VECTOR_BACKEND: str = "qdrant"
+    # Embedded backend: storage directory and vector dtype ("float32" or "int8", 4x smaller)
+    EMBEDDED_STORE_DIR: str = "data/vectors"
+    EMBEDDED_STORE_DTYPE: str = "float32"
+
     # Vector DB Config
     # Default to localhost so local 'pytest' runs work without Docker networking
     QDRANT_HOST: str = "localhost" 
     QDRANT_PORT: int = 6333
     QDRANT_COLLECTION_NAME: str = "upm_knowledge_base"
+    # ":memory:" (or a local path) runs Qdrant embedded in-process instead, e.g. for tests
+    QDRANT_LOCATION: str = ""
+    # Opt-in gRPC transport (faster for large upserts/searches)
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    # Pooled connections shared by all requests on a worker
+    QDRANT_POOL_SIZE: int = 16
+    # Per-request timeout (seconds) and retries of transient failures (exponential backoff)
+    QDRANT_TIMEOUT: int = 10
+    QDRANT_RETRIES: int = 3
+    QDRANT_RETRY_BACKOFF: float = 0.2
+    # Max points per upsert request
+    QDRANT_UPSERT_BATCH_SIZE: int = 256
+    # Collection profile (see db/profiles.py): quantization "none" | "scalar" (int8) | "binary"
+    QDRANT_QUANTIZATION: str = "none"
+    # Keep full-precision originals on disk (memory-mapped); quantized copies stay in RAM
+    QDRANT_ON_DISK_VECTORS: bool = False
+    # Re-rank oversampled quantized candidates with the originals
+    QDRANT_RESCORE: bool = True
+    QDRANT_OVERSAMPLING: float = 2.0
+    # HNSW graph: edges per node / build-time beam / search-time beam
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: int = 128
+    # Apply profile changes to an existing collection at startup (otherwise they are only logged)
+    QDRANT_AUTO_MIGRATE: bool = False
 
     # LLM Config
     # Default to a placeholder so 'import app' doesn't crash during tests
     OPENAI_API_KEY: str = "sk-placeholder-key-for-tests"
 
+    # Hybrid Retrieval: BM25 term matches fused with dense results (reciprocal rank fusion)
+    HYBRID_SEARCH: bool = True
+    # Candidates taken from each retriever before fusion / RRF rank constant
+    HYBRID_PREFETCH_LIMIT: int = 50
+    HYBRID_RRF_K: int = 60
+    # BM25 saturation and length normalization (average chunk length in index terms)
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    BM25_AVG_CHUNK_TERMS: int = 80
+
+    # RAG Prompt Context: max tokens of retrieved passages per prompt, counted with this
+    # tiktoken encoding (gpt-4o-mini). The Docker image fetches the encoding at build time;
+    # where it cannot be loaded, counts fall back to an approximation (~4 characters a token)
+    CONTEXT_TOKEN_BUDGET: int = 2000
+    CONTEXT_TOKENIZER: str = "o200k_base"
+
+    # Semantic Answer Cache: reuse answers for near-identical questions (cosine >= threshold)
+    ANSWER_CACHE_SIZE: int = 1000
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+
+    # PII Redaction: entities containing an allow-listed term are never redacted
+    # (inline list + optional file with one term per line)
+    PII_ALLOW_LIST: List[str] = ["UPM", "Raflatac", "Biofuels", "Biofore"]
+    PII_ALLOW_LIST_FILE: str = ""
+    # Extra regex rules redacted as <LABEL>, e.g. PII_RULES='{"IBAN": "\\bFI\\d{16}\\b"}'
+    PII_RULES: Dict[str, str] = {}
+
+    # Green AI Density Gate: decide clear cases without the full tagger pass (see core/scorer.py).
+    # Scores of clearly accepted/rejected documents are then estimates; disable for exact scores
+    SCORER_TIERED: bool = True
+    # Token-statistics estimate must clear the threshold by this much to accept
+    SCORER_ACCEPT_MARGIN: float = 0.25
+    # Long documents (>= MIN_UNITS lines/sentences) are scored on a sample of UNITS lines,
+    # trusted when at least SAMPLE_MARGIN (and 2 standard errors) away from the threshold
+    SCORER_SAMPLE_MIN_UNITS: int = 200
+    SCORER_SAMPLE_UNITS: int = 64
+    SCORER_SAMPLE_MARGIN: float = 0.05
+
+    # Chunking Config: word pieces of the embedding model's tokenizer; chunks are capped at
+    # what the model embeds (MiniLM: 256 including [CLS]/[SEP]), so no tail is ever truncated
+    CHUNK_MAX_TOKENS: int = 200
+    CHUNK_OVERLAP_TOKENS: int = 40
+    # Embedding Backend: "torch" (SentenceTransformer), "onnx" (ONNX Runtime fp32) or "onnx-int8"
+    # (dynamic-quantized); ONNX models are exported into EMBED_ONNX_DIR by `python -m src.core.onnx_export`
+    EMBED_BACKEND: str = "torch"
+    EMBED_ONNX_DIR: str = "models/all-MiniLM-L6-v2"
+    # Intra-op threads per loaded model (0 = runtime default); keep CPU_WORKERS x EMBED_THREADS <= cores
+    EMBED_THREADS: int = 0
+    # Embedding Micro-Batching: max texts per forward pass / max wait to fill a batch
+    EMBED_BATCH_SIZE: int = 32
+    EMBED_BATCH_MAX_WAIT_MS: float = 5.0
+
+    # Embedding Cache: in-memory LRU entries (0 disables) + shared on-disk tier ("" disables)
+    EMBED_CACHE_SIZE: int = 10000
+    EMBED_CACHE_DIR: str = ".cache/embeddings"
+    EMBED_CACHE_DISK_MAX_ENTRIES: int = 1000000
+
+    # Bulk Ingestion Config
+    # Records per pipeline batch / batches buffered between pipeline stages
+    BULK_BATCH_SIZE: int = 64
+    BULK_PIPELINE_DEPTH: int = 2
+
+    # PDF Parsing: pages per parse task (ranges run in parallel) / max seconds per page (process mode)
+    PDF_PAGES_PER_TASK: int = 8
+    PDF_PAGE_TIMEOUT: float = 10.0
+
+    # Background Ingestion Jobs: SQLite queue + spooled uploads, processed by worker tasks per process
+    JOBS_DIR: str = "data/jobs"
+    JOB_WORKERS: int = 2
+    # Attempts per job; retries wait JOB_RETRY_BACKOFF * 2^n seconds
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 2.0
+    # A running job whose worker stops renewing its lease (crash) is retried after this long
+    JOB_LEASE_SECONDS: float = 600
+    # How often idle workers look for jobs queued by other processes
+    JOB_POLL_INTERVAL: float = 1.0
+
+    # Lifecycle Sweeper: deletes points expired for more than LIFECYCLE_GRACE_SECONDS, in batches,
+    # every LIFECYCLE_SWEEP_INTERVAL seconds (0 = only on demand via /admin/lifecycle/sweep)
+    LIFECYCLE_SWEEP_INTERVAL: float = 3600
+    LIFECYCLE_GRACE_SECONDS: float = 86400
+    LIFECYCLE_BATCH_SIZE: int = 256
+    # Payloads of deleted points are appended to daily gzip JSON-lines files here ("" = no archive)
+    LIFECYCLE_ARCHIVE_DIR: str = "data/archive"
+    # flock held while sweeping: one API process per node sweeps at a time ("" = no lock)
+    LIFECYCLE_LOCK_FILE: str = "data/lifecycle.lock"
+
+    # Admin Endpoints (/admin/lifecycle*, /admin/profiler*): disabled (404) unless a token is set;
+    # requests must then send it in the X-Admin-Token header
+    ADMIN_TOKEN: str = ""
+
+    # Metrics: Prometheus text format on /metrics (per process); per-stage Server-Timing
+    # response headers (only stages finished before the response starts)
+    METRICS_ENABLED: bool = True
+    METRICS_TIMING_HEADERS: bool = False
+    # Sampling Profiler (toggled via /admin/profiler): sampling interval / auto-stop after
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_SECONDS: float = 120
+
+    # Startup Warm-up: models load and the vector store connects in background tasks after boot;
+    # /health/ready answers 503 until they are ready. Disabled: everything loads on first use
+    WARMUP_ON_STARTUP: bool = True
+    # Failed components (e.g. Qdrant not up yet) are retried with backoff capped at this many seconds
+    WARMUP_RETRY_MAX_SECONDS: float = 30.0
+
+    # Executor Config
+    # CPU-bound stages (parse, NLP, embed) run in a "process" or "thread" pool
+    CPU_EXECUTOR: str = "process"
+    CPU_WORKERS: int = 2
+    # Max jobs running concurrently per stage
+    PARSE_CONCURRENCY: int = 2
+    NLP_CONCURRENCY: int = 2
+    EMBED_CONCURRENCY: int = 2
+    # Max jobs waiting per stage before requests are shed with a 503
+    EXECUTOR_QUEUE_DEPTH: int = 32
+    # Inference Sidecar: Unix socket of a shared model server (`python -m src.core.sidecar`).
+    # When set, the nlp and embed stages of every API worker run there: one copy of the embedding
+    # model per node (spaCy runs on the sidecar's own CPU_EXECUTOR pool, one copy per CPU worker)
+    INFERENCE_SIDECAR_SOCKET: str = ""
+
     # Modern Pydantic V2 Configuration
     model_config = SettingsConfigDict(
         # Look for .env in the current dir OR in the backend/ dir
@@ -0,0 +1,177 @@
+"""
+answer_cache.py
+---------------
+Semantic cache for generated /chat answers.
+A new question whose embedding is within a cosine threshold of a recently
+answered one reuses that answer, provided every cited context chunk is still
+valid (not expired, not re-ingested with different content). Identical
+questions arriving while an answer is being generated share one LLM call.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from src.config import settings
+from src.core import metrics
+from src.core.hashing import normalize
+
+
+class CachedAnswer:
+    """
+    A generated answer plus the state of the context it was grounded on.
+    """
+
+    def __init__(self, query: str, limit: int, answer: str, context: List[Dict[str, Any]]):
+        self.query = query
+        self.limit = limit
+        self.answer = answer
+        self.context = context
+        self.created_at = time.time()
+        # point id -> content_hash at answer time
+        self.citations = {
+            str(hit["id"]): hit.get("metadata", {}).get("content_hash") for hit in context
+        }
+
+    def is_valid(self, current: Dict[str, Dict[str, Any]], now: Optional[float] = None) -> bool:
+        """
+        `current` maps point id -> live payload (valid_until_ts, content_hash).
+        Deleted, expired or changed citations invalidate the answer.
+        """
+        now = time.time() if now is None else now
+        for point_id, content_hash in self.citations.items():
+            payload = current.get(point_id)
+            if payload is None:
+                return False
+            if payload.get("valid_until_ts", 0) <= now:
+                return False
+            if payload.get("content_hash") != content_hash:
+                return False
+        return True
+
+
+class SemanticAnswerCache:
+    """
+    Brute-force cosine lookup over the query vectors of cached answers.
+    A few thousand 384-dim rows fit in one matrix-vector product.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: List[CachedAnswer] = []
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._mutex = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def lookup(self, query_vector: List[float], limit: int) -> Optional[CachedAnswer]:
+        """
+        Most similar fresh entry above the threshold, or None.
+        Citation validity is checked by the caller against the vector store.
+        """
+        with self._mutex:
+            self._expire()
+            if not self._entries:
+                return None
+
+            scores = self._vectors @ self._unit(query_vector)
+            for index in np.argsort(-scores):
+                if scores[index] < self.threshold:
+                    break
+                if self._entries[index].limit == limit:
+                    return self._entries[index]
+            return None
+
+    async def get(
+        self,
+        query_vector: List[float],
+        limit: int,
+        fetch_state: Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+    ) -> Optional[CachedAnswer]:
+        """
+        Cached answer for a query, re-validated against the live state of its
+        citations (fetched via `fetch_state`). Invalid entries are dropped.
+        """
+        entry = self.lookup(query_vector, limit)
+        if entry is not None:
+            if entry.is_valid(await fetch_state(list(entry.citations))):
+                self.hits += 1
+                return entry
+            self.discard(entry)
+        self.misses += 1
+        return None
+
+    def store(self, query_vector: List[float], entry: CachedAnswer):
+        with self._mutex:
+            row = self._unit(query_vector)[None, :]
+            if self._entries:
+                self._vectors = np.vstack([self._vectors, row])
+            else:
+                self._vectors = row
+            self._entries.append(entry)
+
+            # Oldest entries go first
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._drop(range(overflow))
+
+    def discard(self, entry: CachedAnswer):
+        with self._mutex:
+            if entry in self._entries:
+                self._drop([self._entries.index(entry)])
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        stale = [i for i, e in enumerate(self._entries) if e.created_at < cutoff]
+        if stale:
+            self._drop(stale)
+
+    def _drop(self, indexes):
+        drop = set(indexes)
+        keep = [i for i in range(len(self._entries)) if i not in drop]
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else np.empty((0, 0), dtype=np.float32)
+
+    async def coalesce(self, query: str, limit: int, produce: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs produce() once for concurrent identical questions; later callers
+        await the first caller's result. The shared task is shielded so one
+        client disconnecting does not cancel the answer for the others.
+        """
+        key = f"{limit}:{normalize(query).lower()}"
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(produce())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Global instance
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    max_entries=settings.ANSWER_CACHE_SIZE,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
+metrics.registry.callback(
+    "axiom_answer_cache_requests_total", "Answer cache lookups by result.",
+    lambda: {("hit",): answer_cache.hits, ("miss",): answer_cache.misses}, kind="counter", labelnames=["result"]
+)
+metrics.registry.callback("axiom_answer_cache_entries", "Answers held in the cache.", lambda: len(answer_cache._entries))
@@ -0,0 +1,151 @@
+"""
+batcher.py
+----------
+Dynamic micro-batching for embedding requests.
+Concurrent embed calls from /chat and /ingest are held for a few milliseconds
+and encoded together, so the SentenceTransformer forward-pass overhead is paid
+once per batch instead of once per string.
+
+Load shedding happens once per caller, when its texts are admitted: a
+caller's batches then wait for stage capacity instead of failing halfway
+through a large document, and each caller keeps at most `max_inflight`
+batches queued so one document cannot fill the stage by itself.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from src.config import settings
+from src.core import metrics
+from src.core.executor import executors
+from src.core.tasks import embed_texts
+
+logger = logging.getLogger("axiom.batcher")
+
+BatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts until `max_batch_size` is reached or the oldest text has
+    waited `max_wait_ms`, then embeds them with one `run_batch` call.
+    Several batches may be in flight at once; the embed stage bounds them.
+    `admit` (if given) raises to shed a caller before any of its texts is queued.
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchFn,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_inflight: int = 4,
+        admit: Optional[Callable[[], None]] = None
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_inflight = max(1, max_inflight)
+        self.admit = admit
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Strong references so in-flight batch tasks are not garbage collected
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embeds one text as part of the next batch.
+        """
+        if self.admit is not None:
+            self.admit()
+        return await self._submit(text)
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many texts; they are spread over as many batches as needed,
+        at most `max_inflight` batches' worth of texts queued at a time.
+        """
+        if not texts:
+            return []
+        if self.admit is not None:
+            self.admit()
+
+        vectors: List[List[float]] = []
+        window = self.max_batch_size * self.max_inflight
+        for start in range(0, len(texts), window):
+            results = await asyncio.gather(
+                *[self._submit(t) for t in texts[start:start + window]], return_exceptions=True
+            )
+            # Every future is awaited, so failures of sibling batches are not left unretrieved
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            vectors.extend(results)
+        return vectors
+
+    def _submit(self, text: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures and timers belong to one loop (matters for tests)
+            self._pending, self._timer, self._loop = [], None, loop
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            vectors = await self.run_batch([text for text, _ in batch])
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+def embedded_vectors(result: Dict[str, Any]) -> List[List[float]]:
+    """
+    Vectors of an `embed_texts` result; counts its embedding-cache lookups
+    in this process (the worker that did them does not export metrics).
+    """
+    for source in result["cache"]:
+        if source is not None:
+            metrics.EMBEDDING_CACHE.inc(result=source)
+    return result["vectors"]
+
+
+async def _embed_on_stage(texts: List[str]) -> List[List[float]]:
+    # Callers were admitted by the batcher: a batch waits for room rather than being shed
+    return embedded_vectors(await executors.embed.run_when_free(embed_texts, texts))
+
+
+# Global instance
+embedding_batcher = EmbeddingBatcher(
+    _embed_on_stage,
+    max_batch_size=settings.EMBED_BATCH_SIZE,
+    max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+    max_inflight=settings.EMBED_CONCURRENCY,
+    admit=executors.embed.check_capacity,
+)
@@ -0,0 +1,212 @@
+"""
+cache.py
+--------
+Two-tier embedding cache keyed by model name + text hash.
+Tier 1 is an in-process LRU; tier 2 is an append-only, memory-mapped float32
+matrix on disk that survives restarts and is shared by all worker processes.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger("axiom.cache")
+
+KEY_BYTES = 16
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """
+    Truncated SHA-256 of model name + text. 128 bits keeps collisions negligible.
+    """
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).digest()[:KEY_BYTES]
+
+
+class DiskVectorStore:
+    """
+    Append-only on-disk vector store.
+
+    <name>.vec holds float32 rows of `dim` values; <name>.idx holds one
+    16-byte key per row, in the same order. Appends are serialized across
+    processes with flock; readers memory-map the matrix and pick up rows
+    written by other processes lazily, on a miss.
+
+    Nothing is evicted: once `max_entries` rows are stored, new vectors only
+    go to the in-memory LRU (a warning is logged once per process). Files are
+    never rewritten while workers may have them mapped; to start over, stop
+    the workers and delete the files, or raise EMBED_CACHE_DISK_MAX_ENTRIES.
+    """
+
+    def __init__(self, directory: str, name: str, dim: int, max_entries: int):
+        os.makedirs(directory, exist_ok=True)
+        self.dim = dim
+        self.max_entries = max_entries
+        self._row_bytes = dim * 4
+        self._vec_path = os.path.join(directory, f"{name}.vec")
+        self._idx_path = os.path.join(directory, f"{name}.idx")
+        self._lock_path = os.path.join(directory, f"{name}.lock")
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        self._mutex = threading.Lock()
+        self._full_logged = False
+        for path in (self._vec_path, self._idx_path):
+            open(path, "ab").close()
+        self._refresh()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _refresh(self):
+        """
+        Loads index records (and maps matrix rows) appended since the last refresh.
+        """
+        vec_rows = os.path.getsize(self._vec_path) // self._row_bytes
+        idx_rows = os.path.getsize(self._idx_path) // KEY_BYTES
+        # A crash between the two writes leaves a vector without a key; ignore it
+        rows = min(vec_rows, idx_rows)
+        if rows <= self._rows:
+            return
+
+        with open(self._idx_path, "rb") as f:
+            f.seek(self._rows * KEY_BYTES)
+            data = f.read((rows - self._rows) * KEY_BYTES)
+        for i in range(rows - self._rows):
+            self._index[data[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = self._rows + i
+
+        self._matrix = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        self._rows = rows
+
+    def _repair(self):
+        """
+        Drops what a crash between (or during) the two appends left behind:
+        vector rows without a key and partial records. Called under the flock,
+        before appending, so new keys line up with their rows again. Only
+        bytes past the last complete record are cut, which no reader maps.
+        """
+        vec_size = os.path.getsize(self._vec_path)
+        idx_size = os.path.getsize(self._idx_path)
+        rows = min(vec_size // self._row_bytes, idx_size // KEY_BYTES)
+        if vec_size != rows * self._row_bytes:
+            logger.warning(f"Embedding cache: dropping {vec_size - rows * self._row_bytes} orphan bytes of {self._vec_path}")
+            os.truncate(self._vec_path, rows * self._row_bytes)
+        if idx_size != rows * KEY_BYTES:
+            logger.warning(f"Embedding cache: dropping {idx_size - rows * KEY_BYTES} orphan bytes of {self._idx_path}")
+            os.truncate(self._idx_path, rows * KEY_BYTES)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._mutex:
+            row = self._index.get(key)
+            if row is None:
+                self._refresh()
+                row = self._index.get(key)
+            if row is None:
+                return None
+            return np.array(self._matrix[row])
+
+    def put_many(self, items: Dict[bytes, np.ndarray]):
+        with self._mutex, open(self._lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._repair()
+                # Another process may have written some of these already
+                self._refresh()
+                new = [(k, v) for k, v in items.items() if k not in self._index]
+                room = max(0, self.max_entries - self._rows)
+                if len(new) > room and not self._full_logged:
+                    self._full_logged = True
+                    logger.warning(f"Embedding cache on disk is full ({self.max_entries} entries); new vectors are kept in memory only")
+                new = new[:room]
+                if not new:
+                    return
+
+                # Vectors first: a key is only visible once its row exists
+                with open(self._vec_path, "ab") as f:
+                    f.write(np.asarray([v for _, v in new], dtype=np.float32).tobytes())
+                with open(self._idx_path, "ab") as f:
+                    f.write(b"".join(k for k, _ in new))
+                self._refresh()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """
+    LRU in front of an optional DiskVectorStore, with hit/miss counters.
+    """
+
+    def __init__(self, model_name: str, max_entries: int, disk: Optional[DiskVectorStore] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk = disk
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._mutex = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, texts: List[str], sources: Optional[List[str]] = None) -> List[Optional[np.ndarray]]:
+        """
+        Cached vectors for texts, None where the text has not been seen.
+        `sources` (if given) receives "memory_hit", "disk_hit" or "miss" per text.
+        """
+        results = []
+        promoted = {}
+        for text in texts:
+            key = cache_key(self.model_name, text)
+            with self._mutex:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    results.append(vector)
+                    if sources is not None:
+                        sources.append("memory_hit")
+                    continue
+
+            vector = self.disk.get(key) if self.disk is not None else None
+            with self._mutex:
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self.disk_hits += 1
+                    promoted[key] = vector
+            results.append(vector)
+            if sources is not None:
+                sources.append("miss" if vector is None else "disk_hit")
+
+        if promoted:
+            self._remember(promoted)
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[np.ndarray]):
+        items = {cache_key(self.model_name, t): np.asarray(v, dtype=np.float32) for t, v in zip(texts, vectors)}
+        self._remember(items)
+        if self.disk is not None:
+            try:
+                self.disk.put_many(items)
+            except OSError as e:
+                # The disk tier is an optimization; never fail an embed over it
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def _remember(self, items: Dict[bytes, np.ndarray]):
+        with self._mutex:
+            for key, vector in items.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._lru),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+        }
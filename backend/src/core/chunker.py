@@ -0,0 +1,141 @@
+"""
+chunker.py
+----------
+Splits a parsed document into token-bounded, sentence-aligned passages.
+all-MiniLM-L6-v2 truncates its input at 256 word pieces, so long documents
+must be embedded as many small chunks or most of their text is never indexed.
+
+Budgets are counted with the embedding model's own tokenizer: part numbers,
+URLs and compound or non-English words take several word pieces per spaCy
+token, and a budget in spaCy tokens would let such chunks run past the
+model's limit and lose their tail.
+"""
+
+import bisect
+import itertools
+from typing import List, Optional, Tuple
+from spacy.tokens import Doc
+
+# (start_char, end_char, size in budget units)
+Unit = Tuple[int, int, int]
+
+
+class SentenceChunker:
+    """
+    Greedy sentence packer.
+
+    Sentences are packed into a chunk until the token budget is reached.
+    The next chunk starts with the trailing sentences of the previous one
+    (up to `overlap_tokens`) so context is not lost at the boundary.
+    Sentences longer than the budget are split into windows of whole tokens
+    (a single token longer than the budget is cut at word-piece boundaries).
+
+    With a `tokenizer` (a `tokenizers.Tokenizer` without truncation) budgets
+    count its word pieces; without one they count spaCy tokens.
+    """
+
+    # Sentence boundaries without the full dependency parser
+    components = ("senter",)
+
+    def __init__(self, max_tokens: int, overlap_tokens: int, tokenizer=None):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive.")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens).")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+
+    def _pieces(self, doc: Doc) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """
+        Budget units per spaCy token, and the (start, end) characters of every
+        word piece. The whole text is tokenized once, as the model will see it,
+        and each piece is counted for the token it starts in.
+        """
+        if self.tokenizer is None:
+            return [1] * len(doc), []
+        offsets = self.tokenizer.encode(doc.text, add_special_tokens=False).offsets
+        starts = [token.idx for token in doc]
+        sizes = [0] * len(doc)
+        for start, _ in offsets:
+            sizes[max(bisect.bisect_right(starts, start) - 1, 0)] += 1
+        return sizes, offsets
+
+    def _cut(self, offsets: List[Tuple[int, int]]) -> List[Unit]:
+        """
+        Windows of at most max_tokens word pieces over one over-long token.
+        """
+        return [
+            (window[0][0], window[-1][1], len(window))
+            for window in (offsets[i:i + self.max_tokens] for i in range(0, len(offsets), self.max_tokens))
+        ]
+
+    def _units(self, doc: Doc) -> List[Unit]:
+        """
+        Sentences, with any over-long sentence cut into windows of at most max_tokens.
+        """
+        if doc.has_annotation("SENT_START"):
+            sentences = list(doc.sents)
+        else:
+            sentences = [doc[:]]
+        sizes, offsets = self._pieces(doc)
+        # Index of each token's first word piece
+        first = list(itertools.accumulate(sizes, initial=0))
+
+        units: List[Unit] = []
+        for sent in sentences:
+            size = sum(sizes[sent.start:sent.end])
+            if size <= self.max_tokens:
+                units.append((sent.start_char, sent.end_char, size))
+                continue
+
+            window: Optional[List[int]] = None
+            for token in sent:
+                token_size = sizes[token.i]
+                if window is not None and window[2] + token_size > self.max_tokens:
+                    units.append(tuple(window))
+                    window = None
+                if token_size > self.max_tokens:
+                    units.extend(self._cut(offsets[first[token.i]:first[token.i + 1]]))
+                elif window is None:
+                    window = [token.idx, token.idx + len(token), token_size]
+                else:
+                    window[1], window[2] = token.idx + len(token), window[2] + token_size
+            if window is not None:
+                units.append(tuple(window))
+        return [u for u in units if doc.text[u[0]:u[1]].strip()]
+
+    def split(self, doc: Doc) -> List[Tuple[int, int]]:
+        """
+        Returns the (start_char, end_char) ranges of each chunk in doc.text.
+        """
+        units = self._units(doc)
+        chunks = []
+        current: List[Unit] = []
+        size = 0
+
+        for unit in units:
+            if current and size + unit[2] > self.max_tokens:
+                chunks.append((current[0][0], current[-1][1]))
+
+                # Carry trailing sentences over as overlap (never the whole chunk)
+                carried: List[Unit] = []
+                carried_size = 0
+                for prev in reversed(current[1:]):
+                    if carried_size + prev[2] > self.overlap_tokens:
+                        break
+                    carried.insert(0, prev)
+                    carried_size += prev[2]
+
+                # Overlap must still leave room for the new sentence
+                while carried and carried_size + unit[2] > self.max_tokens:
+                    carried_size -= carried.pop(0)[2]
+
+                current, size = carried, carried_size
+
+            current.append(unit)
+            size += unit[2]
+
+        if current:
+            chunks.append((current[0][0], current[-1][1]))
+        return chunks
@@ -0,0 +1,177 @@
+"""
+context.py
+----------
+Token-budgeted context assembly for the RAG prompt.
+Retrieved passages are deduplicated sentence by sentence (chunk overlap and
+re-uploaded copies would otherwise be paid for twice) and packed in rank
+order into a fixed token budget. A passage that does not fit whole is cut
+down to its sentences most similar to the query.
+
+Tokens are counted exactly with the model's tiktoken encoding. Its BPE file
+is fetched into TIKTOKEN_CACHE_DIR when the image is built and loaded during
+warm-up; only where it cannot be loaded (e.g. an offline checkout without the
+cache) do counts fall back to a character-based approximation.
+"""
+
+import logging
+import math
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+import numpy as np
+import tiktoken
+from src.config import settings
+from src.core.hashing import normalize
+
+logger = logging.getLogger("axiom.context")
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+PASSAGE_SEPARATOR = "\n\n"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens with the model's BPE encoding, loaded on first use.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._encoder = None
+        self._loaded = False
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the BPE encoding rather than the approximation."""
+        return self._encoder is not None
+
+    def load(self) -> bool:
+        """
+        Loads the encoding now (warm-up) instead of on the first count.
+        """
+        if not self._loaded:
+            self._load()
+        return self.exact
+
+    def _load(self):
+        self._loaded = True
+        try:
+            self._encoder = tiktoken.get_encoding(self.encoding)
+        except Exception as e:
+            # Not in TIKTOKEN_CACHE_DIR and the download failed (offline)
+            logger.warning(f"Could not load tiktoken encoding '{self.encoding}' ({e}); approximating.")
+
+    def count(self, text: str) -> int:
+        if not self._loaded:
+            self._load()
+        if self._encoder is not None:
+            return len(self._encoder.encode(text, disallowed_special=()))
+        # BPE vocabularies cover common words whole and split the rest into ~4-character pieces
+        return sum(math.ceil(len(piece) / 4) for piece in _PIECES.findall(text))
+
+
+class AssembledContext:
+    """
+    The context block of the prompt and what it cost.
+    """
+
+    def __init__(self, text: str, tokens: int, passages: int, trimmed: int):
+        self.text = text
+        self.tokens = tokens
+        # Passages included / of those, how many were cut down to their best sentences
+        self.passages = passages
+        self.trimmed = trimmed
+
+
+class ContextAssembler:
+    """
+    Packs search hits into at most `budget` tokens, best-ranked first.
+    """
+
+    def __init__(self, counter: TokenCounter, budget: int):
+        self.counter = counter
+        self.budget = budget
+
+    async def assemble(
+        self,
+        query_vector: List[float],
+        results: List[Dict[str, Any]],
+        embed: EmbedFn
+    ) -> AssembledContext:
+        separator_cost = self.counter.count(PASSAGE_SEPARATOR)
+        parts: List[str] = []
+        used = 0
+        trimmed = 0
+
+        for header, sentences in self._passages(results):
+            cost = self.counter.count(header + " ".join(sentences))
+            remaining = self.budget - used - (separator_cost if parts else 0)
+            if cost > remaining:
+                sentences = await self._best_sentences(
+                    query_vector, sentences, remaining - self.counter.count(header), embed
+                )
+                if not sentences:
+                    continue
+                trimmed += 1
+            text = header + " ".join(sentences)
+            used += self.counter.count(text) + (separator_cost if parts else 0)
+            parts.append(text)
+
+        text = PASSAGE_SEPARATOR.join(parts)
+        return AssembledContext(text, self.counter.count(text), len(parts), trimmed)
+
+    @staticmethod
+    def _passages(results: List[Dict[str, Any]]) -> List[Tuple[str, List[str]]]:
+        """
+        (header, new sentences) per hit; sentences already seen in a better
+        ranked hit are dropped, and hits with nothing new are skipped.
+        """
+        seen: Set[str] = set()
+        passages = []
+        for r in results:
+            sentences = []
+            for sentence in split_sentences(r.get("text") or ""):
+                key = normalize(sentence).lower()
+                if key not in seen:
+                    seen.add(key)
+                    sentences.append(sentence)
+            if sentences:
+                passages.append((f"Source ({r['metadata'].get('filename', 'Doc')}): ", sentences))
+        return passages
+
+    async def _best_sentences(
+        self,
+        query_vector: List[float],
+        sentences: List[str],
+        budget: int,
+        embed: EmbedFn
+    ) -> List[str]:
+        """
+        The sentences most similar to the query that fit in `budget` tokens,
+        in their original order.
+        """
+        costs = [self.counter.count(s) + 1 for s in sentences]
+        if budget <= 0 or min(costs) > budget:
+            return []
+
+        vectors = np.asarray(await embed(sentences), dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        similarity = vectors @ query / np.where(norms == 0, 1.0, norms)
+
+        chosen = []
+        for index in np.argsort(-similarity, kind="stable"):
+            if costs[index] <= budget:
+                chosen.append(int(index))
+                budget -= costs[index]
+        return [sentences[i] for i in sorted(chosen)]
+
+
+# Global instance
+context_assembler = ContextAssembler(TokenCounter(settings.CONTEXT_TOKENIZER), settings.CONTEXT_TOKEN_BUDGET)
@@ -3,21 +3,45 @@ embedder.py
 -----------
 Converts text into vector representations.
 Uses a quantized, local model to ensure low latency and zero data leakage.
+The inference backend (PyTorch, ONNX fp32, ONNX int8) is chosen with
+EMBED_BACKEND; see embedding_backends.py.
 """
 
-from sentence_transformers import SentenceTransformer
-from typing import List
+import re
+from typing import List, Optional
+from src.config import settings
+from src.core.cache import DiskVectorStore, EmbeddingCache
+from src.core.embedding_backends import MODEL_NAME, EmbeddingBackend, build_backend
 
 class GreenEmbedder:
     """
     Lightweight embedding wrapper.
     Model: all-MiniLM-L6-v2 (384 dimensions).
     Why: It's fast, small (80MB), and accurate enough for internal docs.
+    Identical texts (repeated queries, shared boilerplate) are served from cache.
     """
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        cache: Optional[EmbeddingCache] = None,
+        backend: Optional[EmbeddingBackend] = None
+    ):
         # Load model once at startup
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model_name = model_name
+        self.model = backend or build_backend(
+            settings.EMBED_BACKEND, model_name, settings.EMBED_ONNX_DIR, settings.EMBED_THREADS
+        )
+        self.cache = cache
+
+    @property
+    def cache_name(self) -> str:
+        """
+        Cache namespace: quantized vectors must not be served for the reference model.
+        """
+        if self.model.name == "torch":
+            return self.model_name
+        return f"{self.model_name}-{self.model.name}"
 
     def embed(self, text: str) -> List[float]:
         """
@@ -25,10 +49,55 @@ class GreenEmbedder:
         """
         if not text:
             return []
-        
-        # Helper to convert numpy array to standard list
-        embedding = self.model.encode(text)
-        return embedding.tolist()
+
+        return self.embed_batch([text])[0]
+
+    def embed_batch(
+        self, texts: List[str], batch_size: int = 32, sources: Optional[List[Optional[str]]] = None
+    ) -> List[List[float]]:
+        """
+        Generates embeddings for many texts in batched forward passes.
+        Only cache misses reach the model. `sources` (if given) receives the
+        cache lookup result per text (None without a cache).
+        """
+        if not texts:
+            return []
+
+        if self.cache is None:
+            if sources is not None:
+                sources.extend([None] * len(texts))
+            return self.model.encode(texts, batch_size=batch_size).tolist()
+
+        vectors = self.cache.get_many(texts, sources)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # Helper to convert numpy array to standard list
+            encoded = self.model.encode([texts[i] for i in missing], batch_size=batch_size)
+            self.cache.put_many([texts[i] for i in missing], list(encoded))
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+
+        return [v.tolist() for v in vectors]
+
+
+def build_cache(model_name: str, dim: int) -> Optional[EmbeddingCache]:
+    """
+    Embedding cache from Settings. EMBED_CACHE_SIZE=0 disables caching;
+    an empty EMBED_CACHE_DIR keeps it in memory only.
+    """
+    if settings.EMBED_CACHE_SIZE <= 0:
+        return None
+
+    disk = None
+    if settings.EMBED_CACHE_DIR:
+        disk = DiskVectorStore(
+            settings.EMBED_CACHE_DIR,
+            name=re.sub(r"[^A-Za-z0-9_.-]", "_", model_name),
+            dim=dim,
+            max_entries=settings.EMBED_CACHE_DISK_MAX_ENTRIES,
+        )
+    return EmbeddingCache(model_name, settings.EMBED_CACHE_SIZE, disk)
 
 # Singleton instance
-embedder = GreenEmbedder()
\ No newline at end of file
+embedder = GreenEmbedder()
+embedder.cache = build_cache(embedder.cache_name, embedder.model.dim)
@@ -0,0 +1,168 @@
+"""
+embedding_backends.py
+---------------------
+Inference backends for the embedding model, selected with EMBED_BACKEND:
+
+- "torch": the reference SentenceTransformer (PyTorch, fp32).
+- "onnx": the same network exported to ONNX, run by ONNX Runtime (fp32).
+- "onnx-int8": the ONNX export with dynamic int8 quantization of its
+  weights. Smallest and fastest on CPU, at a small loss of precision.
+
+The ONNX backends only need onnxruntime and tokenizers at run time (the
+`onnx` extra: `poetry install -E onnx`), not PyTorch. Their models are
+produced once with `python -m src.core.onnx_export`.
+"""
+
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, List, Tuple
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:  # Optional dependency
+    onnxruntime = None
+
+logger = logging.getLogger("axiom.embedder")
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Files written by onnx_export into the model directory
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model_int8.onnx"}
+TOKENIZER_FILE = "tokenizer.json"
+EXPORT_INFO_FILE = "export.json"
+# Where SentenceTransformer keeps max_seq_length in the model repository
+SBERT_CONFIG_FILE = "sentence_bert_config.json"
+
+
+class EmbeddingBackend(ABC):
+    """
+    Encodes texts into L2-normalized float32 vectors.
+    """
+
+    name = ""
+    dim = 0
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        One row per text, in input order.
+        """
+
+
+class TorchBackend(EmbeddingBackend):
+    """
+    The reference model: SentenceTransformer on PyTorch.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    The exported transformer on ONNX Runtime, followed by the model's mean
+    pooling and normalization (as in the SentenceTransformer pipeline).
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0):
+        if onnxruntime is None:
+            raise RuntimeError("The ONNX embedding backends need onnxruntime (`poetry install -E onnx`).")
+        from tokenizers import Tokenizer
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        path = os.path.join(model_dir, ONNX_FILES[self.name])
+        if not os.path.exists(path):
+            raise RuntimeError(f"No ONNX model at {path}; export it with `python -m src.core.onnx_export`.")
+        with open(os.path.join(model_dir, EXPORT_INFO_FILE)) as f:
+            info = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        # One request at a time per session: no inter-op parallelism to pay for
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.dim = info["dim"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(info["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=info["pad_token_id"], pad_token=info["pad_token"])
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        # Batches of similar length pad less
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            out[batch] = self._encode_batch([texts[i] for i in batch])
+        return out
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.inputs:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feed)[0]
+        # Mean pooling over real tokens, then L2 normalization
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+
+def load_tokenizer(backend: str, model_name: str, model_dir: str) -> Tuple[Any, int]:
+    """
+    The embedding model's own tokenizer (truncation and padding off) and the
+    most word pieces it embeds per text, special tokens excluded. Used to
+    size chunks without loading the model itself.
+    """
+    from tokenizers import Tokenizer
+
+    if backend in ONNX_FILES:
+        tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        with open(os.path.join(model_dir, EXPORT_INFO_FILE)) as f:
+            max_seq_length = json.load(f)["max_seq_length"]
+    else:
+        # The files SentenceTransformer(model_name) loads, from the same cache
+        from huggingface_hub import hf_hub_download
+        repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        tokenizer = Tokenizer.from_file(hf_hub_download(repo, TOKENIZER_FILE))
+        with open(hf_hub_download(repo, SBERT_CONFIG_FILE)) as f:
+            max_seq_length = json.load(f)["max_seq_length"]
+
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    special = len(tokenizer.encode("").ids)
+    return tokenizer, max_seq_length - special
+
+
+def build_backend(backend: str, model_name: str, model_dir: str, threads: int = 0) -> EmbeddingBackend:
+    """
+    The configured backend for `model_name` (ONNX models are read from `model_dir`).
+    """
+    logger.info(f"Loading embedding model {model_name} on the '{backend}' backend")
+    if backend == "torch":
+        return TorchBackend(model_name, threads)
+    if backend in ONNX_FILES:
+        return OnnxBackend(model_dir, quantized=backend == "onnx-int8", threads=threads)
+    raise RuntimeError(f"Unknown EMBED_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)}).")
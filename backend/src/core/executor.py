@@ -0,0 +1,199 @@
+"""
+executor.py
+-----------
+Off-loop execution of blocking work.
+Routes dispatch PDF parsing, NLP and embedding to bounded worker pools so a
+single large upload cannot stall the event loop (and with it every concurrent
+/chat request on the worker).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from src.config import settings
+from src.core import metrics
+
+logger = logging.getLogger("axiom.executor")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """
+    Raised when a stage already has its maximum number of queued jobs.
+    The API maps this to '503 Service Unavailable' so clients back off.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' is saturated. Retry later.")
+        self.stage = stage
+
+
+class Stage:
+    """
+    A named pipeline stage with its own concurrency limit and queue bound,
+    running on a (possibly shared) pool.
+    """
+
+    def __init__(self, name: str, pool: Callable[[], Executor], concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._pool = pool
+        self._pending = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting in this stage."""
+        return self._pending
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives bind to one event loop; rebuild if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def check_capacity(self):
+        """
+        Raises ExecutorSaturatedError if a job submitted now would be shed.
+        """
+        if self._pending >= self.concurrency + self.max_queue:
+            raise ExecutorSaturatedError(self.name)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executes fn(*args, **kwargs) on the stage's pool without blocking the loop.
+        """
+        self.check_capacity()
+
+        self._pending += 1
+        try:
+            async with self._get_semaphore():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool(), partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    async def run_when_free(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Like run(), but waits for queue room instead of being shed.
+        For long-running callers (bulk ingest, background jobs).
+        """
+        while True:
+            try:
+                return await self.run(fn, *args, **kwargs)
+            except ExecutorSaturatedError:
+                await asyncio.sleep(0.05)
+
+    async def map(
+        self,
+        fn: Callable[[List[Any]], Any],
+        items: List[Any],
+        batch_size: int,
+        unpack: Optional[Callable[[Any], List[Any]]] = None
+    ) -> List[Any]:
+        """
+        Runs a list-in/list-out fn over items in batches, at most
+        `concurrency` batches at a time, waiting for queue room.
+        `unpack` (if given) turns each batch result into its list of items.
+        """
+        limiter = asyncio.Semaphore(self.concurrency)
+
+        async def run_batch(batch: List[Any]) -> List[Any]:
+            async with limiter:
+                result = await self.run_when_free(fn, batch)
+            return unpack(result) if unpack is not None else result
+
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*[run_batch(b) for b in batches])
+        return [item for batch in results for item in batch]
+
+
+class ExecutorRegistry:
+    """
+    Owns the worker pools and the stages that share them.
+
+    - cpu pool (process or thread, see CPU_EXECUTOR): parse, nlp, embed
+    - with INFERENCE_SIDECAR_SOCKET, nlp and embed run in the shared
+      inference sidecar instead, and only parse uses the cpu pool
+    Vector store calls are natively async and do not need a pool.
+    Pools are created lazily so importing the API never forks workers.
+    """
+
+    def __init__(self, cpu_executor: Optional[str] = None, sidecar_socket: Optional[str] = None):
+        self.cpu_executor = settings.CPU_EXECUTOR if cpu_executor is None else cpu_executor
+        self.sidecar_socket = settings.INFERENCE_SIDECAR_SOCKET if sidecar_socket is None else sidecar_socket
+        self._cpu_pool: Optional[Executor] = None
+        self._sidecar: Optional[Executor] = None
+        queue = settings.EXECUTOR_QUEUE_DEPTH
+
+        self.parse = Stage("parse", self._get_cpu_pool, settings.PARSE_CONCURRENCY, queue)
+        self.nlp = Stage("nlp", self._get_model_pool, settings.NLP_CONCURRENCY, queue)
+        self.embed = Stage("embed", self._get_model_pool, settings.EMBED_CONCURRENCY, queue)
+
+    def _get_model_pool(self) -> Executor:
+        """
+        Where the model-bound stages run: the sidecar if configured, else the cpu pool.
+        """
+        if not self.sidecar_socket:
+            return self._get_cpu_pool()
+        if self._sidecar is None:
+            from src.core.sidecar import SidecarClient
+            self._sidecar = SidecarClient(self.sidecar_socket)
+            logger.info(f"Running nlp and embed stages in the inference sidecar at {self.sidecar_socket}")
+        return self._sidecar
+
+    def _get_cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if self.cpu_executor == "process":
+                # 'spawn' avoids forking a parent that already holds torch/OpenMP threads
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=settings.CPU_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            elif self.cpu_executor == "thread":
+                self._cpu_pool = ThreadPoolExecutor(
+                    max_workers=settings.CPU_WORKERS, thread_name_prefix="axiom-cpu"
+                )
+            else:
+                raise RuntimeError(f"Unknown CPU_EXECUTOR '{self.cpu_executor}'.")
+            logger.info(f"Started {self.cpu_executor} pool with {settings.CPU_WORKERS} workers")
+        return self._cpu_pool
+
+    async def broadcast(self, fn: Callable[[], Any]) -> List[Any]:
+        """
+        Runs fn once per worker of the model-bound stages, all at once, so that
+        each worker process is started and runs it (e.g. to load models before
+        the first request). Pools do not pin tasks to workers: this is best
+        effort. The sidecar is a single process: it runs fn once.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_model_pool()
+        workers = 1 if self.sidecar_socket else settings.CPU_WORKERS
+        return await asyncio.gather(*[loop.run_in_executor(pool, fn) for _ in range(workers)])
+
+    def stats(self) -> Dict[str, int]:
+        """Pending job count per stage."""
+        return {s.name: s.pending for s in (self.parse, self.nlp, self.embed)}
+
+    def shutdown(self):
+        """Stops the pools. Called from the application lifespan."""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=True, cancel_futures=True)
+        if self._sidecar is not None:
+            self._sidecar.shutdown()
+        self._cpu_pool = None
+        self._sidecar = None
+
+
+# Global instance
+executors = ExecutorRegistry()
+metrics.registry.callback(
+    "axiom_executor_pending", "Jobs running or queued per executor stage.",
+    lambda: {(name,): pending for name, pending in executors.stats().items()}, labelnames=["stage"]
+)
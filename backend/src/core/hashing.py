@@ -0,0 +1,61 @@
+"""
+hashing.py
+----------
+Deterministic identities for documents and chunks.
+Ids derived from normalized content let re-sync jobs skip unchanged documents
+before any NLP runs, and let modified documents be replaced in place.
+"""
+
+import hashlib
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from typing import List, Optional
+
+# Fixed namespace so ids are stable across processes and deployments
+AXIOM_NAMESPACE = uuid.UUID("6f1d3c2e-8a4b-5e7f-9c0d-1a2b3c4d5e6f")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """
+    Canonical form for hashing: Unicode NFKC with whitespace collapsed, so
+    re-extracted PDFs with different line wrapping hash identically.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """
+    SHA-256 of the normalized text.
+    """
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def document_id(text_hash: str, source_id: Optional[str] = None) -> str:
+    """
+    Point-compatible UUID for a document.
+    With a source_id (e.g. a SharePoint URL) the id is stable across edits, so a
+    changed document replaces its previous version. Without one, the document
+    is addressed by its content.
+    """
+    key = f"source:{source_id}" if source_id else f"content:{text_hash}"
+    return str(uuid.uuid5(AXIOM_NAMESPACE, key))
+
+
+def chunk_ids(doc_id: str, chunks: List[str]) -> List[str]:
+    """
+    Point ids for a document's chunks, derived from each chunk's content.
+    Unchanged chunks keep their id (and stored vector) when text is inserted
+    elsewhere in the document. Repeated chunks are told apart by occurrence.
+    """
+    namespace = uuid.UUID(doc_id)
+    seen: Counter = Counter()
+    ids = []
+    for chunk in chunks:
+        digest = content_hash(chunk)
+        ids.append(str(uuid.uuid5(namespace, f"{digest}:{seen[digest]}")))
+        seen[digest] += 1
+    return ids
@@ -0,0 +1,201 @@
+"""
+ingestion.py
+------------
+The ingestion pipeline shared by the text, PDF and bulk endpoints:
+dedup lookup -> Green AI gate + PII scrub + chunking -> embedding -> storage.
+
+Content is hashed before any NLP runs. Unchanged documents only get their
+governance metadata refreshed (identical content uploaded by another owner
+is a duplicate and leaves the stored document alone); modified documents
+are replaced in place and reuse the stored vectors of chunks that did not change.
+"""
+
+from functools import partial
+from typing import Any, Dict, List, Optional
+from src.config import settings
+from src.core import hashing, metrics
+from src.core.batcher import embedded_vectors, embedding_batcher
+from src.core.executor import executors
+from src.core.tasks import analyze_documents, embed_texts
+from src.db.vector_store import vector_db
+
+
+def make_record(text: str, metadata: Dict[str, Any], source_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Builds a pipeline record. `metadata` holds the request-level governance
+    fields (owner, tags, valid_until, source_type...).
+    """
+    text_hash = hashing.content_hash(text)
+    return {
+        "text": text,
+        "metadata": metadata,
+        "content_hash": text_hash,
+        "doc_id": hashing.document_id(text_hash, source_id),
+    }
+
+
+async def ingest_records(records: List[Dict[str, Any]], threshold: float, bulk: bool = False) -> List[Dict[str, Any]]:
+    """
+    Runs records through the whole pipeline and returns one result per record:
+    {"status": "ingested" | "unchanged" | "duplicate" | "superseded" | "rejected", "id", "quality_score", ...}
+
+    Interactive requests (bulk=False) are shed with a 503 when a stage is
+    saturated; bulk callers wait for capacity instead.
+    """
+    return await store_records(await analyze_records(records, threshold, bulk), bulk)
+
+
+async def analyze_records(records: List[Dict[str, Any]], threshold: float, bulk: bool = False) -> List[Dict[str, Any]]:
+    """
+    Pipeline front half: dedup lookup, then the Green AI gate, PII scrubbing
+    and chunking for new or changed content. Records that are already decided
+    get a "result"; accepted ones get an "analysis" for store_records().
+    """
+    # 1. Dedup: skip documents whose normalized content is already stored
+    with metrics.stage("dedup"):
+        stored = await vector_db.lookup_documents([r["doc_id"] for r in records])
+    touched = []
+    pending = []
+    # One version per document per batch: the last record wins. Storing two
+    # versions together would let each one's cleanup delete the other's chunks.
+    latest = {record["doc_id"]: record for record in records}
+    for record in records:
+        head = stored.get(record["doc_id"])
+        last = latest[record["doc_id"]]
+        if last is not record:
+            if last["content_hash"] == record["content_hash"]:
+                # Same content twice in one batch: process it once
+                record["result"] = {"status": "duplicate", "id": record["doc_id"]}
+            else:
+                record["result"] = {
+                    "status": "superseded",
+                    "id": record["doc_id"],
+                    "reason": "A later record in the same batch replaces this document."
+                }
+        elif head and head.get("content_hash") == record["content_hash"] and not _same_owner(head, record):
+            # Content-addressed ids collide across uploaders: never move a document's
+            # governance metadata (owner, tags, expiry) to someone else's upload
+            record["result"] = {
+                "status": "duplicate",
+                "id": record["doc_id"],
+                "reason": "Identical content is already stored by another owner."
+            }
+        elif head and head.get("content_hash") == record["content_hash"]:
+            touched.append((record["doc_id"], record["metadata"]))
+            record["result"] = {
+                "status": "unchanged",
+                "id": record["doc_id"],
+                "quality_score": head.get("quality_score"),
+                "score_tier": head.get("score_tier"),
+                "chunks": head.get("chunk_count"),
+                "pii_redacted": head.get("pii_redacted", False)
+            }
+        else:
+            pending.append(record)
+    if touched:
+        with metrics.stage("dedup"):
+            await vector_db.touch_documents(touched)
+
+    # 2. Green AI Filter + Security + Chunking
+    texts = [r["text"] for r in pending]
+    with metrics.stage("analyze"):
+        if bulk:
+            analyses = await executors.nlp.map(
+                # One bad record must not fail the rest of the bulk batch
+                partial(analyze_documents, threshold=threshold, isolate_errors=True),
+                texts,
+                # Spread the batch over every NLP worker
+                batch_size=max(1, -(-len(texts) // settings.NLP_CONCURRENCY))
+            )
+        elif texts:
+            analyses = await executors.nlp.run(analyze_documents, texts, threshold)
+        else:
+            analyses = []
+
+    for record, analysis in zip(pending, analyses):
+        # Score / scrub / chunk were timed inside the worker
+        metrics.record_stages(analysis.get("timings", {}))
+        if analysis["accepted"]:
+            record["analysis"] = analysis
+        elif "error" in analysis:
+            record["result"] = {"status": "error", "reason": f"Analysis failed: {analysis['error']}"}
+        else:
+            record["result"] = {
+                "status": "rejected",
+                "quality_score": analysis["quality_score"],
+                "score_tier": analysis.get("score_tier"),
+                "reason": f"Low information density score: {analysis['quality_score']}."
+            }
+    return records
+
+
+def _same_owner(head: Dict[str, Any], record: Dict[str, Any]) -> bool:
+    return head.get("owner") is None or head["owner"] == record["metadata"].get("owner")
+
+
+async def store_records(records: List[Dict[str, Any]], bulk: bool = False) -> List[Dict[str, Any]]:
+    """
+    Pipeline back half: embeds the chunks of accepted records (reusing stored
+    vectors of unchanged chunks), stores them and returns every record's result.
+    """
+    accepted = [r for r in records if "result" not in r]
+
+    # 3. Vectorize only chunks whose content is not already stored
+    documents = []
+    for record in accepted:
+        analysis = record["analysis"]
+        documents.append({
+            "doc_id": record["doc_id"],
+            "content_hash": record["content_hash"],
+            "chunks": analysis["chunks"],
+            "sparse": analysis.get("sparse"),
+            "point_ids": hashing.chunk_ids(record["doc_id"], analysis["chunks"]),
+            "metadata": {
+                **record["metadata"],
+                "quality_score": analysis["quality_score"],
+                "score_tier": analysis.get("score_tier"),
+                "cleaned_length": analysis["cleaned_length"],
+                "pii_redacted": analysis["pii_redacted"]
+            }
+        })
+
+    with metrics.stage("vector_reuse"):
+        known = await vector_db.get_vectors([pid for d in documents for pid in d["point_ids"]])
+    missing = [
+        chunk
+        for d in documents
+        for chunk, pid in zip(d["chunks"], d["point_ids"])
+        if pid not in known
+    ]
+    with metrics.stage("embed"):
+        if bulk:
+            fresh = iter(await executors.embed.map(
+                embed_texts, missing, batch_size=settings.EMBED_BATCH_SIZE, unpack=embedded_vectors
+            ))
+        else:
+            fresh = iter(await embedding_batcher.embed_many(missing))
+
+    for d in documents:
+        d["vectors"] = [known[pid] if pid in known else next(fresh) for pid in d.pop("point_ids")]
+    metrics.CHUNKS.inc(len(missing), source="embedded")
+    metrics.CHUNKS.inc(sum(len(d["vectors"]) for d in documents) - len(missing), source="reused")
+
+    # 4. Storage
+    if documents:
+        with metrics.stage("upsert"):
+            await vector_db.upsert_documents(documents)
+
+    for record, d in zip(accepted, documents):
+        record["result"] = {
+            "status": "ingested",
+            "id": d["doc_id"],
+            "quality_score": record["analysis"]["quality_score"],
+            "score_tier": record["analysis"].get("score_tier"),
+            "chunks": len(d["chunks"]),
+            "pii_redacted": record["analysis"]["pii_redacted"]
+        }
+        metrics.PII_REDACTIONS.inc(record["analysis"].get("pii_spans", 0))
+
+    for record in records:
+        metrics.DOCUMENTS.inc(status=record["result"]["status"])
+    return [r["result"] for r in records]
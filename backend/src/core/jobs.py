@@ -0,0 +1,428 @@
+"""
+jobs.py
+-------
+Background ingestion jobs, queued in SQLite.
+Uploads are spooled to disk and acknowledged with a job id; worker tasks
+claim queued jobs, run them stage by stage and record per-stage progress
+and timings, so upload latency no longer depends on processing time.
+
+A claim is an atomic UPDATE that takes a time-limited lease, renewed at
+every stage and by a heartbeat while a stage runs. Several API processes
+can share one queue, and the jobs of a crashed process are picked up again
+once their lease runs out, unless they have used up their attempts (a job
+that keeps crashing its worker is failed rather than retried forever).
+Every later write is conditioned on the claim (still running, same attempt):
+a stalled worker whose job was reclaimed elsewhere abandons it instead of
+renewing, overwriting or completing the other worker's attempt.
+Failed attempts are retried with exponential backoff.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Set
+from src.config import settings
+
+logger = logging.getLogger("axiom.jobs")
+
+# Job statuses
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+# Stage statuses
+PENDING, DONE = "pending", "done"
+
+_COLUMNS = (
+    "id, kind, status, params, spool_path, attempts, stages, result, error, "
+    "created_at, started_at, finished_at"
+)
+
+# Matches a job only while the claim of the worker updating it still holds
+_CLAIMED = "id = ? AND status = ? AND attempts = ?"
+
+
+class LeaseLostError(RuntimeError):
+    """
+    Raised when a job's lease expired and the job was reclaimed (or finished)
+    by another worker: the current attempt must be abandoned.
+    """
+
+
+class Job:
+    """
+    A claimed job, handed to its kind's handler.
+    """
+
+    def __init__(self, queue: "JobQueue", record: Dict[str, Any]):
+        self.queue = queue
+        self.id = record["id"]
+        self.kind = record["kind"]
+        self.params = record["params"]
+        self.spool_path = record["spool_path"]
+        self.attempts = record["attempts"]
+        self.stages = record["stages"]
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        """
+        Records a stage's start, duration and completion (and renews the lease).
+        """
+        started = time.time()
+        self.stages[name] = {"status": RUNNING, "started_at": started, "seconds": None}
+        await self.queue._save_stages(self)
+        try:
+            yield
+        except Exception:
+            self.stages[name] = {"status": FAILED, "started_at": started, "seconds": round(time.time() - started, 3)}
+            raise
+        self.stages[name] = {"status": DONE, "started_at": started, "seconds": round(time.time() - started, 3)}
+        await self.queue._save_stages(self)
+
+
+Handler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    SQLite job table plus a spool directory, processed by `workers` asyncio
+    tasks per process. Blocking SQLite calls run in a thread under one lock.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        workers: int,
+        max_attempts: int,
+        retry_backoff: float,
+        lease_seconds: float,
+        poll_interval: float
+    ):
+        self.directory = directory
+        self.spool_dir = os.path.join(directory, "spool")
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, Handler] = {}
+        self._stages: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(self, kind: str, handler: Handler, stages: List[str]):
+        """
+        Declares a job kind: its handler and the stages it reports, in order.
+        """
+        self._handlers[kind] = handler
+        self._stages[kind] = stages
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(self.directory, "jobs.db"), check_same_thread=False, timeout=30
+        )
+        # WAL lets status polls read while a worker writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                spool_path TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                stages TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                -- queued: not before this time / running: lease expiry
+                available_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+        """)
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            if self._db is None:
+                self._open()
+            return fn(*args)
+
+    @staticmethod
+    def _record(row: tuple) -> Dict[str, Any]:
+        record = dict(zip([c.strip() for c in _COLUMNS.split(",")], row))
+        for field in ("params", "stages", "result"):
+            record[field] = json.loads(record[field]) if record[field] else None
+        return record
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    async def submit(self, kind: str, params: Dict[str, Any], upload: Optional[BinaryIO] = None) -> str:
+        """
+        Queues a job, spooling `upload` (a file object) to disk first.
+        Returns the job id.
+        """
+        if kind not in self._handlers:
+            raise RuntimeError(f"Unknown job kind '{kind}'.")
+        job_id = str(uuid.uuid4())
+        spool_path = None
+        if upload is not None:
+            # Outside the lock: status polls need not wait for a large copy
+            spool_path = await asyncio.to_thread(self._spool, job_id, upload)
+        await self._run(self._insert, job_id, kind, params, spool_path)
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def _spool(self, job_id: str, upload: BinaryIO) -> str:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        spool_path = os.path.join(self.spool_dir, job_id)
+        with open(spool_path, "wb") as f:
+            shutil.copyfileobj(upload, f, length=1024 * 1024)
+        return spool_path
+
+    def _insert(self, job_id: str, kind: str, params: Dict[str, Any], spool_path: Optional[str]):
+        now = time.time()
+        stages = {name: {"status": PENDING, "started_at": None, "seconds": None} for name in self._stages[kind]}
+        with self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, params, spool_path, stages, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), spool_path, json.dumps(stages), now, now)
+            )
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A job's status, per-stage progress and timings, and result; None if unknown.
+        """
+        row = await self._run(
+            lambda: self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        )
+        if row is None:
+            return None
+        record = self._record(row)
+        stages = record["stages"]
+        done = sum(1 for s in stages.values() if s["status"] == DONE)
+        return {
+            "id": record["id"],
+            "kind": record["kind"],
+            "status": record["status"],
+            "attempts": record["attempts"],
+            "progress": round(done / len(stages), 3) if stages else 1.0,
+            "stages": stages,
+            "result": record["result"],
+            "error": record["error"],
+            "created_at": record["created_at"],
+            "started_at": record["started_at"],
+            "finished_at": record["finished_at"],
+        }
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Starts the worker tasks on the running loop (idempotent).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # asyncio primitives bind to one event loop (matters for tests)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = {loop.create_task(self._worker(i)) for i in range(self.workers)}
+        logger.info(f"Started {self.workers} ingestion job workers")
+
+    async def stop(self):
+        """
+        Cancels the workers. Running jobs are retried after their lease expires.
+        """
+        tasks, self._tasks = self._tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                record = await self._run(self._claim)
+            except Exception as e:
+                logger.error(f"Job worker {index} could not claim a job: {e}")
+                record = None
+            if record is None:
+                # Idle: wait for a local submit, or poll for other processes' jobs
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(Job(self, record))
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._db:
+            # Lost leases of jobs without attempts left: fail instead of running them again
+            abandoned = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND available_at <= ? AND attempts >= ? RETURNING spool_path",
+                (FAILED, "The worker running this job was lost on its last attempt.", now, RUNNING, now, self.max_attempts)
+            ).fetchall()
+            row = self._db.execute(
+                f"""
+                UPDATE jobs SET status = ?, attempts = attempts + 1, available_at = ?,
+                    started_at = COALESCE(started_at, ?)
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status IN (?, ?) AND available_at <= ?
+                    ORDER BY created_at LIMIT 1
+                )
+                RETURNING {_COLUMNS}
+                """,
+                (RUNNING, now + self.lease_seconds, now, QUEUED, RUNNING, now)
+            ).fetchone()
+        for (spool_path,) in abandoned:
+            self._remove_spool(spool_path)
+        if abandoned:
+            logger.error(f"Failed {len(abandoned)} job(s) whose worker was lost on the last attempt")
+        return self._record(row) if row else None
+
+    async def _process(self, job: Job):
+        handler = self._handlers.get(job.kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler for job kind '{job.kind}'.")
+            result = await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except LeaseLostError as e:
+            logger.warning(f"Abandoning job {job.id} attempt {job.attempts}: {e}")
+            return
+        except Exception as e:
+            retry = job.attempts < self.max_attempts and handler is not None
+            logger.error(f"Job {job.id} attempt {job.attempts} failed: {e}" + (" (will retry)" if retry else ""))
+            await self._run(self._fail, job, str(e), retry)
+            return
+        finally:
+            heartbeat.cancel()
+        if not await self._run(self._complete, job, result):
+            logger.warning(f"Discarded the result of job {job.id} attempt {job.attempts}: its lease was lost")
+
+    async def _heartbeat(self, job: Job):
+        """
+        Renews the lease while the job runs: a single stage may outlast it.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self._run(
+                    self._execute,
+                    f"UPDATE jobs SET available_at = ? WHERE {_CLAIMED}",
+                    (time.time() + self.lease_seconds, job.id, RUNNING, job.attempts)
+                )
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of job {job.id}: {e}")
+                continue
+            if not renewed:
+                # Reclaimed elsewhere: the next stage write abandons the attempt
+                logger.warning(f"Lost the lease of job {job.id} attempt {job.attempts}")
+                return
+
+    def _complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        with self._db:
+            completed = self._db.execute(
+                f"UPDATE jobs SET status = ?, result = ?, stages = ?, error = NULL, finished_at = ? WHERE {_CLAIMED}",
+                (COMPLETED, json.dumps(result), json.dumps(job.stages), time.time(), job.id, RUNNING, job.attempts)
+            ).rowcount
+        if completed:
+            # The spool now belongs to whichever worker holds the job
+            self._discard_spool(job)
+        return bool(completed)
+
+    def _fail(self, job: Job, error: str, retry: bool):
+        now = time.time()
+        if retry:
+            # Restart from the first stage after an exponential backoff
+            stages = {name: {"status": PENDING, "started_at": None, "seconds": None} for name in job.stages}
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+            with self._db:
+                self._db.execute(
+                    f"UPDATE jobs SET status = ?, stages = ?, error = ?, available_at = ? WHERE {_CLAIMED}",
+                    (QUEUED, json.dumps(stages), error, now + delay, job.id, RUNNING, job.attempts)
+                )
+            return
+        with self._db:
+            failed = self._db.execute(
+                f"UPDATE jobs SET status = ?, stages = ?, error = ?, finished_at = ? WHERE {_CLAIMED}",
+                (FAILED, json.dumps(job.stages), error, now, job.id, RUNNING, job.attempts)
+            ).rowcount
+        if failed:
+            self._discard_spool(job)
+
+    async def _save_stages(self, job: Job):
+        """
+        Saves stage progress and renews the lease; raises LeaseLostError if the
+        job is no longer this worker's.
+        """
+        saved = await self._run(
+            self._execute,
+            f"UPDATE jobs SET stages = ?, available_at = ? WHERE {_CLAIMED}",
+            (json.dumps(job.stages), time.time() + self.lease_seconds, job.id, RUNNING, job.attempts)
+        )
+        if not saved:
+            raise LeaseLostError(f"Job {job.id} was reclaimed after its lease expired.")
+
+    def _execute(self, sql: str, args: tuple) -> int:
+        """
+        Runs one write; returns the number of rows it changed.
+        """
+        with self._db:
+            return self._db.execute(sql, args).rowcount
+
+    @classmethod
+    def _discard_spool(cls, job: Job):
+        cls._remove_spool(job.spool_path)
+
+    @staticmethod
+    def _remove_spool(spool_path: Optional[str]):
+        if spool_path:
+            try:
+                os.remove(spool_path)
+            except FileNotFoundError:
+                pass
+
+
+# Global instance
+job_queue = JobQueue(
+    settings.JOBS_DIR,
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff=settings.JOB_RETRY_BACKOFF,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL
+)
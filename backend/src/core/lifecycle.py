@@ -0,0 +1,194 @@
+"""
+lifecycle.py
+------------
+Expired-content sweeper.
+Search hides points past their valid_until, but only deleting them shrinks
+the collection (and the filtered-out set every search has to skip). The
+sweeper deletes points that expired more than a grace period ago, in
+batches, on a schedule and on demand (admin endpoint, with a dry run).
+
+Payloads of deleted points (text and governance metadata, no vectors) are
+first appended to a gzip-compressed JSON-lines archive, one file per day:
+a crash between archiving and deleting re-archives a batch rather than
+losing it.
+
+With several API processes on a node, each runs the schedule, but a sweep
+holds an flock on LIFECYCLE_LOCK_FILE: only one process sweeps at a time
+and the others skip their turn.
+"""
+
+import asyncio
+import fcntl
+import gzip
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.config import settings
+from src.db.base import VectorDB
+from src.db.vector_store import vector_db
+
+logger = logging.getLogger("axiom.lifecycle")
+
+
+class SweepInProgressError(RuntimeError):
+    """
+    Raised when another process on the node is already sweeping.
+    """
+
+
+class LifecycleSweeper:
+    """
+    Deletes expired points from a vector store, archiving their payloads.
+    """
+
+    def __init__(
+        self,
+        db: VectorDB,
+        grace_seconds: float,
+        batch_size: int,
+        archive_dir: str,
+        interval: float,
+        lock_path: str = ""
+    ):
+        self.db = db
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.lock_path = lock_path
+        self.last_sweep: Optional[Dict[str, Any]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio primitives bind to one event loop (matters for tests)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    @contextmanager
+    def _node_lock(self) -> Iterator[None]:
+        """
+        Holds the sweep flock of the node (no-op without a lock path).
+        """
+        if not self.lock_path:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        with open(self.lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SweepInProgressError("Another process is already sweeping expired content.")
+            yield
+
+    async def sweep(self, dry_run: bool = False, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Deletes (or with `dry_run`, only counts) the points whose expiry is
+        more than the grace period in the past. One sweep at a time per
+        node: raises SweepInProgressError while another process sweeps.
+        """
+        now = time.time() if now is None else now
+        cutoff = int(now - self.grace_seconds)
+        report: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "cutoff": datetime.fromtimestamp(cutoff, timezone.utc).isoformat(),
+            "grace_seconds": self.grace_seconds,
+        }
+
+        if dry_run:
+            report.update(await self.db.count_expired(cutoff))
+            return report
+
+        started = time.perf_counter()
+        async with self._get_lock():
+            with self._node_lock():
+                points = 0
+                documents = set()
+                archive = None
+                previous: set = set()
+                while True:
+                    batch = await self.db.expired_points(cutoff, self.batch_size)
+                    if not batch:
+                        break
+                    ids = {point_id for point_id, _ in batch}
+                    if ids & previous:
+                        # Never loop forever over points the store failed to delete
+                        raise RuntimeError("Expired points were still present after deletion.")
+                    previous = ids
+                    if self.archive_dir:
+                        archive = await asyncio.to_thread(self._archive, batch, now)
+                    await self.db.delete_points(list(ids))
+                    points += len(batch)
+                    documents.update(payload.get("doc_id") for _, payload in batch)
+                if points:
+                    await self.db.compact()
+
+        report.update({
+            "points": points,
+            "documents": len(documents),
+            "archive": archive,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        self.last_sweep = {**report, "finished_at": datetime.now(timezone.utc).isoformat()}
+        if points:
+            logger.info(f"Swept {points} expired points ({len(documents)} documents)")
+        return report
+
+    def _archive(self, batch: List[Tuple[str, Dict[str, Any]]], now: float) -> str:
+        """
+        Appends a batch to today's archive (a new gzip member per batch).
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        day = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%d")
+        path = os.path.join(self.archive_dir, f"expired-{day}.jsonl.gz")
+        archived_at = int(now)
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for point_id, payload in batch:
+                f.write(json.dumps({"id": point_id, "archived_at": archived_at, "payload": payload}, default=str) + "\n")
+        return path
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Starts the periodic sweep on the running loop (no-op if the interval is 0).
+        """
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except SweepInProgressError:
+                logger.info("Skipped the scheduled sweep: another process is sweeping")
+            except Exception as e:
+                logger.error(f"Lifecycle sweep failed: {e}")
+
+
+# Global instance
+lifecycle_sweeper = LifecycleSweeper(
+    vector_db,
+    grace_seconds=settings.LIFECYCLE_GRACE_SECONDS,
+    batch_size=settings.LIFECYCLE_BATCH_SIZE,
+    archive_dir=settings.LIFECYCLE_ARCHIVE_DIR,
+    interval=settings.LIFECYCLE_SWEEP_INTERVAL,
+    lock_path=settings.LIFECYCLE_LOCK_FILE
+)
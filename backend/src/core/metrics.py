@@ -0,0 +1,309 @@
+"""
+metrics.py
+----------
+Lightweight in-process metrics: counters, gauges and histograms rendered in
+the Prometheus text exposition format on /metrics.
+
+Every pipeline stage (parse, dedup, score, scrub, chunk, embed, upsert,
+vector reuse lookup, query embedding, answer-cache lookup, search, context assembly, LLM call) is
+timed with `stage(name)`, which feeds the `axiom_stage_seconds` histogram,
+the `axiom_stage_in_flight` gauge and, when timing headers are enabled, the
+Server-Timing header of the current request.
+
+Work done inside pool workers (score / scrub / chunk) is timed there with a
+Stopwatch and recorded by the API process from the returned timings, so the
+numbers are the same with thread pools, process pools and the sidecar.
+Embedding-cache lookups travel back with the embed results the same way.
+Metrics are per process: with several API workers, scrape each one (or sum).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Latency buckets (seconds): sub-millisecond lookups up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+# Stage durations of the request being served (None outside requests or with timing headers off)
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("axiom_request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """
+    A named metric family with a fixed set of label names.
+    """
+
+    kind = "untyped"
+    # Value of an unlabelled metric before its first update (exported as such)
+    initial: Optional[float] = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+        if not self.labelnames and self.initial is not None:
+            self._values[()] = self.initial
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """(suffix, label values, value) per sample, sorted by label values."""
+        with self._lock:
+            return [("", key, value) for key, value in sorted(self._values.items())]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, value in self.samples():
+            names = self.labelnames
+            if suffix == "_bucket":
+                # The bucket bound travels as the last label value
+                names = names + ("le",)
+            lines.append(f"{self.name}{suffix}{_format_labels(names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+    initial = 0.0
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    initial = 0.0
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Counts the block as in flight while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts + the +Inf overflow, sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", key + (_format_value(bound),), cumulative))
+            samples.append(("_sum", key, total))
+            samples.append(("_count", key, cumulative))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """
+    A metric read at scrape time from existing state (e.g. cache statistics).
+    `read` returns a single value or {label values: value}.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], Union[float, Dict[LabelValues, float]]],
+        kind: str = "gauge",
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.read = read
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [("", tuple(str(v) for v in key), value) for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """
+    The metric families of this process, in registration order.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, read: Callable, kind: str = "gauge", labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, read, kind, labelnames))
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        A failing callback is skipped rather than failing the scrape.
+        """
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Stage timing
+# ----------------------------------------------------------------------
+
+class Stopwatch:
+    """
+    Splits a block of work into named laps (repeated names accumulate).
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name: str):
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0.0) + now - self._last
+        self._last = now
+
+
+def record_stage(name: str, seconds: float):
+    """
+    Records a stage duration measured elsewhere (e.g. inside a pool worker).
+    """
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record_stages(timings: Dict[str, float]):
+    for name, seconds in timings.items():
+        record_stage(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a pipeline stage (works around awaits: wall-clock time of the block).
+    """
+    started = time.perf_counter()
+    STAGE_IN_FLIGHT.inc(stage=name)
+    try:
+        yield
+    finally:
+        STAGE_IN_FLIGHT.dec(stage=name)
+        record_stage(name, time.perf_counter() - started)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """
+    Starts collecting stage durations for the current request (see Server-Timing).
+    """
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+# Global instance
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram("axiom_stage_seconds", "Duration of pipeline stages.", ["stage"])
+STAGE_IN_FLIGHT = registry.gauge("axiom_stage_in_flight", "Pipeline stages currently running.", ["stage"])
+DOCUMENTS = registry.counter(
+    "axiom_documents_total", "Ingested documents by outcome (ingested, unchanged, duplicate, superseded, rejected, error).", ["status"]
+)
+PII_REDACTIONS = registry.counter("axiom_pii_redactions_total", "PII spans redacted from ingested documents.")
+EMBEDDING_CACHE = registry.counter("axiom_embedding_cache_requests_total", "Embedding cache lookups by result.", ["result"])
+CHUNKS = registry.counter("axiom_chunks_total", "Chunks stored, by whether their vector was embedded or reused.", ["source"])
+HTTP_REQUESTS = registry.counter("axiom_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+HTTP_SECONDS = registry.histogram("axiom_http_request_seconds", "HTTP request duration by route.", ["method", "route"])
+HTTP_IN_FLIGHT = registry.gauge("axiom_http_requests_in_flight", "HTTP requests currently being served.")
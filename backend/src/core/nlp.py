@@ -0,0 +1,85 @@
+"""
+nlp.py
+------
+Shared spaCy analysis stage for the ingestion pipeline.
+Loads the language model once per process and parses each document a single
+time, running only the components each consumer actually needs.
+"""
+
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Components we never use. Excluding them means their weights are not loaded.
+EXCLUDED_COMPONENTS = ("parser", "lemmatizer")
+
+# Key in Doc.user_data recording which components already ran on a Doc.
+_APPLIED_KEY = "axiom_applied_components"
+
+
+class NLPPipeline:
+    """
+    A single spaCy pipeline shared by the Scorer and the PII Scrubber.
+
+    Consumers declare the components they need (e.g. the tagger for
+    density scoring, NER for redaction). A Doc produced by `analyze` can be
+    handed to the next consumer, which only runs the components still missing.
+    """
+
+    def __init__(self, model_name: str = "en_core_web_sm", nlp: Optional[Language] = None):
+        """
+        Loads `model_name`, or wraps an already built `nlp` (e.g. a blank
+        tokenizer-only pipeline in tests).
+        """
+        if nlp is None:
+            try:
+                nlp = spacy.load(model_name, exclude=list(EXCLUDED_COMPONENTS))
+            except OSError:
+                raise RuntimeError(f"Spacy model '{model_name}' not found.")
+        self.nlp: Language = nlp
+        self.model_name = model_name
+
+    def analyze(self, text: str, components: Iterable[str]) -> Doc:
+        """
+        Tokenizes the text and runs the requested components.
+        """
+        return self.extend(self.nlp.make_doc(text), components)
+
+    def analyze_many(self, texts: List[str], components: Iterable[str]) -> Iterator[Doc]:
+        """
+        Batched analyze() for many short texts (one nlp.pipe call).
+        """
+        wanted = set(components)
+        disable = [name for name in self.nlp.pipe_names if name not in wanted]
+        return self.nlp.pipe(texts, disable=disable)
+
+    def extend(self, doc: Doc, components: Iterable[str]) -> Doc:
+        """
+        Runs any of the requested components that have not yet been applied
+        to this Doc. Components run in pipeline order, so listeners (tagger)
+        always see their tok2vec output.
+        """
+        wanted = set(components)
+        applied = doc.user_data.setdefault(_APPLIED_KEY, [])
+
+        # nlp.components includes pipes that are disabled by default (senter)
+        for name, proc in self.nlp.components:
+            if name in wanted and name not in applied:
+                doc = proc(doc)
+                applied.append(name)
+        return doc
+
+
+# One pipeline per model per process
+_pipelines: Dict[str, NLPPipeline] = {}
+
+
+def get_pipeline(model_name: str = "en_core_web_sm") -> NLPPipeline:
+    """
+    Returns the process-wide pipeline for a model, loading it on first use.
+    """
+    if model_name not in _pipelines:
+        _pipelines[model_name] = NLPPipeline(model_name)
+    return _pipelines[model_name]
+
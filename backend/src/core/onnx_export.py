@@ -0,0 +1,76 @@
+"""
+onnx_export.py
+--------------
+Exports the embedding model for the ONNX backends (EMBED_BACKEND=onnx or
+onnx-int8): the transformer as ONNX (fp32), a dynamic int8-quantized copy
+and the tokenizer. Needs PyTorch, sentence-transformers and onnxruntime.
+
+    python -m src.core.onnx_export                   # into EMBED_ONNX_DIR
+    python -m src.core.onnx_export --out models/mini # elsewhere
+"""
+
+import argparse
+import inspect
+import json
+import os
+from src.config import settings
+from src.core.embedding_backends import EXPORT_INFO_FILE, MODEL_NAME, ONNX_FILES, TOKENIZER_FILE
+
+# ONNX opset supported by every onnxruntime release we target
+OPSET = 17
+
+
+def export(model_name: str, out_dir: str) -> str:
+    """
+    Writes model.onnx, model_int8.onnx, tokenizer.json and export.json into `out_dir`.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    sample = tokenizer(["An example sentence to trace."], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    # Newer PyTorch defaults to the dynamo exporter; the TorchScript one handles BERT models fine
+    kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    fp32_path = os.path.join(out_dir, ONNX_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            (dict(sample),),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=OPSET,
+            **kwargs
+        )
+
+    # Weights to int8, activations quantized on the fly: no calibration data needed
+    quantize_dynamic(fp32_path, os.path.join(out_dir, ONNX_FILES["onnx-int8"]), weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, TOKENIZER_FILE))
+    with open(os.path.join(out_dir, EXPORT_INFO_FILE), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "dim": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+        }, f, indent=2)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME, help="SentenceTransformer model to export.")
+    parser.add_argument("--out", default=settings.EMBED_ONNX_DIR, help="Output directory.")
+    args = parser.parse_args()
+    print(f"Exported {args.model} to {export(args.model, args.out)}")
@@ -2,23 +2,183 @@
 parser.py
 ---------
 Extracts raw text from binary file formats (PDF).
+
+Uploads are spooled to a temporary file and never held in memory whole.
+Workers memory-map the file and extract page ranges in parallel on the
+'parse' stage; pages are yielded in order as their range completes.
+In process mode each page gets a time limit, so one pathological page
+(huge vector drawing, broken content stream) cannot stall the document;
+pages that time out or fail are skipped and counted.
 """
-import io
+
+import asyncio
+import logging
+import mmap
+import os
+import shutil
+import signal
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
 from pypdf import PdfReader
 from fastapi import UploadFile
+from src.config import settings
+from src.core import metrics
+from src.core.executor import executors
+
+logger = logging.getLogger("axiom.parser")
+
+# Per-thread (key, reader, mmap) of the document being extracted
+_local = threading.local()
+
+
+class PageTimeoutError(RuntimeError):
+    """
+    Raised inside a worker when a page exceeds PDF_PAGE_TIMEOUT.
+    """
+
+
+@contextmanager
+def _deadline(seconds: float):
+    """
+    Interrupts the block after `seconds` with SIGALRM. Only possible on the
+    main thread of a process (process-pool workers); a no-op elsewhere.
+    """
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise PageTimeoutError(f"Page extraction exceeded {seconds}s.")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _reader(path: str) -> PdfReader:
+    """
+    The calling worker's reader for `path`. Loading the page tree costs about
+    as much as extracting a few pages, so each worker keeps the reader of the
+    document it is working on across page ranges. PdfReader is not
+    thread-safe: the cache is per thread. The worker extracting the last
+    range releases it; others keep at most one reader until their next
+    document replaces it.
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    cached = getattr(_local, "pdf", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    if cached is not None:
+        cached[2].close()
+
+    with open(path, "rb") as f:
+        # Memory-mapped: the OS pages the file in on demand and shares it between workers
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    reader = PdfReader(data)
+    _local.pdf = (key, reader, data)
+    return reader
+
+
+def _release(path: str):
+    """
+    Closes the calling worker's cached reader of `path`, if any.
+    """
+    cached = getattr(_local, "pdf", None)
+    if cached is not None and cached[0][0] == path:
+        _local.pdf = None
+        cached[2].close()
 
-async def parse_pdf(file: UploadFile) -> str:
-    """
-    Reads a PDF file from memory and extracts text.
-    """
-    content = await file.read()
-    stream = io.BytesIO(content)
-    reader = PdfReader(stream)
-    
-    text = []
-    for page in reader.pages:
-        extracted = page.extract_text()
-        if extracted:
-            text.append(extracted)
-            
-    return "\n".join(text)
\ No newline at end of file
+
+def count_pdf_pages(path: str) -> int:
+    """
+    Number of pages of a PDF file. Blocking; runs on the 'parse' stage.
+    """
+    return len(_reader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, end: int, page_timeout: float) -> List[Optional[str]]:
+    """
+    Text of pages [start, end) of a PDF file. Blocking; runs on the 'parse'
+    stage. A page that fails or times out yields None and is logged.
+    """
+    reader = _reader(path)
+    pages = len(reader.pages)
+    texts: List[Optional[str]] = []
+    for number in range(start, min(end, pages)):
+        try:
+            with _deadline(page_timeout):
+                texts.append(reader.pages[number].extract_text() or "")
+        except Exception as e:
+            logger.warning(f"Skipped page {number + 1} of {os.path.basename(path)}: {e}")
+            texts.append(None)
+    if end >= pages:
+        # Last range of the document: do not pin its mapping (and a deleted spool file)
+        _release(path)
+    return texts
+
+
+async def iter_pdf_pages(path: str, wait: bool = False) -> AsyncIterator[Optional[str]]:
+    """
+    Yields the text of every page in order (None for a skipped page), while
+    later ranges are still being extracted. At most PARSE_CONCURRENCY ranges of a document are in
+    flight, so one large file cannot fill the stage queue.
+
+    Interactive callers are shed when the parse stage is saturated;
+    `wait=True` (background jobs) waits for capacity instead.
+    """
+    stage = executors.parse
+    run = stage.run_when_free if wait else stage.run
+    pages = await run(count_pdf_pages, path)
+
+    size = settings.PDF_PAGES_PER_TASK
+    ranges = deque((start, min(start + size, pages)) for start in range(0, pages, size))
+    inflight: deque = deque()
+    try:
+        while ranges or inflight:
+            while ranges and len(inflight) < stage.concurrency:
+                start, end = ranges.popleft()
+                inflight.append(asyncio.ensure_future(
+                    stage.run_when_free(extract_pdf_pages, path, start, end, settings.PDF_PAGE_TIMEOUT)
+                ))
+            for text in await inflight.popleft():
+                yield text
+    finally:
+        # Consumer stopped early or failed: drop the ranges still queued
+        for task in inflight:
+            task.cancel()
+
+
+async def read_pdf(path: str, wait: bool = False) -> Tuple[str, int]:
+    """
+    Text of a PDF file on disk, pages joined by newlines (empty pages
+    skipped), and the number of pages that failed or timed out.
+    """
+    with metrics.stage("parse"):
+        pages = [text async for text in iter_pdf_pages(path, wait)]
+    return "\n".join(text for text in pages if text), sum(1 for text in pages if text is None)
+
+
+def _spool(upload: BinaryIO) -> str:
+    with tempfile.NamedTemporaryFile(prefix="axiom-", suffix=".pdf", delete=False) as f:
+        shutil.copyfileobj(upload, f, length=1024 * 1024)
+        return f.name
+
+
+async def parse_pdf(file: UploadFile) -> Tuple[str, int]:
+    """
+    Spools an uploaded PDF to a temporary file and extracts its text off the
+    event loop. Returns the text and the number of skipped pages.
+    """
+    path = await asyncio.to_thread(_spool, file.file)
+    try:
+        return await read_pdf(path)
+    finally:
+        os.remove(path)
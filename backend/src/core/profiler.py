@@ -0,0 +1,119 @@
+"""
+profiler.py
+-----------
+Sampling profiler that can be switched on and off at runtime
+(POST /api/v1/admin/profiler/start, then .../stop).
+
+A background thread snapshots the stack of every other thread of the process
+every few milliseconds and counts identical stacks. The result is in the
+"folded" format (`thread;module:function;... count`) read by flamegraph.pl
+and speedscope. Overhead is proportional to the sampling rate and is zero
+while stopped.
+
+Only this process is sampled: with CPU_EXECUTOR=process (or the inference
+sidecar) the NLP and embedding work shows up as the waiting event loop.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from src.config import settings
+
+logger = logging.getLogger("axiom.profiler")
+
+
+class SamplingProfiler:
+    """
+    Periodically samples all thread stacks of the process.
+    """
+
+    def __init__(self, interval_ms: float, max_seconds: float):
+        self.interval_ms = interval_ms
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: Optional[float] = None, seconds: Optional[float] = None):
+        """
+        Starts a new profile (discarding the previous one). Stops by itself
+        after `seconds` (capped at max_seconds) if stop() is not called.
+        """
+        interval = (interval_ms or self.interval_ms) / 1000
+        duration = min(seconds or self.max_seconds, self.max_seconds)
+        if interval <= 0:
+            raise RuntimeError("The sampling interval must be positive.")
+        with self._lock:
+            if self.running:
+                raise RuntimeError("The profiler is already running.")
+            self._stacks = Counter()
+            self._samples = 0
+            self._started_at, self._stopped_at = time.time(), None
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._sample, args=(interval, duration, self._stop), name="axiom-profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Profiler started ({interval * 1000:g} ms interval, at most {duration:g}s)")
+
+    def stop(self) -> str:
+        """
+        Stops sampling and returns the profile in folded format.
+        """
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        return self.folded()
+
+    def _sample(self, interval: float, duration: float, stop: threading.Event):
+        own = threading.get_ident()
+        deadline = time.perf_counter() + duration
+        while not stop.wait(interval) and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                calls = []
+                while frame is not None:
+                    calls.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                calls.append(names.get(ident, str(ident)))
+                # Folded stacks use ';' as separator and a space before the count
+                stacks.append(";".join(reversed(calls)).replace(" ", "_"))
+            with self._lock:
+                self._stacks.update(stacks)
+                self._samples += 1
+        with self._lock:
+            self._stopped_at = time.time()
+
+    def folded(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "samples": self._samples,
+                "stacks": len(self._stacks),
+                "started_at": self._started_at,
+                "stopped_at": self._stopped_at,
+            }
+
+
+# Global instance
+profiler = SamplingProfiler(settings.PROFILER_INTERVAL_MS, settings.PROFILER_MAX_SECONDS)
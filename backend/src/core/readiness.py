@@ -0,0 +1,125 @@
+"""
+readiness.py
+------------
+Background warm-up of the heavy components (NLP models, embedding model,
+vector store connection) and their load state for the health checks.
+
+The API starts serving as soon as the process boots; components load in
+background tasks started by the application lifespan. Until every required
+component is ready, /health/ready answers 503 so the orchestrator keeps the
+replica out of rotation. A component that fails (e.g. Qdrant not up yet) is
+retried with exponential backoff instead of failing the boot.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from src.config import settings
+
+logger = logging.getLogger("axiom.readiness")
+
+# Component states
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class Component:
+    """
+    A component's loader and current load state.
+    """
+
+    def __init__(self, name: str, loader: Loader, required: bool):
+        self.name = name
+        self.loader = loader
+        self.required = required
+        self.state = PENDING
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "attempts": self.attempts,
+            "seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+class Readiness:
+    """
+    Registry of components loaded in the background after startup.
+    """
+
+    def __init__(self, retry_max_seconds: float):
+        self.retry_max_seconds = retry_max_seconds
+        self.components: Dict[str, Component] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def register(self, name: str, loader: Loader, required: bool = True):
+        """
+        Declares a component; `loader` is awaited by the warm-up and must raise on failure.
+        """
+        self.components[name] = Component(name, loader, required)
+
+    @property
+    def ready(self) -> bool:
+        return all(c.state == READY for c in self.components.values() if c.required)
+
+    def start(self):
+        """
+        Starts loading every component on the running loop, in parallel.
+        """
+        loop = asyncio.get_running_loop()
+        self._tasks = {loop.create_task(self._load(c)) for c in self.components.values()}
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _load(self, component: Component):
+        delay = 1.0
+        while True:
+            component.state = LOADING
+            component.attempts += 1
+            started = time.perf_counter()
+            try:
+                await component.loader()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                component.state = FAILED
+                component.error = str(e) or type(e).__name__
+                logger.warning(f"Warm-up of '{component.name}' failed ({component.error}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+                continue
+            component.state = READY
+            component.error = None
+            component.seconds = round(time.perf_counter() - started, 3)
+            logger.info(f"'{component.name}' ready in {component.seconds}s")
+            return
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Overall status and per-component load state.
+        """
+        if self.ready:
+            status = "ready"
+        elif any(c.state == FAILED for c in self.components.values() if c.required):
+            status = "failed"
+        else:
+            status = "starting"
+        return {
+            "status": status,
+            "components": {name: c.report() for name, c in self.components.items()},
+        }
+
+
+# Global instance
+readiness = Readiness(settings.WARMUP_RETRY_MAX_SECONDS)
@@ -2,60 +2,200 @@
 scorer.py
 ---------
 Evaluates the 'Information Density' of a text document.
-Used to implement "Green AI" governance: we do not waste energy 
+Used to implement "Green AI" governance: we do not waste energy
 indexing low-value content (headers, footers, boilerplate).
+
+Scoring against a threshold is tiered so clear cases never pay for the
+tagger: (1) token statistics from the tokenizer alone (stop words, numbers,
+a lexicon of rarely-content words, tokens without letters), (2) POS tagging
+of a bounded sample of lines for long documents, repeated lines (headers,
+footers) tagged once, (3) the full tagger pass, only when the cheaper
+estimates are too close to the threshold.
+
+A document decided by tier 1 or 2 reports that tier's estimate as its
+quality_score: exact near the threshold, approximate (within the tested
+tolerance) away from it. The tier that produced a score is stored next to it
+as score_tier ("heuristic", "sampled" or "full"; only "full" is exact), so
+payloads, filters and search projections can tell estimates apart. Set
+SCORER_TIERED=false for exact scores throughout.
 """
 
-import spacy
-from typing import Dict
+import re
+from typing import Dict, Optional, Tuple
+import numpy as np
+from spacy.attrs import IS_CURRENCY, IS_PUNCT, IS_SPACE, IS_STOP, LIKE_NUM, LOWER, SHAPE
+from spacy.strings import hash_string
+from spacy.tokens import Doc
+from src.config import settings
+from src.core.nlp import NLPPipeline, get_pipeline
+
+# POS tags counted as content
+CONTENT_POS = ("NOUN", "VERB", "ADJ", "PROPN")
+
+# score_tier values: which tier produced a quality_score
+TIER_HEURISTIC, TIER_SAMPLED, TIER_FULL = "heuristic", "sampled", "full"
+
+# Non-stop words that are rarely tagged as content (adverbs, interjections,
+# abbreviations): candidates the heuristic tier does not count as content
+NON_CONTENT_LEXICON = (
+    "additionally", "approximately", "actually", "currently", "especially", "finally",
+    "furthermore", "generally", "instead", "maybe", "recently", "simply", "soon",
+    "usually", "etc", "e.g.", "i.e.", "vs", "vs.", "ok", "okay", "yes", "hello",
+    "hi", "oh", "thanks", "ago", "&",
+)
+_NON_CONTENT_IDS = np.array(sorted(hash_string(w) for w in NON_CONTENT_LEXICON), dtype=np.uint64)
+
+# Sampling units: lines and sentences
+_UNIT_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
 
 class ContentScorer:
     """
     Calculates a utility score for text content.
     """
-    
-    def __init__(self, model_name: str = "en_core_web_sm"):
-        try:
-            self.nlp = spacy.load(model_name)
-        except OSError:
-            raise RuntimeError(f"Spacy model '{model_name}' not found.")
 
-    def calculate_score(self, text: str) -> float:
+    # POS tags come from the tagger + attribute_ruler mapping
+    components = ("tok2vec", "tagger", "attribute_ruler")
+
+    def __init__(self, model_name: str = "en_core_web_sm", pipeline: Optional[NLPPipeline] = None):
+        self.pipeline = pipeline or get_pipeline(model_name)
+        self.nlp = self.pipeline.nlp
+
+    def calculate_score(self, text: str, doc: Optional[Doc] = None, threshold: Optional[float] = None) -> float:
         """
-        Computes the Information Density Score (0.0 to 1.0).
-        
+        The Information Density Score alone (see `score`).
+        """
+        return self.score(text, doc, threshold)[0]
+
+    def score(self, text: str, doc: Optional[Doc] = None, threshold: Optional[float] = None) -> Tuple[float, str]:
+        """
+        Computes the Information Density Score (0.0 to 1.0) and the tier that produced it.
+
         Algorithm:
         1. Tokenize text.
         2. Count 'Content Tokens' (Nouns, Verbs, Adjectives) vs Total Tokens.
         3. Penalize extremely short texts.
+
+        If a Doc for the same text is supplied (from the shared NLP stage),
+        only the missing tagging components are run on it.
+
+        With a `threshold`, the score only needs to be exact near it: clear
+        cases are decided by the cheaper tiers and return their estimate,
+        which is the score stored for those documents (with its tier).
         """
         if not text or len(text.strip()) < 50:
-            return 0.0  # Reject empty or tiny snippets
+            return 0.0, TIER_FULL  # Reject empty or tiny snippets
+
+        if threshold is not None and settings.SCORER_TIERED:
+            if doc is None:
+                doc = self.pipeline.analyze(text, ())
+            estimate = self._estimate(text, doc, threshold)
+            if estimate is not None:
+                return estimate
+
+        if doc is None:
+            doc = self.pipeline.analyze(text, self.components)
+        else:
+            doc = self.pipeline.extend(doc, self.components)
 
-        doc = self.nlp(text)
-        
         total_tokens = len(doc)
         if total_tokens == 0:
-            return 0.0
+            return 0.0, TIER_FULL
 
         content_tokens = 0
         for token in doc:
             # We value semantically rich words
             if not token.is_stop and not token.is_punct and not token.is_space:
-                if token.pos_ in ["NOUN", "VERB", "ADJ", "PROPN"]:
+                if token.pos_ in CONTENT_POS:
                     content_tokens += 1
 
         # Calculate density ratio
         density = content_tokens / total_tokens
 
-        # Normalization: Pure lists of keywords might have density 1.0, 
+        # Normalization: Pure lists of keywords might have density 1.0,
         # but regular sentences usually hover around 0.4 - 0.6.
         # We cap the score at 1.0.
-        
-        return round(density, 4)
+
+        return round(density, 4), TIER_FULL
+
+    def _estimate(self, text: str, doc: Doc, threshold: float) -> Optional[Tuple[float, str]]:
+        """
+        Tiers 1 and 2. The score is (content share of the candidate tokens)
+        x (candidates / total), where candidates (not stop word, punctuation
+        or space) are counted exactly by the tokenizer; only the share needs
+        the tagger. None means "too close to call": run the full pass.
+        """
+        total = len(doc)
+        if total == 0:
+            return 0.0, TIER_HEURISTIC
+        attrs = doc.to_array([IS_STOP, IS_PUNCT, IS_SPACE, LIKE_NUM, IS_CURRENCY, LOWER, SHAPE])
+        candidate = (attrs[:, 0] == 0) & (attrs[:, 1] == 0) & (attrs[:, 2] == 0)
+        upper = candidate.sum() / total
+
+        # Tier 1: the candidate ratio bounds the score from above
+        if upper < threshold:
+            return round(upper * self._lexicon_share(attrs, candidate), 4), TIER_HEURISTIC
+        heuristic = upper * self._lexicon_share(attrs, candidate)
+        if heuristic >= threshold + settings.SCORER_ACCEPT_MARGIN:
+            return round(heuristic, 4), TIER_HEURISTIC
+
+        # Tier 2: tag a sample of lines of a long document
+        sampled = self._sample_share(text)
+        if sampled is not None:
+            share, error = sampled
+            score = upper * share
+            if abs(score - threshold) >= max(settings.SCORER_SAMPLE_MARGIN, 2 * upper * error):
+                return round(score, 4), TIER_SAMPLED
+        return None
+
+    def _lexicon_share(self, attrs: np.ndarray, candidate: np.ndarray) -> float:
+        """
+        Share of candidates that are not numbers, currency, lexicon words or
+        letterless symbols (table rules, '|', times): the tagger rarely
+        labels those as content.
+        """
+        count = candidate.sum()
+        if count == 0:
+            return 0.0
+        unlikely = (attrs[:, 3] == 1) | (attrs[:, 4] == 1) | np.isin(attrs[:, 5], _NON_CONTENT_IDS)
+        # Character classes per distinct word shape ("Xxxx", "dd:dd", "="), not per token
+        shapes, inverse = np.unique(attrs[:, 6], return_inverse=True)
+        strings = self.nlp.vocab.strings
+        has_letter = np.array([any(c in "xX" for c in strings[int(h)]) for h in shapes], dtype=bool)
+        unlikely |= ~has_letter[inverse.reshape(-1)]
+        return float((candidate & ~unlikely).sum() / count)
+
+    def _sample_share(self, text: str) -> Optional[Tuple[float, float]]:
+        """
+        (content share of candidates, standard error) over an evenly spaced
+        sample of SCORER_SAMPLE_UNITS lines/sentences; None for documents too
+        short to sample. Repeated lines (headers, footers) are tagged once.
+        """
+        units = [u for u in _UNIT_BOUNDARY.split(text) if u]
+        if len(units) < settings.SCORER_SAMPLE_MIN_UNITS:
+            return None
+        size = settings.SCORER_SAMPLE_UNITS
+        sample = [units[int(i * len(units) / size)] for i in range(size)]
+
+        unique = list(dict.fromkeys(sample))
+        counts: Dict[str, Tuple[int, int]] = {}
+        for unit, unit_doc in zip(unique, self.pipeline.analyze_many(unique, self.components)):
+            candidates = [t for t in unit_doc if not (t.is_stop or t.is_punct or t.is_space)]
+            counts[unit] = (sum(1 for t in candidates if t.pos_ in CONTENT_POS), len(candidates))
+
+        content = np.array([counts[u][0] for u in sample], dtype=float)
+        candidates = np.array([counts[u][1] for u in sample], dtype=float)
+        if candidates.sum() == 0:
+            return None
+        share = content.sum() / candidates.sum()
+        # Ratio-estimator standard error (finite population corrected)
+        n = len(sample)
+        residual = content - share * candidates
+        variance = (residual ** 2).sum() / (n - 1) / n * (1 - n / len(units))
+        return share, float(np.sqrt(max(variance, 0.0)) / candidates.mean())
 
     def is_passable(self, text: str, threshold: float = 0.3) -> bool:
         """
         Boolean helper to accept/reject content based on config threshold.
         """
-        return self.calculate_score(text) >= threshold
\ No newline at end of file
+        return self.calculate_score(text, threshold=threshold) >= threshold
@@ -3,60 +3,288 @@ security.py
 -----------
 Handles the redaction of Personally Identifiable Information (PII).
 Updated with an ALLOW_LIST to prevent redacting UPM's own business units.
+
+Redaction is compiled once per scrubber: all regex rules (built-in and
+user-defined) are one combined pattern scanned in a single pass (rules
+with backreferences, whose group numbers would shift, are scanned on their
+own), the allow
+list is an Aho-Corasick automaton (its cost does not grow with the number
+of terms), and output is assembled with a single join over the sorted,
+non-overlapping span list.
 """
 
-import spacy
+import logging
 import re
-from typing import List, Tuple
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from spacy.tokens import Doc
+from src.config import settings
+from src.core.nlp import NLPPipeline, get_pipeline
+
+logger = logging.getLogger("axiom.security")
+
+# Structural PII, always redacted. Earlier rules win where matches overlap.
+BUILTIN_RULES = {
+    "REDACTED_EMAIL": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    "REDACTED_PHONE": r'\b\+?[0-9]{10,15}\b',
+}
+
+# Entity labels redacted by NER (GPE = Geopolitical Entity: countries/cities)
+ENTITY_LABELS = ("PERSON", "ORG", "GPE")
+
+Span = Tuple[int, int, str]
+
+# Leading global inline flags of a rule, e.g. "(?i)"
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+# Numbered or named backreferences and group conditionals (false positives only cost a scan)
+_BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=|\(\?\(")
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of terms. Tells whether a text
+    contains any of them in one pass over the text, however many terms
+    there are.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        # Trie: per node, its children by character and whether a term ends here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[bool] = [False]
+        self._size = 0
+        for term in terms:
+            if not term:
+                continue
+            node = 0
+            for ch in term:
+                child = self._goto[node].get(ch)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][ch] = child
+                    self._goto.append({})
+                    self._out.append(False)
+                node = child
+            if not self._out[node]:
+                self._out[node] = True
+                self._size += 1
+
+        # Failure links (longest proper suffix that is also a trie path), breadth first
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] or self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def search(self, text: str) -> bool:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                return True
+        return False
+
+
+def compile_rules(
+    rules: Dict[str, str]
+) -> Tuple[Optional[re.Pattern], Dict[str, Tuple[int, str]], List[Tuple[int, re.Pattern, str]]]:
+    """
+    Combines {label: regex} into one alternation of named groups.
+    Returns the pattern (None if no rule can be combined), the (precedence,
+    label) of each group, and the rules scanned on their own as
+    (precedence, pattern, label).
+
+    Global inline flags ("(?i)...") are rewritten as scoped flags
+    ("(?i:...)") so they do not apply to the other rules. Rules with
+    backreferences stay separate: their group numbers would shift inside
+    the alternation.
+    """
+    groups = {}
+    parts = []
+    standalone = []
+    for index, (label, pattern) in enumerate(rules.items()):
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise RuntimeError(f"Invalid PII rule '{label}': {e}") from e
+        if _BACKREFERENCE.search(pattern):
+            standalone.append((index, compiled, label))
+            continue
+        flags = ""
+        while (match := _GLOBAL_FLAGS.match(pattern)):
+            flags += match.group(1)
+            pattern = pattern[match.end():]
+        if flags:
+            # A verbose pattern may end in a comment, which would swallow the ')'
+            pattern = f"(?{flags}:{pattern}\n)" if "x" in flags else f"(?{flags}:{pattern})"
+        group = f"_rule{index}"
+        groups[group] = (index, label)
+        parts.append((label, f"(?P<{group}>{pattern})"))
+
+    if not parts:
+        return None, groups, standalone
+    try:
+        combined = re.compile("|".join(part for _, part in parts))
+    except re.error as e:
+        # Each rule is valid alone (e.g. two rules defining the same group name): find the first that breaks the union
+        for count in range(2, len(parts) + 1):
+            try:
+                re.compile("|".join(part for _, part in parts[:count]))
+            except re.error:
+                raise RuntimeError(f"PII rule '{parts[count - 1][0]}' cannot be combined with the rules before it: {e}") from e
+        raise RuntimeError(f"Invalid PII rules: {e}") from e
+    return combined, groups, standalone
+
+
+def load_allow_list(terms: List[str], path: str = "") -> List[str]:
+    """
+    Configured allow list plus the terms of `path` (one per line, '#' comments).
+    """
+    terms = list(terms)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            terms += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    return terms
+
 
 class PIIScrubber:
     """
     Sanitizes text by detecting and redacting sensitive information.
     """
 
-    def __init__(self, model_name: str = "en_core_web_sm"):
-        try:
-            self.nlp = spacy.load(model_name)
-        except OSError:
-            # Fallback if not downloaded (though Dockerfile handles this)
-            raise RuntimeError(f"Spacy model '{model_name}' not found.")
-        
-        # Regex for structural PII
-        self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
-        self.phone_pattern = re.compile(r'\b\+?[0-9]{10,15}\b') 
+    # Only the entity recognizer is needed for redaction
+    components = ("ner",)
+
+    def __init__(
+        self,
+        model_name: str = "en_core_web_sm",
+        pipeline: Optional[NLPPipeline] = None,
+        allow_list: Optional[List[str]] = None,
+        rules: Optional[Dict[str, str]] = None
+    ):
+        self.pipeline = pipeline or get_pipeline(model_name)
+        self.nlp = self.pipeline.nlp
+
+        # Regex for structural PII plus user-defined rules, one combined pattern
+        self.rules = {**BUILTIN_RULES, **(settings.PII_RULES if rules is None else rules)}
+        self.pattern, self._groups, self._standalone = compile_rules(self.rules)
 
         # <--- NEW: Internal terms to NEVER redact --->
-        self.allow_list = ["UPM", "Raflatac", "Biofuels", "Biofore"]
+        if allow_list is None:
+            allow_list = load_allow_list(settings.PII_ALLOW_LIST, settings.PII_ALLOW_LIST_FILE)
+        self.allow_list = allow_list
+        self.allow_matcher = TermMatcher(allow_list)
+        logger.info(f"PII scrubber: {len(self.rules)} rules, {len(self.allow_matcher)} allow-listed terms")
 
-    def scrub(self, text: str) -> str:
+    def scrub(self, text: str, doc: Optional[Doc] = None) -> str:
         """
         Redacts PII but preserves Allow-Listed terms.
+
+        All spans are located on the original text, so a Doc already produced
+        by the shared NLP stage can be reused instead of re-parsing.
         """
         if not text:
             return ""
 
-        # 1. Regex Redactions (Emails/Phones are always PII)
-        text = self.email_pattern.sub("<REDACTED_EMAIL>", text)
-        text = self.phone_pattern.sub("<REDACTED_PHONE>", text)
+        return self.redact(text, self.find_spans(text, doc))
+
+    def find_spans(self, text: str, doc: Optional[Doc] = None) -> List[Span]:
+        """
+        Locates every PII span in the original text as (start, end, label).
+        The spans are sorted and never overlap.
+        """
+        if not text:
+            return []
+
+        # 1. Regex Redactions (Emails/Phones are always PII), one scan for all rules
+        regex_spans = self._regex_spans(text)
 
         # 2. NLP Entity Redactions
-        doc = self.nlp(text)
-        
-        entities_to_redact = []
+        if doc is None:
+            doc = self.pipeline.analyze(text, self.components)
+        else:
+            doc = self.pipeline.extend(doc, self.components)
+
+        entity_spans = []
         for ent in doc.ents:
+            if ent.label_ not in ENTITY_LABELS:
+                continue
+
+            # Regex matches take precedence over overlapping entities
+            if self._overlaps(ent.start_char, ent.end_char, regex_spans):
+                continue
+
             # Check if this entity is in our Allow List
             # If "UPM" is in the entity text (e.g. "UPM Biofuels"), SKIP redaction.
-            if any(allowed in ent.text for allowed in self.allow_list):
+            if self.allow_matcher.search(ent.text):
                 continue
 
-            if ent.label_ in ["PERSON", "ORG", "GPE"]: # GPE = Geopolitical Entity (Countries/Cities)
-                entities_to_redact.append((ent.start_char, ent.end_char, ent.label_))
+            entity_spans.append((ent.start_char, ent.end_char, ent.label_))
+
+        return sorted(regex_spans + entity_spans)
+
+    def _regex_spans(self, text: str) -> List[Span]:
+        """
+        Sorted, non-overlapping rule matches. Where matches overlap, the one
+        starting first wins, then the earlier rule (as within the alternation).
+        """
+        matches = []
+        if self.pattern is not None:
+            matches = [
+                (m.start(), m.end(), *self._groups[m.lastgroup]) for m in self.pattern.finditer(text)
+                if m.end() > m.start()
+            ]
+        if not self._standalone:
+            return [(start, end, label) for start, end, _, label in matches]
+
+        for precedence, pattern, label in self._standalone:
+            matches += [(m.start(), m.end(), precedence, label) for m in pattern.finditer(text) if m.end() > m.start()]
+        spans: List[Span] = []
+        for start, end, _, label in sorted(matches):
+            if not spans or start >= spans[-1][1]:
+                spans.append((start, end, label))
+        return spans
+
+    def redact(self, text: str, spans: List[Span], start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Applies spans from `find_spans` to text[start:end].
+        Spans crossing the range boundary are redacted in full.
+        """
+        end = len(text) if end is None else end
 
-        # Apply redactions in reverse order
-        entities_to_redact.sort(key=lambda x: x[0], reverse=True)
+        # Sorted, non-overlapping spans: the ends are sorted too
+        first = bisect_right(spans, start, key=lambda s: s[1])
+        parts = []
+        position = start
+        for span_start, span_end, label in islice(spans, first, None):
+            if span_start >= end:
+                break
+            if span_start > position:
+                parts.append(text[position:span_start])
+            parts.append(f"<{label}>")
+            position = min(span_end, end)
+        parts.append(text[position:end])
 
-        for start, end, label in entities_to_redact:
-            replacement = f"<{label}>"
-            text = text[:start] + replacement + text[end:]
+        return "".join(parts)
 
-        return text
\ No newline at end of file
+    @staticmethod
+    def _overlaps(start: int, end: int, spans: List[Span]) -> bool:
+        """
+        Whether [start, end) overlaps one of the sorted, non-overlapping `spans`.
+        """
+        # The last span starting before `end` is the only candidate
+        index = bisect_left(spans, end, key=lambda s: s[0])
+        return index > 0 and spans[index - 1][1] > start
@@ -0,0 +1,335 @@
+"""
+sidecar.py
+----------
+Shared inference sidecar: one process per node holds the spaCy pipeline and
+the embedding model and serves the 'nlp' and 'embed' stages of every API
+worker over a Unix socket. With `uvicorn --workers N` the node then keeps a
+single copy of the models instead of one per worker (and per CPU worker).
+
+    INFERENCE_SIDECAR_SOCKET=/run/axiom/inference.sock python -m src.core.sidecar
+    INFERENCE_SIDECAR_SOCKET=/run/axiom/inference.sock uvicorn src.main:app --workers 4
+
+Embedding requests from all workers go through one micro-batcher, so
+concurrent queries from different workers share forward passes. Embedding
+calls run on threads sharing the one model (torch / ONNX Runtime release the
+GIL while encoding). spaCy holds the GIL, so nlp calls run on a CPU_EXECUTOR
+pool of their own: with "process" (the default) each of its CPU_WORKERS
+processes loads the spaCy pipeline, a small model next to the embedder, and
+documents are analysed in parallel.
+
+Calls travel as data only, never pickles: JSON frames naming one of the
+ALLOWED_CALLS task functions plus its arguments, checked against the list
+before anything is looked up. The socket is also created with mode 0600
+(under a restrictive umask, so it is never reachable more widely).
+"""
+
+import argparse
+import asyncio
+import builtins
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from concurrent.futures import Executor, Future, InvalidStateError
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config import settings
+
+logger = logging.getLogger("axiom.sidecar")
+
+# Frames: 4-byte big-endian length + JSON payload
+_HEADER = struct.Struct(">I")
+
+# Functions of src.core.tasks the sidecar runs
+ALLOWED_CALLS = ("analyze_document", "analyze_documents", "embed_texts", "warm_up_nlp", "warm_up_embedder")
+TASKS_MODULE = "src.core.tasks"
+
+# JSON objects only have string keys: other dicts (sparse vectors) travel as pairs
+_PAIRS = "__pairs__"
+
+
+class SidecarUnavailableError(RuntimeError):
+    """
+    Raised (through the call's future) when the sidecar cannot be reached
+    or the connection drops before the reply.
+    """
+
+
+def _unwrap(fn: Callable) -> Tuple[Callable, tuple, Dict[str, Any]]:
+    """
+    The function under nested partials, with the merged arguments.
+    """
+    args: tuple = ()
+    keywords: Dict[str, Any] = {}
+    while isinstance(fn, partial):
+        args = fn.args + args
+        keywords = {**fn.keywords, **keywords}
+        fn = fn.func
+    return fn, args, keywords
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _plain(v) for k, v in value.items()}
+        return {_PAIRS: [[k, _plain(v)] for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()  # numpy arrays and scalars
+    return value
+
+
+def _unpairs(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and _PAIRS in obj:
+        return {k: v for k, v in obj[_PAIRS]}
+    return obj
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(_plain(message), separators=(",", ":")).encode()
+    return _HEADER.pack(len(payload)) + payload
+
+
+def decode_frame(payload: bytes) -> Dict[str, Any]:
+    message = json.loads(payload, object_hook=_unpairs)
+    if not isinstance(message, dict):
+        raise ValueError("Sidecar frames must be JSON objects.")
+    return message
+
+
+def _remote_error(name: str, message: str) -> Exception:
+    """
+    The exception a call raised in the sidecar: built-in types are re-raised
+    as such, anything else as RuntimeError.
+    """
+    error = getattr(builtins, name, None)
+    if isinstance(error, type) and issubclass(error, Exception):
+        return error(message)
+    return RuntimeError(f"{name}: {message}")
+
+
+# ----------------------------------------------------------------------
+# Client (API workers)
+# ----------------------------------------------------------------------
+
+class SidecarClient(Executor):
+    """
+    An Executor that runs submitted calls in the sidecar, multiplexed over
+    one connection. Drop-in for the pool of the 'nlp' and 'embed' stages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        base, args, kwargs = _unwrap(partial(fn, *args, **kwargs))
+        if getattr(base, "__module__", None) != TASKS_MODULE or base.__name__ not in ALLOWED_CALLS:
+            future.set_exception(RuntimeError(
+                f"The inference sidecar does not run {getattr(base, '__qualname__', base)!r}."
+            ))
+            return future
+
+        call_id = next(self._ids)
+        try:
+            frame = encode_frame({"id": call_id, "call": base.__name__, "args": args, "kwargs": kwargs})
+        except (TypeError, ValueError) as e:
+            future.set_exception(e)
+            return future
+        with self._lock:
+            try:
+                sock = self._connection()
+                self._pending[call_id] = future
+                sock.sendall(frame)
+            except OSError as e:
+                self._pending.pop(call_id, None)
+                self._disconnect()
+                future.set_exception(SidecarUnavailableError(f"Inference sidecar at {self.path} unavailable: {e}"))
+        return future
+
+    def _connection(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+            threading.Thread(target=self._read_replies, args=(sock,), name="axiom-sidecar", daemon=True).start()
+        return self._sock
+
+    def _disconnect(self, sock: Optional[socket.socket] = None):
+        # Caller holds the lock. Only drop the connection the caller saw fail
+        if self._sock is not None and (sock is None or sock is self._sock):
+            self._sock.close()
+            self._sock = None
+
+    def _read_replies(self, sock: socket.socket):
+        reader = sock.makefile("rb")
+        try:
+            while True:
+                header = reader.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                reply = decode_frame(reader.read(_HEADER.unpack(header)[0]))
+                with self._lock:
+                    future = self._pending.pop(reply.get("id"), None)
+                if future is None:
+                    continue
+                try:
+                    if reply.get("ok"):
+                        future.set_result(reply.get("result"))
+                    else:
+                        future.set_exception(_remote_error(reply.get("error", ""), reply.get("message", "")))
+                except InvalidStateError:
+                    pass  # Cancelled by the caller
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"Lost connection to the inference sidecar: {e}")
+        finally:
+            with self._lock:
+                self._disconnect(sock)
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(SidecarUnavailableError("Inference sidecar connection closed."))
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._lock:
+            self._disconnect()
+
+
+# ----------------------------------------------------------------------
+# Server (the sidecar process)
+# ----------------------------------------------------------------------
+
+class InferenceServer:
+    """
+    Serves task calls on a Unix socket using in-process pools.
+    """
+
+    def __init__(self, path: str):
+        # Imported here: the client side must not pull in the pipeline modules
+        from src.core import tasks
+        from src.core.batcher import EmbeddingBatcher
+        from src.core.executor import ExecutorRegistry
+
+        self.path = path
+        self.tasks = tasks
+        # Threads share the one copy of the embedding model loaded in this process
+        self.executors = ExecutorRegistry(cpu_executor="thread", sidecar_socket="")
+        # spaCy does not release the GIL: nlp gets its own (by default process) pool
+        self.nlp_executors = ExecutorRegistry(sidecar_socket="")
+        self.batcher = EmbeddingBatcher(
+            self._embed_batch,
+            max_batch_size=settings.EMBED_BATCH_SIZE,
+            max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+        )
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # The socket is created with mode 0600 rather than restricted after binding
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.path)
+        finally:
+            os.umask(umask)
+        logger.info(f"Inference sidecar listening on {self.path}")
+
+        # Load the models while already accepting connections (early calls wait for them)
+        warm_up = asyncio.gather(
+            self.nlp_executors.broadcast(self.tasks.warm_up_nlp),
+            self.executors.embed.run_when_free(self.tasks.warm_up_embedder),
+            return_exceptions=True
+        )
+        try:
+            async with server:
+                for name, result in zip(("nlp", "embedder"), await warm_up):
+                    if isinstance(result, Exception):
+                        # Calls retry the load on first use; the workers' readiness reports the failure
+                        logger.error(f"Inference sidecar could not load the {name} model: {result}")
+                await server.serve_forever()
+        finally:
+            self.executors.shutdown()
+            self.nlp_executors.shutdown()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        calls = set()
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                request = decode_frame(await reader.readexactly(_HEADER.unpack(header)[0]))
+                task = asyncio.ensure_future(self._reply(request, writer, write_lock))
+                calls.add(task)
+                task.add_done_callback(calls.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            # Not a call frame: drop the connection, run nothing
+            logger.warning(f"Inference sidecar rejected a malformed frame: {e}")
+        finally:
+            for task in calls:
+                task.cancel()
+            writer.close()
+
+    async def _reply(self, request: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        call_id = request.get("id")
+        try:
+            reply = {"id": call_id, "ok": True, "result": await self._call(request)}
+        except Exception as e:
+            reply = {"id": call_id, "ok": False, "error": type(e).__name__, "message": str(e)}
+        try:
+            frame = encode_frame(reply)
+        except (TypeError, ValueError) as e:
+            frame = encode_frame({"id": call_id, "ok": False, "error": "RuntimeError", "message": f"Unencodable result: {e}"})
+        async with write_lock:
+            try:
+                writer.write(frame)
+                await writer.drain()
+            except ConnectionError:
+                pass  # The worker went away; nothing to reply to
+
+    async def _embed_batch(self, texts: List[str]) -> List[Tuple[List[float], Optional[str]]]:
+        # Each text keeps its cache lookup result through the shared batch
+        result = await self.executors.embed.run_when_free(self.tasks.embed_texts, texts)
+        return list(zip(result["vectors"], result["cache"]))
+
+    async def _call(self, request: Dict[str, Any]) -> Any:
+        name, args, keywords = request.get("call"), request.get("args", []), request.get("kwargs", {})
+        # Checked before any lookup: only these names are ever resolved
+        if name not in ALLOWED_CALLS:
+            raise RuntimeError(f"The inference sidecar does not run {name!r}.")
+        if not isinstance(args, list) or not isinstance(keywords, dict):
+            raise TypeError("Sidecar call arguments must be a list and an object.")
+        fn = getattr(self.tasks, name)
+
+        if name == "embed_texts" and len(args) == 1 and not keywords:
+            # Texts from every worker share batches
+            embedded = await self.batcher.embed_many(args[0])
+            return {"vectors": [v for v, _ in embedded], "cache": [c for _, c in embedded]}
+        if name in ("embed_texts", "warm_up_embedder"):
+            return await self.executors.embed.run_when_free(fn, *args, **keywords)
+        return await self.nlp_executors.nlp.run_when_free(fn, *args, **keywords)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.INFERENCE_SIDECAR_SOCKET, help="Unix socket path.")
+    path = parser.parse_args().socket
+    if not path:
+        parser.error("Set INFERENCE_SIDECAR_SOCKET or pass --socket.")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(InferenceServer(path).serve())
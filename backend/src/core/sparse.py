@@ -0,0 +1,80 @@
+"""
+sparse.py
+---------
+BM25 term weights for hybrid (lexical + dense) retrieval.
+MiniLM embeds exact identifiers (part numbers, SOP codes, product names)
+poorly; matching them as terms recovers those hits.
+
+Chunk weights are computed at ingest from the spaCy tokens already produced
+for scoring and chunking. They hold only the saturated, length-normalized term
+frequency; the IDF factor is applied at query time by the vector store, so
+weights never go stale as the corpus grows.
+"""
+
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from src.config import settings
+
+if TYPE_CHECKING:
+    from spacy.tokens import Doc, Token
+
+# Sparse vector: term id -> weight
+SparseVector = Dict[int, float]
+
+_query_nlp = None
+
+
+def term_id(term: str) -> int:
+    """
+    Stable 32-bit id of a term (no vocabulary to store or keep in sync).
+    """
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def is_term(token: "Token") -> bool:
+    return not (token.is_punct or token.is_space or token.is_stop)
+
+
+def chunk_terms(doc: "Doc", start: int, end: int, spans: Iterable[Tuple[int, int, str]] = ()) -> List[str]:
+    """
+    Index terms of doc.text[start:end]. Tokens inside PII spans are skipped,
+    so redacted values never become searchable.
+    """
+    window = doc.char_span(start, end, alignment_mode="expand")
+    if window is None:
+        return []
+    redacted = [(s, e) for s, e, _ in spans if s < end and start < e]
+    return [
+        token.lower_
+        for token in window
+        if is_term(token)
+        and not any(token.idx < e and s < token.idx + len(token) for s, e in redacted)
+    ]
+
+
+def bm25_vector(terms: List[str]) -> SparseVector:
+    """
+    BM25 document-side weight per term: tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len)).
+    """
+    if not terms:
+        return {}
+    k1, b = settings.BM25_K1, settings.BM25_B
+    length_norm = 1 - b + b * len(terms) / settings.BM25_AVG_CHUNK_TERMS
+    tf = Counter(term_id(term) for term in terms)
+    return {index: count * (k1 + 1) / (count + k1 * length_norm) for index, count in tf.items()}
+
+
+def query_vector(query: str) -> Optional[SparseVector]:
+    """
+    Query-side terms (weight 1 each), tokenized with the same English rules
+    as ingestion. None when the query has no index terms.
+    """
+    global _query_nlp
+    if _query_nlp is None:
+        # Tokenizer only: no model to load in the API process (spaCy itself is
+        # imported here, keeping it off the startup path)
+        import spacy
+        _query_nlp = spacy.blank("en")
+    terms = {term_id(token.lower_) for token in _query_nlp.make_doc(query) if is_term(token)}
+    return {index: 1.0 for index in terms} or None
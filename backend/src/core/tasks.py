@@ -0,0 +1,142 @@
+"""
+tasks.py
+--------
+Blocking pipeline stages executed inside the executor pools.
+Functions are module-level so they can be pickled into worker processes.
+Each process builds its own helpers on first use and keeps them for its lifetime.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from src.config import settings
+from src.core.metrics import Stopwatch
+from src.core.sparse import bm25_vector, chunk_terms
+
+# spaCy and the models are imported on first use: the API process imports this
+# module for the function references only, and should start without them
+if TYPE_CHECKING:
+    from src.core.chunker import SentenceChunker
+    from src.core.scorer import ContentScorer
+    from src.core.security import PIIScrubber
+
+_scorer: Optional["ContentScorer"] = None
+_scrubber: Optional["PIIScrubber"] = None
+_chunker: Optional["SentenceChunker"] = None
+# Thread pools: concurrent first calls must not load the model twice
+_helpers_lock = threading.Lock()
+
+
+def _get_helpers():
+    global _scorer, _scrubber, _chunker
+    with _helpers_lock:
+        if _scorer is None:
+            from src.core.chunker import SentenceChunker
+            from src.core.embedding_backends import MODEL_NAME, load_tokenizer
+            from src.core.nlp import get_pipeline
+            from src.core.scorer import ContentScorer
+            from src.core.security import PIIScrubber
+
+            pipeline = get_pipeline()
+            _scorer = ContentScorer(pipeline=pipeline)
+            _scrubber = PIIScrubber(pipeline=pipeline)
+            # Chunks are measured in the embedder's word pieces and never exceed what it embeds
+            tokenizer, max_pieces = load_tokenizer(settings.EMBED_BACKEND, MODEL_NAME, settings.EMBED_ONNX_DIR)
+            max_tokens = min(settings.CHUNK_MAX_TOKENS, max_pieces)
+            _chunker = SentenceChunker(
+                max_tokens, min(settings.CHUNK_OVERLAP_TOKENS, max_tokens - 1), tokenizer=tokenizer
+            )
+    return _scorer, _scrubber, _chunker
+
+
+def analyze_document(text: str, threshold: float) -> Dict[str, Any]:
+    """
+    Green AI gate, PII scrubbing, chunking and BM25 term weighting over a
+    single spaCy parse. The tagger only runs when the tiered scorer needs
+    it; NER and sentence segmentation only if the document clears the
+    density threshold. "timings" holds the seconds spent per step, for
+    the metrics recorded by the API process.
+    """
+    scorer, scrubber, chunker = _get_helpers()
+    clock = Stopwatch()
+
+    doc = scorer.pipeline.analyze(text, ())
+    quality_score, score_tier = scorer.score(text, doc, threshold)
+    clock.lap("score")
+    if quality_score < threshold:
+        return {"quality_score": quality_score, "score_tier": score_tier, "accepted": False, "timings": clock.timings}
+
+    spans = scrubber.find_spans(text, doc)
+    clock.lap("scrub")
+    doc = scorer.pipeline.extend(doc, chunker.components)
+
+    # Chunk ranges are on the original text; redact each range independently
+    ranges = chunker.split(doc)
+    clock.lap("chunk")
+    chunks = [scrubber.redact(text, spans, start, end) for start, end in ranges]
+    cleaned_length = len(scrubber.redact(text, spans))
+    clock.lap("scrub")
+    sparse = [bm25_vector(chunk_terms(doc, start, end, spans)) for start, end in ranges]
+    clock.lap("chunk")
+
+    return {
+        "quality_score": quality_score,
+        "score_tier": score_tier,
+        "accepted": True,
+        "chunks": chunks,
+        "sparse": sparse,
+        "cleaned_length": cleaned_length,
+        "pii_redacted": bool(spans),
+        "pii_spans": len(spans),
+        "timings": clock.timings,
+    }
+
+
+def analyze_documents(texts: List[str], threshold: float, isolate_errors: bool = False) -> List[Dict[str, Any]]:
+    """
+    Batch form of analyze_document: one executor round trip for many records.
+    With `isolate_errors`, a document that fails is reported as
+    {"accepted": False, "error": ...} instead of failing the whole batch.
+    """
+    if not isolate_errors:
+        return [analyze_document(text, threshold) for text in texts]
+
+    analyses = []
+    for text in texts:
+        try:
+            analyses.append(analyze_document(text, threshold))
+        except Exception as e:
+            analyses.append({"accepted": False, "error": f"{type(e).__name__}: {e}"})
+    return analyses
+
+
+def embed_texts(texts: List[str]) -> Dict[str, Any]:
+    """
+    Embeds many texts in batched forward passes.
+    Returns {"vectors", "cache"}: "cache" holds the embedding-cache lookup
+    result per text, counted by the API process (pool workers and the
+    sidecar do not export metrics).
+    """
+    # Imported lazily: loading the model is only paid by processes that embed
+    from src.core.embedder import embedder
+    sources: List[Optional[str]] = []
+    vectors = embedder.embed_batch(texts, batch_size=settings.EMBED_BATCH_SIZE, sources=sources)
+    return {"vectors": vectors, "cache": sources}
+
+
+def warm_up_nlp() -> bool:
+    """
+    Loads the spaCy pipeline and the helpers built on it (startup warm-up).
+    """
+    scorer, _, _ = _get_helpers()
+    scorer.pipeline.analyze("Axiom warm-up.", scorer.components)
+    return True
+
+
+def warm_up_embedder() -> int:
+    """
+    Loads the embedding model and runs one forward pass (startup warm-up).
+    Returns the vector size.
+    """
+    from src.core.embedder import embedder
+    embedder.model.encode(["Axiom warm-up."])
+    return embedder.model.dim
@@ -0,0 +1,217 @@
+"""
+base.py
+-------
+The vector store interface shared by every backend (Qdrant server, embedded NumPy).
+Backends store chunked documents with governance metadata and must apply the
+lifecycle filter to every search.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from src.core import hashing
+from src.core.sparse import SparseVector
+from src.db.filters import SearchFilter, utc_timestamp
+
+VECTOR_SIZE = 384 # Matches 'all-MiniLM-L6-v2'
+
+# Top-level fields of a search hit; everything else is reported as metadata
+HIT_FIELDS = ("text", "doc_id", "chunk_index")
+
+# Payload of a document's first chunk returned by dedup lookups
+HEAD_FIELDS = ["doc_id", "content_hash", "quality_score", "score_tier", "chunk_count", "pii_redacted", "owner"]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int) -> List[Tuple[Hashable, float]]:
+    """
+    Fuses ranked lists by summing 1 / (k + rank) per item (rank starts at 1).
+    Rank-based, so dense cosine and BM25 scores need no calibration.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class VectorDB(ABC):
+    """
+    Storage for chunked documents, addressed by deterministic point ids.
+    """
+
+    async def upsert_document(self, text: str, vector: List[float], metadata: Dict[str, Any]) -> str:
+        """
+        Insert or Update a document with Governance Metadata.
+        A single-chunk convenience wrapper around upsert_chunks().
+        """
+        return await self.upsert_chunks([text], [vector], metadata)
+
+    async def upsert_chunks(self, chunks: List[str], vectors: List[List[float]], metadata: Dict[str, Any]) -> str:
+        """
+        Stores a chunked document addressed by its content hash.
+        """
+        text_hash = hashing.content_hash("\n".join(chunks))
+        doc_id = hashing.document_id(text_hash)
+        await self.upsert_documents([{
+            "doc_id": doc_id,
+            "content_hash": text_hash,
+            "chunks": chunks,
+            "vectors": vectors,
+            "metadata": metadata
+        }])
+        return doc_id
+
+    @abstractmethod
+    async def upsert_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Stores (or replaces in place) many chunked documents.
+
+        Each document is a dict with doc_id, content_hash, chunks, vectors,
+        metadata and optionally sparse (BM25 weights per chunk). Chunks a
+        document no longer contains are deleted.
+        """
+
+    @abstractmethod
+    async def lookup_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fast pre-NLP dedup check: returns {doc_id: {content_hash, quality_score, score_tier,
+        chunk_count, pii_redacted}} for the documents that are already stored.
+        """
+
+    @abstractmethod
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Stored vectors for the given point ids (missing ids are omitted).
+        Lets a modified document reuse the vectors of its unchanged chunks.
+        """
+
+    @abstractmethod
+    async def fetch_payloads(self, point_ids: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Selected payload fields of the given points (missing ids are omitted).
+        """
+
+    @abstractmethod
+    async def touch_documents(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Refreshes governance metadata (owner, tags, expiry...) of unchanged
+        documents without re-embedding them.
+        """
+
+    @abstractmethod
+    async def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        fields: Optional[List[str]] = None,
+        query_filter: Optional[SearchFilter] = None,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        query_terms: Optional[SparseVector] = None
+    ) -> List[Dict]:
+        """
+        Lifecycle-Aware Search.
+
+        `fields` projects the metadata to the given payload fields (text,
+        doc_id and chunk_index are always returned); None returns all of it.
+        `query_filter` adds governance conditions; expired content is always
+        excluded. `offset` and `score_threshold` page through results.
+        With `query_terms` the dense and BM25 rankings are fused (RRF): hits
+        are ordered by `fusion_score`, while `score` stays the cosine
+        similarity. A `score_threshold` is a similarity cut-off, so it turns
+        the search into a dense-only one (BM25-only hits have no meaningful
+        similarity to filter on).
+        """
+
+    @abstractmethod
+    async def count_expired(self, before_ts: int) -> Dict[str, int]:
+        """
+        {"points", "documents"}: how many chunks / documents have a
+        valid_until_ts before `before_ts`. Points without an expiry never count.
+        """
+
+    @abstractmethod
+    async def expired_points(self, before_ts: int, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Up to `limit` (point_id, payload) pairs with a valid_until_ts before
+        `before_ts`. Deleting them makes the next call return the next ones.
+        """
+
+    @abstractmethod
+    async def delete_points(self, point_ids: List[str]):
+        """
+        Deletes points by id (missing ids are ignored).
+        """
+
+    async def compact(self):
+        """
+        Reclaims the space of deleted points. Backends that do it on their
+        own (Qdrant's vacuum optimizer) have nothing to do.
+        """
+
+    async def migrate_collection(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Applies the configured storage profile to existing data; returns the changes.
+        Backends without profiles have nothing to migrate.
+        """
+        return {}
+
+    async def connect(self):
+        """
+        Connects (or opens the store's files) ahead of the first request.
+        Raises if the store is unreachable. Used by the startup warm-up.
+        """
+
+    async def close(self):
+        """
+        Releases connections / file handles. Called from the application lifespan.
+        """
+
+    @staticmethod
+    def _with_timestamps(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        # Add timestamp for filtering
+        if "valid_until" in metadata and isinstance(metadata["valid_until"], datetime):
+             metadata["valid_until_ts"] = utc_timestamp(metadata["valid_until"])
+        return metadata
+
+    @classmethod
+    def _points(cls, document: Dict[str, Any]) -> List[Tuple[str, List[float], Dict[str, Any], Optional[SparseVector]]]:
+        """
+        (point_id, vector, payload, sparse) for each chunk of a document.
+        """
+        chunks = document["chunks"]
+        metadata = cls._with_timestamps(document["metadata"])
+        point_ids = hashing.chunk_ids(document["doc_id"], chunks)
+        sparse = document.get("sparse") or [None] * len(chunks)
+
+        return [
+            (
+                point_id,
+                vector,
+                {
+                    "text": chunk,
+                    "doc_id": document["doc_id"],
+                    "content_hash": document["content_hash"],
+                    "chunk_index": index,
+                    "chunk_count": len(chunks),
+                    **metadata
+                },
+                terms
+            )
+            for index, (point_id, chunk, vector, terms) in enumerate(zip(point_ids, chunks, document["vectors"], sparse))
+        ]
+
+    @staticmethod
+    def _hit(
+        point_id: Any, score: float, payload: Optional[Dict[str, Any]], fusion_score: Optional[float] = None
+    ) -> Dict[str, Any]:
+        payload = payload or {}
+        return {
+            "id": point_id,
+            "score": score,
+            "fusion_score": fusion_score,
+            "text": payload.get("text"),
+            "doc_id": payload.get("doc_id", point_id),
+            "chunk_index": payload.get("chunk_index", 0),
+            "metadata": {k: v for k, v in payload.items() if k not in HIT_FIELDS}
+        }
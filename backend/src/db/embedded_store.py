@@ -0,0 +1,520 @@
+"""
+embedded_store.py
+-----------------
+In-process vector backend: exact (brute-force) cosine search with NumPy over a
+memory-mapped matrix. No server, no network hop; CI runs without containers.
+
+<dir>/vectors.<dtype> holds one unit-normalized row per point, as float32 or
+as int8 scaled by 127 (4x smaller). <dir>/payloads.db (SQLite) maps point ids
+to rows and holds the payloads, with the filterable fields as columns that are
+mirrored into NumPy arrays for vectorized filtering. Deleted rows are recycled.
+BM25 term weights live in a SQLite inverted index (postings) for hybrid search.
+
+Sized for edge deployments (a few hundred thousand chunks) served by a single
+worker process: the in-memory columns are not shared between processes.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from qdrant_client.http import models
+from src.config import settings
+from src.core.sparse import SparseVector
+from src.db.base import VectorDB, VECTOR_SIZE, HIT_FIELDS, HEAD_FIELDS, reciprocal_rank_fusion
+from src.db.filters import SearchFilter
+
+logger = logging.getLogger("axiom.embedded_store")
+
+INT8_SCALE = 127.0
+
+# Rows scored per matrix-vector product: keeps the int8 -> float32 block in cache
+SEARCH_BLOCK_ROWS = 8192
+
+# Payload fields mirrored into columns (everything the search filters use)
+KEYWORD_COLUMNS = ("doc_id", "owner", "source_type")
+NUMERIC_COLUMNS = ("valid_until_ts", "chunk_index")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} in a payload.")
+
+
+class EmbeddedVectorDB(VectorDB):
+    """
+    NumPy brute-force backend. Blocking work runs in a worker thread under
+    one lock; files are opened on first use.
+    """
+
+    def __init__(self, directory: str, dim: int = VECTOR_SIZE, dtype: str = "float32"):
+        if dtype not in ("float32", "int8"):
+            raise RuntimeError(f"Unknown embedded store dtype '{dtype}'. Use 'float32' or 'int8'.")
+        self.directory = directory
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._vec_path = os.path.join(self.directory, f"vectors.{self.dtype.name}")
+        self._db = sqlite3.connect(os.path.join(self.directory, "payloads.db"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS points (
+                id TEXT PRIMARY KEY,
+                row INTEGER UNIQUE NOT NULL,
+                doc_id TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                valid_until_ts INTEGER,
+                owner TEXT,
+                source_type TEXT,
+                tags TEXT,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS points_doc_id ON points (doc_id);
+            CREATE INDEX IF NOT EXISTS points_valid_until ON points (valid_until_ts);
+            CREATE TABLE IF NOT EXISTS postings (
+                term INTEGER NOT NULL,
+                row INTEGER NOT NULL,
+                weight REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+            CREATE INDEX IF NOT EXISTS postings_row ON postings (row);
+        """)
+        open(self._vec_path, "ab").close()
+
+        records = self._db.execute(
+            "SELECT row, id, doc_id, chunk_index, valid_until_ts, owner, source_type, tags FROM points"
+        ).fetchall()
+        file_rows = os.path.getsize(self._vec_path) // (self.dim * self.dtype.itemsize)
+        self._capacity = 0
+        self._matrix: Optional[np.memmap] = None
+        self._ids: List[Optional[str]] = []
+        self._row_tags: List[List[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._numeric = {name: np.zeros(0, dtype=np.int64) for name in NUMERIC_COLUMNS}
+        self._keyword = {name: np.empty(0, dtype=object) for name in KEYWORD_COLUMNS}
+        self._tag_rows: Dict[str, Set[int]] = {}
+        self._grow(max(file_rows, max((r[0] + 1 for r in records), default=0)))
+
+        for row, point_id, doc_id, chunk_index, valid_until_ts, owner, source_type, tags in records:
+            self._set_row(row, point_id, {
+                "doc_id": doc_id,
+                "chunk_index": chunk_index,
+                "valid_until_ts": valid_until_ts,
+                "owner": owner,
+                "source_type": source_type,
+                "tags": json.loads(tags) if tags else []
+            })
+        self._free = [row for row in range(self._capacity) if not self._alive[row]][::-1]
+        logger.info(f"Opened embedded vector store at {self.directory} ({len(self._rows)} points)")
+
+    def _grow(self, rows: int):
+        """
+        Ensures capacity for `rows` rows, doubling the matrix file when it grows.
+        """
+        if rows <= self._capacity and self._matrix is not None:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vec_path, "r+b") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._vec_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+
+        extra = capacity - self._capacity
+        self._ids.extend([None] * extra)
+        self._row_tags.extend([] for _ in range(extra))
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        for name in NUMERIC_COLUMNS:
+            self._numeric[name] = np.concatenate([self._numeric[name], np.zeros(extra, dtype=np.int64)])
+        for name in KEYWORD_COLUMNS:
+            self._keyword[name] = np.concatenate([self._keyword[name], np.empty(extra, dtype=object)])
+        self._capacity = capacity
+
+    def _set_row(self, row: int, point_id: str, payload: Dict[str, Any]):
+        """
+        Mirrors a point's filterable payload fields into the columns.
+        """
+        self._clear_row(row)
+        self._ids[row] = point_id
+        self._rows[point_id] = row
+        self._alive[row] = True
+        for name in NUMERIC_COLUMNS:
+            # Points without an expiry never pass the lifecycle filter
+            self._numeric[name][row] = payload.get(name) or 0
+        for name in KEYWORD_COLUMNS:
+            self._keyword[name][row] = payload.get(name)
+        self._row_tags[row] = list(payload.get("tags") or [])
+        for tag in self._row_tags[row]:
+            self._tag_rows.setdefault(tag, set()).add(row)
+
+    def _clear_row(self, row: int):
+        point_id = self._ids[row]
+        if point_id is None:
+            return
+        self._rows.pop(point_id, None)
+        self._ids[row] = None
+        self._alive[row] = False
+        for tag in self._row_tags[row]:
+            self._tag_rows[tag].discard(row)
+        self._row_tags[row] = []
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _encode(self, vector: List[float]) -> np.ndarray:
+        v = self._unit(vector)
+        if self.dtype == np.int8:
+            return np.round(v * INT8_SCALE).astype(np.int8)
+        return v
+
+    def _decode(self, row: int) -> List[float]:
+        v = np.asarray(self._matrix[row], dtype=np.float32)
+        return (v / INT8_SCALE if self.dtype == np.int8 else v).tolist()
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            if self._db is None:
+                self._open()
+            return fn(*args)
+
+    async def connect(self):
+        await self._run(lambda: None)
+
+    async def close(self):
+        with self._lock:
+            if self._db is not None:
+                if self._matrix is not None:
+                    self._matrix.flush()
+                self._db.close()
+            self._db = None
+            self._matrix = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def upsert_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        await self._run(self._upsert, documents)
+        return [d["doc_id"] for d in documents]
+
+    def _upsert(self, documents: List[Dict[str, Any]]):
+        rows = []
+        stale = []
+        postings = []
+        assigned: Dict[str, int] = {}
+        for document in documents:
+            points = self._points(document)
+            keep = {point_id for point_id, _, _, _ in points}
+            for point_id, vector, payload, terms in points:
+                row = assigned.get(point_id, self._rows.get(point_id))
+                if row is None:
+                    row = self._allocate()
+                assigned[point_id] = row
+                self._matrix[row] = self._encode(vector)
+                rows.append((point_id, row, payload))
+                postings.extend((term, row, weight) for term, weight in (terms or {}).items())
+            stale.extend(
+                (point_id, row)
+                for point_id, row in self._db.execute("SELECT id, row FROM points WHERE doc_id = ?", (document["doc_id"],))
+                if point_id not in keep
+            )
+
+        # Vectors first: a row is only visible once its payload is committed
+        self._matrix.flush()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._record(point_id, row, payload) for point_id, row, payload in rows]
+            )
+            self._db.executemany("DELETE FROM points WHERE id = ?", [(point_id,) for point_id, _ in stale])
+            self._db.executemany(
+                "DELETE FROM postings WHERE row = ?",
+                [(row,) for row in {*assigned.values(), *(row for _, row in stale)}]
+            )
+            self._db.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+        for point_id, row, payload in rows:
+            self._set_row(row, point_id, payload)
+        for _, row in stale:
+            self._clear_row(row)
+            self._free.append(row)
+
+    def _allocate(self) -> int:
+        if not self._free:
+            start = self._capacity
+            self._grow(start + 1)
+            self._free = list(range(self._capacity - 1, start - 1, -1))
+        return self._free.pop()
+
+    @staticmethod
+    def _record(point_id: str, row: int, payload: Dict[str, Any]) -> Tuple:
+        return (
+            point_id,
+            row,
+            payload["doc_id"],
+            payload.get("chunk_index", 0),
+            payload.get("valid_until_ts"),
+            payload.get("owner"),
+            payload.get("source_type"),
+            json.dumps(payload.get("tags") or []),
+            json.dumps(payload, default=_json_default)
+        )
+
+    async def touch_documents(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        if updates:
+            await self._run(self._touch, updates)
+
+    def _touch(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        rows = []
+        for doc_id, metadata in updates:
+            metadata = self._with_timestamps(metadata)
+            for point_id, row, payload in self._db.execute(
+                "SELECT id, row, payload FROM points WHERE doc_id = ?", (doc_id,)
+            ):
+                rows.append((point_id, row, {**json.loads(payload), **metadata}))
+
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._record(point_id, row, payload) for point_id, row, payload in rows]
+            )
+        for point_id, row, payload in rows:
+            self._set_row(row, point_id, payload)
+
+    async def delete_points(self, point_ids: List[str]):
+        if point_ids:
+            await self._run(self._delete, list(point_ids))
+
+    def _delete(self, point_ids: List[str]):
+        deleted = [(point_id, self._rows[point_id]) for point_id in point_ids if point_id in self._rows]
+        with self._db:
+            self._db.executemany("DELETE FROM points WHERE id = ?", [(point_id,) for point_id, _ in deleted])
+            self._db.executemany("DELETE FROM postings WHERE row = ?", [(row,) for _, row in deleted])
+        for _, row in deleted:
+            self._clear_row(row)
+            self._free.append(row)
+
+    async def compact(self):
+        # Freed matrix rows are reused by later upserts; SQLite needs a VACUUM to shrink
+        await self._run(lambda: self._db.execute("VACUUM"))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def count_expired(self, before_ts: int) -> Dict[str, int]:
+        points, documents = await self._run(lambda: self._db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT doc_id) FROM points WHERE valid_until_ts < ?", (before_ts,)
+        ).fetchone())
+        return {"points": points, "documents": documents}
+
+    async def expired_points(self, before_ts: int, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        return await self._run(lambda: [
+            (point_id, json.loads(payload))
+            for point_id, payload in self._db.execute(
+                "SELECT id, payload FROM points WHERE valid_until_ts < ? LIMIT ?", (before_ts, limit)
+            )
+        ])
+
+    async def lookup_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not doc_ids:
+            return {}
+        return await self._run(self._lookup, list(doc_ids))
+
+    def _lookup(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        marks = ",".join("?" * len(doc_ids))
+        records = self._db.execute(
+            f"SELECT doc_id, payload FROM points WHERE chunk_index = 0 AND doc_id IN ({marks})", doc_ids
+        )
+        return {doc_id: self._project(json.loads(payload), HEAD_FIELDS) for doc_id, payload in records}
+
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        if not point_ids:
+            return {}
+        return await self._run(
+            lambda: {pid: self._decode(self._rows[pid]) for pid in point_ids if pid in self._rows}
+        )
+
+    async def fetch_payloads(self, point_ids: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not point_ids:
+            return {}
+        return {
+            point_id: self._project(payload, fields)
+            for point_id, payload in (await self._run(self._payloads, list(point_ids))).items()
+        }
+
+    def _payloads(self, point_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        marks = ",".join("?" * len(point_ids))
+        records = self._db.execute(f"SELECT id, payload FROM points WHERE id IN ({marks})", point_ids)
+        return {point_id: json.loads(payload) for point_id, payload in records}
+
+    @staticmethod
+    def _project(payload: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if fields is None:
+            return payload
+        return {k: v for k, v in payload.items() if k in fields}
+
+    async def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        fields: Optional[List[str]] = None,
+        query_filter: Optional[SearchFilter] = None,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        query_terms: Optional[SparseVector] = None
+    ) -> List[Dict]:
+        """
+        Lifecycle-Aware Search: exact cosine top-k over the rows that pass
+        the filter (the same SearchFilter conditions Qdrant evaluates),
+        fused with the BM25 ranking when query terms are given and no
+        score threshold is set.
+        """
+        query_filter = (query_filter or SearchFilter()).build()
+        hits = await self._run(
+            self._top_k, query_vector, query_filter, offset + limit, score_threshold, query_terms
+        )
+        hits = hits[offset:]
+        if not hits:
+            return []
+
+        payloads = await self._run(self._payloads, [point_id for point_id, _, _ in hits])
+        projection = None if fields is None else [*HIT_FIELDS, *fields]
+        return [
+            self._hit(point_id, score, self._project(payloads.get(point_id, {}), projection), fusion_score)
+            for point_id, score, fusion_score in hits
+        ]
+
+    def _top_k(
+        self,
+        query_vector: List[float],
+        query_filter: models.Filter,
+        k: int,
+        score_threshold: Optional[float],
+        query_terms: Optional[SparseVector] = None
+    ) -> List[Tuple[str, float, Optional[float]]]:
+        """
+        Best k (point id, cosine similarity, fusion score or None) rows.
+        """
+        n = self._capacity
+        mask = self._alive.copy()
+        for condition in query_filter.must or []:
+            mask &= self._condition_mask(condition)
+        if k <= 0 or not mask.any():
+            return []
+
+        query = self._unit(query_vector)
+        scores = np.full(n, -np.inf, dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, n)
+            if mask[start:end].any():
+                scores[start:end] = np.asarray(self._matrix[start:end], dtype=np.float32) @ query
+        if self.dtype == np.int8:
+            scores /= INT8_SCALE
+
+        if score_threshold is not None:
+            # A similarity cut-off: BM25-only candidates cannot honour it
+            mask &= scores >= score_threshold
+            query_terms = None
+        if not query_terms:
+            return [(self._ids[row], float(scores[row]), None) for row in self._ranked(mask, scores, k)]
+
+        # Hybrid: fuse the dense and BM25 candidate rankings (RRF), as Qdrant does
+        lexical = self._sparse_scores(query_terms)
+        lexical = self._ranked(mask & (lexical > 0), lexical, max(settings.HYBRID_PREFETCH_LIMIT, k))
+        dense = self._ranked(mask, scores, max(settings.HYBRID_PREFETCH_LIMIT, k))
+        fused = reciprocal_rank_fusion([dense.tolist(), lexical.tolist()], settings.HYBRID_RRF_K)
+        return [(self._ids[row], float(scores[row]), score) for row, score in fused[:k]]
+
+    @staticmethod
+    def _ranked(mask: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rows passing the mask, best k by score, in descending order.
+        """
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def _sparse_scores(self, query_terms: SparseVector) -> np.ndarray:
+        """
+        BM25 score per row: stored term weight x query weight x IDF, with
+        IDF = ln(1 + (N - df + 0.5) / (df + 0.5)) as Qdrant's IDF modifier.
+        """
+        scores = np.zeros(self._capacity, dtype=np.float32)
+        marks = ",".join("?" * len(query_terms))
+        postings = self._db.execute(
+            f"SELECT term, row, weight FROM postings WHERE term IN ({marks})", list(query_terms)
+        ).fetchall()
+        if not postings:
+            return scores
+
+        terms, rows, weights = (np.asarray(column) for column in zip(*postings))
+        unique, inverse, df = np.unique(terms, return_inverse=True, return_counts=True)
+        n = len(self._rows)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        boost = np.array([query_terms[int(term)] for term in unique]) * idf
+        weights = weights.astype(np.float64) * boost[inverse]
+        scores += np.bincount(rows.astype(np.int64), weights=weights, minlength=self._capacity).astype(np.float32)
+        return scores
+
+    def _condition_mask(self, condition: models.Condition) -> np.ndarray:
+        """
+        Boolean row mask for one FieldCondition (match value/any or range).
+        """
+        if not isinstance(condition, models.FieldCondition):
+            raise ValueError(f"Embedded store cannot evaluate {type(condition).__name__}.")
+        key, match, bounds = condition.key, condition.match, condition.range
+
+        if key == "tags":
+            values = [match.value] if isinstance(match, models.MatchValue) else match.any
+            mask = np.zeros(self._capacity, dtype=bool)
+            for tag in values:
+                rows = self._tag_rows.get(tag)
+                if rows:
+                    mask[list(rows)] = True
+            return mask
+
+        if key in NUMERIC_COLUMNS:
+            column = self._numeric[key]
+        elif key in KEYWORD_COLUMNS:
+            column = self._keyword[key]
+        else:
+            raise ValueError(f"Embedded store cannot filter on '{key}'.")
+
+        if isinstance(match, models.MatchValue):
+            return column == match.value
+        if isinstance(match, models.MatchAny):
+            return np.isin(column, list(match.any))
+        if bounds is not None:
+            mask = np.ones(self._capacity, dtype=bool)
+            if bounds.gt is not None:
+                mask &= column > bounds.gt
+            if bounds.gte is not None:
+                mask &= column >= bounds.gte
+            if bounds.lt is not None:
+                mask &= column < bounds.lt
+            if bounds.lte is not None:
+                mask &= column <= bounds.lte
+            return mask
+        raise ValueError(f"Unsupported condition on '{key}'.")
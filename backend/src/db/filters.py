@@ -0,0 +1,84 @@
+"""
+filters.py
+----------
+Composable Qdrant filters for governed retrieval.
+Every filter built here includes the lifecycle condition (valid_until_ts > now),
+so expired content can never be retrieved, whatever else a caller filters on.
+Datetimes without a timezone are read as UTC, never in the server's local zone.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from qdrant_client.http import models
+
+
+def utc_timestamp(value: datetime) -> int:
+    """
+    Unix seconds of `value`, taking naive datetimes as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class SearchFilter:
+    """
+    Builder for a Qdrant filter. Each method adds conditions and returns the
+    builder, so filters compose by chaining:
+
+        SearchFilter().tags(["HR"], match="all").owner("hr@upm.com").build()
+
+    Empty arguments add nothing.
+    """
+
+    def __init__(self, now: Optional[float] = None):
+        self.now = int(time.time() if now is None else now)
+        self.must: List[models.Condition] = []
+
+    def tags(self, tags: Optional[List[str]], match: str = "any") -> "SearchFilter":
+        """
+        match="any": at least one of the tags; match="all": every tag.
+        """
+        if not tags:
+            return self
+        if match == "any":
+            self.must.append(models.FieldCondition(key="tags", match=models.MatchAny(any=list(tags))))
+        elif match == "all":
+            self.must.extend(
+                models.FieldCondition(key="tags", match=models.MatchValue(value=tag)) for tag in tags
+            )
+        else:
+            raise ValueError(f"Unknown tag match mode '{match}'.")
+        return self
+
+    def owner(self, owner: Optional[str]) -> "SearchFilter":
+        return self._equals("owner", owner)
+
+    def source_type(self, source_type: Optional[str]) -> "SearchFilter":
+        return self._equals("source_type", source_type)
+
+    def expires_between(self, after: Optional[datetime] = None, before: Optional[datetime] = None) -> "SearchFilter":
+        """
+        Documents whose valid_until falls in [after, before).
+        """
+        if after is None and before is None:
+            return self
+        self.must.append(models.FieldCondition(
+            key="valid_until_ts",
+            range=models.Range(
+                gte=utc_timestamp(after) if after else None,
+                lt=utc_timestamp(before) if before else None
+            )
+        ))
+        return self
+
+    def _equals(self, key: str, value: Optional[str]) -> "SearchFilter":
+        if value:
+            self.must.append(models.FieldCondition(key=key, match=models.MatchValue(value=value)))
+        return self
+
+    def build(self) -> models.Filter:
+        # Governance Filter: valid_until_ts > current_time
+        lifecycle = models.FieldCondition(key="valid_until_ts", range=models.Range(gt=self.now))
+        return models.Filter(must=[lifecycle, *self.must])
@@ -0,0 +1,32 @@
+"""
+migrate.py
+----------
+Applies the configured collection profile to an existing Qdrant collection.
+
+    python -m src.db.migrate            # apply
+    python -m src.db.migrate --dry-run  # only show what would change
+"""
+
+import argparse
+import asyncio
+from src.db.vector_store import vector_db
+
+
+async def main(dry_run: bool):
+    try:
+        changes = await vector_db.migrate_collection(dry_run=dry_run)
+    finally:
+        await vector_db.close()
+
+    if not changes:
+        print("Vector store already matches the configured profile.")
+        return
+    verb = "Would change" if dry_run else "Changed"
+    for field, value in changes.items():
+        print(f"{verb} {field}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without applying them.")
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -0,0 +1,115 @@
+"""
+profiles.py
+-----------
+Config-driven collection profiles: vector quantization, on-disk originals and
+HNSW parameters, all taken from Settings.
+
+- "none":   float32 vectors (1536 bytes per 384-dim vector)
+- "scalar": int8 copies in RAM (4x smaller), ~99% recall with rescoring
+- "binary": 1 bit per dimension in RAM (32x smaller); needs oversampling + rescoring
+
+With QDRANT_ON_DISK_VECTORS the float32 originals are memory-mapped from disk
+and only read to rescore the oversampled candidates.
+"""
+
+from typing import Any, Dict, Optional
+from qdrant_client.http import models
+from src.config import settings
+from src.db.base import VECTOR_SIZE
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+# Vector names: the unnamed dense MiniLM vector and the BM25 term weights
+DENSE_VECTOR = ""
+SPARSE_VECTOR = "bm25"
+
+
+def _mode() -> str:
+    mode = settings.QDRANT_QUANTIZATION
+    if mode not in QUANTIZATION_MODES:
+        raise RuntimeError(f"Unknown QDRANT_QUANTIZATION '{mode}'. Use one of {QUANTIZATION_MODES}.")
+    return mode
+
+
+def vectors_config() -> models.VectorParams:
+    return models.VectorParams(
+        size=VECTOR_SIZE,
+        distance=models.Distance.COSINE,
+        on_disk=settings.QDRANT_ON_DISK_VECTORS
+    )
+
+
+def sparse_vectors_config() -> Dict[str, models.SparseVectorParams]:
+    # Qdrant multiplies the stored BM25 term weights by IDF at query time
+    return {SPARSE_VECTOR: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def hnsw_config() -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def quantization_config() -> Optional[models.QuantizationConfig]:
+    mode = _mode()
+    if mode == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            # Clip outliers so the int8 range covers the bulk of the values
+            quantile=0.99,
+            always_ram=True
+        ))
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params() -> models.SearchParams:
+    """
+    Search-time HNSW beam width, plus oversampling and rescoring with the
+    original vectors when the collection is quantized.
+    """
+    quantization = None
+    if _mode() != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_RESCORE,
+            oversampling=settings.QDRANT_OVERSAMPLING
+        )
+    return models.SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF, quantization=quantization)
+
+
+def profile_diff(config: models.CollectionConfig) -> Dict[str, Any]:
+    """
+    update_collection() arguments that bring an existing collection in line
+    with the configured profile; empty if it already matches. Qdrant applies
+    them in place and rebuilds indexes in the background while serving.
+    """
+    changes: Dict[str, Any] = {}
+
+    vectors = config.params.vectors
+    if isinstance(vectors, models.VectorParams):
+        if vectors.size != VECTOR_SIZE:
+            # Dimension changes need a re-embed into a new collection, not a migration
+            raise RuntimeError(
+                f"Collection vectors have {vectors.size} dimensions, the embedder produces {VECTOR_SIZE}."
+            )
+        if bool(vectors.on_disk) != settings.QDRANT_ON_DISK_VECTORS:
+            changes["vectors_config"] = {"": models.VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS)}
+
+    hnsw = config.hnsw_config
+    if (hnsw.m, hnsw.ef_construct) != (settings.QDRANT_HNSW_M, settings.QDRANT_HNSW_EF_CONSTRUCT):
+        changes["hnsw_config"] = hnsw_config()
+
+    if _quantization_mode(config.quantization_config) != _mode():
+        changes["quantization_config"] = quantization_config() or models.Disabled.DISABLED
+
+    return changes
+
+
+def _quantization_mode(config: Optional[models.QuantizationConfig]) -> str:
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if config is None:
+        return "none"
+    # e.g. product quantization configured by hand: always differs from a profile
+    return type(config).__name__
@@ -0,0 +1,421 @@
+"""
+qdrant_store.py
+---------------
+Qdrant backend of the Database Abstraction Layer.
+Manages Vector Storage and executes 'Time-Aware' retrieval.
+All calls are async: requests share a pooled connection (HTTP or gRPC)
+instead of blocking the event loop.
+"""
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from src.config import settings
+from src.db import profiles
+from src.core.sparse import SparseVector
+from src.db.base import VectorDB, HIT_FIELDS, HEAD_FIELDS
+from src.db.filters import SearchFilter
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import math
+import grpc
+import httpx
+
+# Configure logging
+logger = logging.getLogger("axiom.vector_store")
+
+# Server responses worth retrying (overload / gateway hiccups)
+RETRYABLE_STATUS = {429, 502, 503, 504}
+RETRYABLE_GRPC = {grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED, grpc.StatusCode.RESOURCE_EXHAUSTED}
+
+# Payload fields used in filters: dedup (doc_id), lifecycle (valid_until_ts), governance
+PAYLOAD_INDEXES = {
+    "doc_id": models.PayloadSchemaType.KEYWORD,
+    "valid_until_ts": models.PayloadSchemaType.INTEGER,
+    "owner": models.PayloadSchemaType.KEYWORD,
+    "tags": models.PayloadSchemaType.KEYWORD,
+    "source_type": models.PayloadSchemaType.KEYWORD,
+}
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    True for connection errors, timeouts and overload responses.
+    """
+    if isinstance(error, (ResponseHandlingException, httpx.TransportError)):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in RETRYABLE_STATUS
+    if isinstance(error, grpc.RpcError):
+        return error.code() in RETRYABLE_GRPC
+    return False
+
+
+class QdrantVectorDB(VectorDB):
+    """
+    Wrapper around AsyncQdrantClient to enforce Axiom's governance patterns.
+    Updated for Qdrant Client v1.10+
+
+    The client is created on first use and bound to the running event loop;
+    every write is idempotent (deterministic point ids), so transient failures
+    are retried with exponential backoff.
+    """
+    
+    def __init__(self, location: Optional[str] = None):
+        self.location = settings.QDRANT_LOCATION if location is None else location
+        self.collection = settings.QDRANT_COLLECTION_NAME
+        self.client: Optional[AsyncQdrantClient] = None
+        self._setup: Optional[asyncio.Task] = None
+        # Whether the collection has the BM25 sparse vector (set up on connect)
+        self.sparse = False
+
+    def _make_client(self) -> AsyncQdrantClient:
+        if self.location == ":memory:":
+            return AsyncQdrantClient(location=":memory:")
+        if self.location:
+            return AsyncQdrantClient(path=self.location)
+
+        # Initialize connection to the Qdrant Container
+        return AsyncQdrantClient(
+            host=settings.QDRANT_HOST,
+            port=settings.QDRANT_PORT,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            timeout=settings.QDRANT_TIMEOUT,
+            pool_size=settings.QDRANT_POOL_SIZE,
+        )
+
+    async def _connection(self) -> AsyncQdrantClient:
+        """
+        The client, with the collection set up. Concurrent first callers share
+        one setup; a failed setup is retried on the next call. Remote clients
+        hold sockets tied to an event loop, so a new loop gets a new client.
+        """
+        loop = asyncio.get_running_loop()
+        setup = self._setup
+        if (
+            setup is None
+            or (setup.done() and (setup.cancelled() or setup.exception() is not None))
+            or (self.location != ":memory:" and setup.get_loop() is not loop)
+        ):
+            setup = self._setup = loop.create_task(self._connect())
+        return await setup
+
+    async def _connect(self) -> AsyncQdrantClient:
+        # The embedded in-memory client keeps its data: never replace it
+        if self.client is None or self.location != ":memory:":
+            self.client = self._make_client()
+        await self._call(self._ensure_collection, self.client)
+        return self.client
+
+    async def connect(self):
+        await self._connection()
+
+    async def close(self):
+        """
+        Releases pooled connections. Called from the application lifespan.
+        """
+        if self.client is not None:
+            await self.client.close()
+        self.client = None
+        self._setup = None
+
+    async def _call(self, operation, *args, **kwargs):
+        """
+        Awaits `operation(*args, **kwargs)`, retrying transient failures.
+        """
+        for attempt in range(settings.QDRANT_RETRIES + 1):
+            try:
+                return await operation(*args, **kwargs)
+            except Exception as e:
+                if attempt == settings.QDRANT_RETRIES or not is_transient(e):
+                    raise
+                delay = settings.QDRANT_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Qdrant call failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _run(self, method: str, **kwargs):
+        """
+        Calls a client method on Axiom's collection.
+        """
+        client = await self._connection()
+        return await self._call(getattr(client, method), collection_name=self.collection, **kwargs)
+
+    async def _ensure_collection(self, client: AsyncQdrantClient):
+        """
+        Idempotent setup of the vector collection, using the configured
+        profile (quantization, on-disk vectors, HNSW; see profiles.py).
+        """
+        if not await client.collection_exists(self.collection):
+            await client.create_collection(
+                collection_name=self.collection,
+                vectors_config=profiles.vectors_config(),
+                sparse_vectors_config=profiles.sparse_vectors_config(),
+                hnsw_config=profiles.hnsw_config(),
+                quantization_config=profiles.quantization_config()
+            )
+            self.sparse = True
+        else:
+            info = await client.get_collection(self.collection)
+            self.sparse = profiles.SPARSE_VECTOR in (info.config.params.sparse_vectors or {})
+            if not self.sparse:
+                # Named vectors cannot be added in place
+                logger.warning(
+                    f"Collection '{self.collection}' has no '{profiles.SPARSE_VECTOR}' sparse vector; "
+                    "hybrid search is disabled until it is re-created and re-ingested."
+                )
+            changes = await self._migrate(client, dry_run=not settings.QDRANT_AUTO_MIGRATE)
+            if changes and not settings.QDRANT_AUTO_MIGRATE:
+                logger.warning(
+                    f"Collection '{self.collection}' differs from the configured profile "
+                    f"({', '.join(changes)}). Run 'make migrate-collection' or set QDRANT_AUTO_MIGRATE."
+                )
+
+        # Without indexes every filtered query scans payloads (no-op if they already exist)
+        for field, schema in PAYLOAD_INDEXES.items():
+            await client.create_payload_index(
+                collection_name=self.collection,
+                field_name=field,
+                field_schema=schema
+            )
+
+    async def migrate_collection(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Migration path for existing collections: applies the configured
+        profile in place and returns the changes (only reports them on dry_run).
+        Qdrant re-quantizes and re-indexes in the background while serving.
+        """
+        client = await self._connection()
+        return await self._call(self._migrate, client, dry_run)
+
+    async def _migrate(self, client: AsyncQdrantClient, dry_run: bool) -> Dict[str, Any]:
+        info = await client.get_collection(self.collection)
+        changes = profiles.profile_diff(info.config)
+        if changes and not dry_run:
+            await client.update_collection(collection_name=self.collection, **changes)
+            logger.info(f"Migrated collection '{self.collection}': {', '.join(changes)}")
+        return changes
+
+    async def upsert_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Stores (or replaces in place) many chunked documents.
+
+        Each document is a dict with doc_id, content_hash, chunks, vectors,
+        metadata and optionally sparse. Points are sent in batches of
+        QDRANT_UPSERT_BATCH_SIZE; chunks a document no longer contains are
+        deleted afterwards, so readers never see a half-missing document.
+        """
+        # The collection layout (with or without the sparse vector) shapes the points
+        await self._connection()
+        points = []
+        cleanups = []
+        for document in documents:
+            doc_points = self._build_points(document)
+            points.extend(doc_points)
+            cleanups.append(models.DeleteOperation(
+                delete=models.FilterSelector(filter=models.Filter(
+                    must=[self._doc_condition(document["doc_id"])],
+                    must_not=[models.HasIdCondition(has_id=[p.id for p in doc_points])]
+                ))
+            ))
+
+        batch_size = settings.QDRANT_UPSERT_BATCH_SIZE
+        try:
+            for start in range(0, len(points), batch_size):
+                await self._run("upsert", points=points[start:start + batch_size])
+            if cleanups:
+                await self._run("batch_update_points", update_operations=cleanups)
+            return [d["doc_id"] for d in documents]
+        except Exception as e:
+            logger.error(f"Failed to upsert document: {e}")
+            raise e
+
+    async def lookup_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fast pre-NLP dedup check: returns {doc_id: {content_hash, quality_score, score_tier,
+        chunk_count, pii_redacted}} for the documents that are already stored.
+        """
+        if not doc_ids:
+            return {}
+
+        records, _ = await self._run(
+            "scroll",
+            scroll_filter=models.Filter(must=[
+                models.FieldCondition(key="doc_id", match=models.MatchAny(any=list(doc_ids))),
+                models.FieldCondition(key="chunk_index", match=models.MatchValue(value=0))
+            ]),
+            limit=len(doc_ids),
+            with_payload=HEAD_FIELDS,
+            with_vectors=False
+        )
+        return {r.payload["doc_id"]: r.payload for r in records if r.payload}
+
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Stored vectors for the given point ids (missing ids are omitted).
+        Lets a modified document reuse the vectors of its unchanged chunks.
+        """
+        if not point_ids:
+            return {}
+
+        records = await self._run(
+            "retrieve",
+            ids=point_ids,
+            with_payload=False,
+            with_vectors=[profiles.DENSE_VECTOR]
+        )
+        return {str(r.id): r.vector for r in records}
+
+    async def fetch_payloads(self, point_ids: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Selected payload fields of the given points (missing ids are omitted).
+        """
+        if not point_ids:
+            return {}
+
+        records = await self._run(
+            "retrieve",
+            ids=point_ids,
+            with_payload=fields,
+            with_vectors=False
+        )
+        return {str(r.id): r.payload or {} for r in records}
+
+    async def touch_documents(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Refreshes governance metadata (owner, tags, expiry...) of unchanged
+        documents without re-embedding them.
+        """
+        if not updates:
+            return
+
+        operations = [
+            models.SetPayloadOperation(set_payload=models.SetPayload(
+                payload=self._with_timestamps(metadata),
+                filter=models.Filter(must=[self._doc_condition(doc_id)])
+            ))
+            for doc_id, metadata in updates
+        ]
+        await self._run("batch_update_points", update_operations=operations)
+
+    async def count_expired(self, before_ts: int) -> Dict[str, int]:
+        points = await self._run("count", count_filter=self._expired_filter(before_ts), exact=True)
+        # A document's chunks share its expiry: count its first chunk
+        documents = await self._run(
+            "count",
+            count_filter=self._expired_filter(
+                before_ts, models.FieldCondition(key="chunk_index", match=models.MatchValue(value=0))
+            ),
+            exact=True
+        )
+        return {"points": points.count, "documents": documents.count}
+
+    async def expired_points(self, before_ts: int, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        records, _ = await self._run(
+            "scroll",
+            scroll_filter=self._expired_filter(before_ts),
+            limit=limit,
+            with_payload=True,
+            with_vectors=False
+        )
+        return [(str(record.id), record.payload or {}) for record in records]
+
+    async def delete_points(self, point_ids: List[str]):
+        if point_ids:
+            await self._run("delete", points_selector=models.PointIdsList(points=list(point_ids)), wait=True)
+
+    @staticmethod
+    def _expired_filter(before_ts: int, *conditions: models.Condition) -> models.Filter:
+        expired = models.FieldCondition(key="valid_until_ts", range=models.Range(lt=before_ts))
+        return models.Filter(must=[expired, *conditions])
+
+    def _build_points(self, document: Dict[str, Any]) -> List[models.PointStruct]:
+        return [
+            models.PointStruct(id=point_id, vector=self._vectors(vector, terms), payload=payload)
+            for point_id, vector, payload, terms in self._points(document)
+        ]
+
+    def _vectors(self, vector: List[float], terms: Optional[SparseVector]):
+        if not self.sparse:
+            return vector
+        return {profiles.DENSE_VECTOR: vector, profiles.SPARSE_VECTOR: self._sparse(terms or {})}
+
+    @staticmethod
+    def _sparse(terms: SparseVector) -> models.SparseVector:
+        return models.SparseVector(indices=list(terms), values=list(terms.values()))
+
+    @staticmethod
+    def _doc_condition(doc_id: str) -> models.FieldCondition:
+        return models.FieldCondition(key="doc_id", match=models.MatchValue(value=doc_id))
+
+    async def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        fields: Optional[List[str]] = None,
+        query_filter: Optional[SearchFilter] = None,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        query_terms: Optional[SparseVector] = None
+    ) -> List[Dict]:
+        """
+        Lifecycle-Aware Search, filtered, fused and paged inside Qdrant.
+        uses client.query_points() instead of deprecated client.search()
+        """
+        conditions = (query_filter or SearchFilter()).build()
+        query = {
+            "query": query_vector,
+            "query_filter": conditions,
+            "score_threshold": score_threshold,
+            "search_params": profiles.search_params(),
+        }
+        await self._connection()
+        # A score threshold is a similarity cut-off, which BM25-only hits cannot honour
+        hybrid = bool(query_terms) and self.sparse and score_threshold is None
+        if hybrid:
+            # Hybrid: dense + BM25 candidates (both filtered), fused with RRF
+            candidates = max(settings.HYBRID_PREFETCH_LIMIT, offset + limit)
+            query = {
+                "prefetch": [
+                    models.Prefetch(
+                        query=query_vector, filter=conditions, limit=candidates,
+                        params=profiles.search_params()
+                    ),
+                    models.Prefetch(
+                        query=self._sparse(query_terms), using=profiles.SPARSE_VECTOR,
+                        filter=conditions, limit=candidates
+                    ),
+                ],
+                "query": models.RrfQuery(rrf=models.Rrf(k=settings.HYBRID_RRF_K)),
+            }
+
+        try:
+            # NEW SYNTAX for Qdrant v1.10+
+            results = (await self._run(
+                "query_points",
+                limit=limit,
+                offset=offset or None,
+                with_payload=True if fields is None else [*HIT_FIELDS, *fields],
+                **query
+            )).points
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            raise e
+
+        if not hybrid:
+            return [self._hit(hit.id, hit.score, hit.payload) for hit in results]
+
+        # Fused hits carry RRF scores: report the cosine similarity next to them
+        vectors = await self.get_vectors([hit.id for hit in results])
+        return [
+            self._hit(hit.id, self._cosine(query_vector, vectors.get(str(hit.id))), hit.payload, hit.score)
+            for hit in results
+        ]
+
+    @staticmethod
+    def _cosine(query_vector: List[float], vector: Optional[List[float]]) -> float:
+        if not vector:
+            return 0.0
+        norm = math.sqrt(sum(q * q for q in query_vector) * sum(v * v for v in vector))
+        return sum(q * v for q, v in zip(query_vector, vector)) / norm if norm else 0.0
\ No newline at end of file
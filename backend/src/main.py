@@ -3,19 +3,67 @@ main.py
 -------
 Entry point for the Axiom Knowledge Governance Engine.
 Initializes the FastAPI application and defines global middleware/events.
+
+Importing the app loads no model and opens no connection: the lifespan
+starts the warm-up in the background (see core/readiness.py), so a new
+replica answers liveness checks within its boot time.
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from src.config import settings
+from src.api.middleware import MetricsMiddleware
 from src.api.routes import router as api_router
+from src.core import metrics
+from src.core.context import context_assembler
+from src.core.executor import executors, ExecutorSaturatedError
+from src.core.jobs import job_queue
+from src.core.lifecycle import lifecycle_sweeper
+from src.core.readiness import readiness
+from src.core.sparse import query_vector
+from src.core.tasks import warm_up_embedder, warm_up_nlp
+from src.db.vector_store import vector_db
+
+async def warm_up_nlp_models():
+    # Every CPU worker loads spaCy; the API process only needs the query and prompt tokenizers
+    await executors.broadcast(warm_up_nlp)
+    await asyncio.to_thread(query_vector, "warm-up")
+    await asyncio.to_thread(context_assembler.counter.load)
+
+async def warm_up_embedding_model():
+    await executors.broadcast(warm_up_embedder)
+
+if settings.WARMUP_ON_STARTUP:
+    readiness.register("nlp", warm_up_nlp_models)
+    readiness.register("embedder", warm_up_embedding_model)
+    readiness.register("vector_db", vector_db.connect)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and connect in the background: startup does not wait for them
+    readiness.start()
+    # Resume background jobs queued before a restart
+    job_queue.start()
+    # Periodically delete expired content
+    lifecycle_sweeper.start()
+    yield
+    # Stop warm-up, sweeper, job workers and worker pools, release pooled Qdrant connections on shutdown
+    await readiness.stop()
+    await lifecycle_sweeper.stop()
+    await job_queue.stop()
+    executors.shutdown()
+    await vector_db.close()
 
 # Initialize the application
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Green AI knowledge pipeline for high-fidelity RAG retrieval.",
     version="0.1.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS Middleware Configuration
@@ -27,6 +75,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request Metrics (count, latency, in-flight per route; optional Server-Timing header)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, timing_headers=settings.METRICS_TIMING_HEADERS)
+
+# Load Shedding: a full stage queue means back off, not wait indefinitely
+@app.exception_handler(ExecutorSaturatedError)
+async def saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
 # Include the API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -35,9 +96,28 @@ async def health_check():
     return {
         "status": "active",
         "system": "Axiom Knowledge Engine",
-        "version": "0.1.0"
+        "version": "0.1.0",
+        "ready": readiness.ready
     }
 
+# Liveness: the process serves requests (never checks dependencies, so a slow
+# model load or a Qdrant outage does not get the replica restarted)
+@app.get("/health/live", tags=["System"])
+async def liveness_check():
+    return {"status": "alive"}
+
+# Readiness: 503 until every component has loaded (keeps the replica out of rotation)
+@app.get("/health/ready", tags=["System"])
+async def readiness_check():
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness.report())
+
+# Prometheus scrape endpoint (metrics of this worker process)
+@app.get("/metrics", tags=["System"], include_in_schema=settings.METRICS_ENABLED)
+async def metrics_endpoint():
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Metrics are disabled."})
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Axiom - UPM's Knowledge Governance Layer"}
\ No newline at end of file
@@ -6,7 +6,7 @@ Enforces Governance and Lifecycle metadata (Owner, Expiry) at the API boundary.
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime, timezone
 
 class IngestionRequest(BaseModel):
@@ -19,6 +19,12 @@ class IngestionRequest(BaseModel):
     # Governance Fields
     owner: str = Field(..., description="Email/ID of the content owner responsible for this data.")
     tags: List[str] = Field(default_factory=list, description="Taxonomy tags (e.g. 'Safety', 'HR').")
+
+    # Re-sync: a stable source key (e.g. SharePoint URL) lets a changed document replace its previous version
+    source_id: Optional[str] = Field(
+        default=None,
+        description="Stable identifier of the source document. Without it, documents are addressed by content."
+    )
     
     # Lifecycle Management: If not provided, data expires in 1 year by default
     valid_until: Optional[datetime] = Field(
@@ -48,13 +54,34 @@ class DocumentResponse(BaseModel):
     """
     id: str
     text: str
-    score: float
+    score: float = Field(description="Cosine similarity to the query.")
+    fusion_score: Optional[float] = Field(default=None, description="RRF score that ordered hybrid results.")
+    doc_id: Optional[str] = None
+    chunk_index: int = 0
     metadata: Dict[str, Any]
 
 class SearchRequest(BaseModel):
     """
     The query contract.
+    Filters are applied inside the vector store; expired content is always excluded.
     """
     query: str
-    limit: int = 5
-    filter_tags: Optional[List[str]] = None
\ No newline at end of file
+    limit: int = Field(default=5, ge=1, le=100)
+    filter_tags: Optional[List[str]] = None
+    tags_match: Literal["any", "all"] = Field(default="any", description="Match any or all of filter_tags.")
+    owner: Optional[str] = None
+    source_type: Optional[str] = None
+    # Lifecycle window: documents expiring in [expires_after, expires_before)
+    expires_after: Optional[datetime] = None
+    expires_before: Optional[datetime] = None
+
+    # Pagination
+    offset: int = Field(default=0, ge=0)
+    score_threshold: Optional[float] = Field(default=None, description="Drop hits less similar than this (dense-only search).")
+
+class SearchResponse(BaseModel):
+    """
+    A page of search results. next_offset is None on the last page.
+    """
+    results: List[DocumentResponse]
+    next_offset: Optional[int] = None
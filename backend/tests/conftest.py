@@ -0,0 +1,16 @@
+"""
+conftest.py
+-----------
+Test-session defaults: the suite runs without containers.
+Qdrant runs embedded in-process (":memory:") instead of against a live
+server, and the CPU stages use a thread pool so no worker processes are
+spawned. Set QDRANT_LOCATION="" (and QDRANT_HOST) in the environment to run
+the integration tests against a real Qdrant server instead.
+"""
+
+import os
+
+# Must be set before src.config is imported by any test module
+os.environ.setdefault("VECTOR_BACKEND", "qdrant")
+os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+os.environ.setdefault("CPU_EXECUTOR", "thread")
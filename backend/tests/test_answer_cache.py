@@ -0,0 +1,78 @@
+"""
+test_answer_cache.py
+--------------------
+Unit tests for the semantic /chat answer cache.
+"""
+
+import asyncio
+import time
+import pytest
+from src.core.answer_cache import SemanticAnswerCache, CachedAnswer
+
+FUTURE = int(time.time()) + 3600
+
+def hit(point_id, content_hash="h1"):
+    return {"id": point_id, "text": "...", "metadata": {"content_hash": content_hash, "valid_until_ts": FUTURE}}
+
+def state(**overrides):
+    live = {"p1": {"valid_until_ts": FUTURE, "content_hash": "h1"}}
+    live.update(overrides)
+    return live
+
+def make_cache():
+    return SemanticAnswerCache(threshold=0.95, max_entries=10, ttl_seconds=60)
+
+@pytest.mark.asyncio
+async def test_similar_query_hits():
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], CachedAnswer("What is Biofore?", 3, "A strategy.", [hit("p1")]))
+
+    async def fetch(ids):
+        return state()
+
+    entry = await cache.get([0.99, 0.05, 0.0], 3, fetch)
+    assert entry is not None and entry.answer == "A strategy."
+    assert await cache.get([0.0, 1.0, 0.0], 3, fetch) is None  # dissimilar
+    assert await cache.get([1.0, 0.0, 0.0], 5, fetch) is None   # different limit
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("live", [
+    {},                                                         # chunk deleted
+    {"p1": {"valid_until_ts": 1, "content_hash": "h1"}},        # expired
+    {"p1": {"valid_until_ts": FUTURE, "content_hash": "h2"}},   # re-ingested
+])
+async def test_invalid_citations_evict(live):
+    cache = make_cache()
+    cache.store([1.0, 0.0], CachedAnswer("q", 3, "a", [hit("p1")]))
+
+    async def fetch(ids):
+        return live
+
+    assert await cache.get([1.0, 0.0], 3, fetch) is None
+    assert cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_identical_inflight_questions_share_one_call():
+    cache = make_cache()
+    calls = 0
+
+    async def produce():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"answer": "shared"}
+
+    results = await asyncio.gather(*[
+        cache.coalesce("What is  Raflatac?", 3, produce),
+        cache.coalesce("what is raflatac?", 3, produce),
+        cache.coalesce("What is Raflatac?", 3, produce),
+    ])
+    assert calls == 1
+    assert all(r == {"answer": "shared"} for r in results)
+
+def test_max_entries_drops_oldest():
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=2, ttl_seconds=60)
+    for i in range(3):
+        cache.store([float(i + 1), 1.0], CachedAnswer(f"q{i}", 3, f"a{i}", []))
+    assert [e.answer for e in cache._entries] == ["a1", "a2"]
@@ -0,0 +1,103 @@
+"""
+test_batcher.py
+---------------
+Unit tests for embedding micro-batching.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import pytest
+from src.core import metrics
+from src.core.batcher import EmbeddingBatcher, embedded_vectors
+from src.core.executor import ExecutorSaturatedError, Stage
+
+class FakeEncoder:
+    """Records the batches it receives and returns [len(text)] per text."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_a_batch():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=20)
+
+    results = await asyncio.gather(*[batcher.embed("x" * i) for i in range(1, 6)])
+
+    assert results == [[float(i)] for i in range(1, 6)]
+    assert len(encoder.batches) == 1
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=4, max_wait_ms=10_000)
+
+    results = await asyncio.wait_for(batcher.embed_many(["a", "bb", "ccc", "dddd"]), timeout=1)
+
+    assert results == [[1.0], [2.0], [3.0], [4.0]]
+    assert encoder.batches == [["a", "bb", "ccc", "dddd"]]
+
+@pytest.mark.asyncio
+async def test_large_request_is_split_into_batches():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait_ms=1)
+
+    results = await batcher.embed_many(["t"] * 7)
+
+    assert len(results) == 7
+    assert [len(b) for b in encoder.batches] == [3, 3, 1]
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_caller():
+    async def failing(texts):
+        raise RuntimeError("model offline")
+
+    batcher = EmbeddingBatcher(failing, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model offline"):
+        await batcher.embed("query")
+
+def encode(texts):
+    return [[float(len(t))] for t in texts]
+
+@pytest.mark.asyncio
+async def test_large_request_does_not_saturate_the_stage():
+    pool = ThreadPoolExecutor(max_workers=2)
+    stage = Stage("embed", lambda: pool, concurrency=2, max_queue=2)
+    batcher = EmbeddingBatcher(
+        partial(stage.run_when_free, encode), max_batch_size=4, max_wait_ms=1,
+        max_inflight=2, admit=stage.check_capacity
+    )
+
+    # 40 batches: far more than the stage holds at once
+    results = await batcher.embed_many(["t"] * 160)
+    assert results == [[1.0]] * 160
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_callers_are_shed_at_admission():
+    pool = ThreadPoolExecutor(max_workers=1)
+    stage = Stage("embed", lambda: pool, concurrency=1, max_queue=0)
+    batcher = EmbeddingBatcher(
+        partial(stage.run_when_free, encode), max_batch_size=4, max_wait_ms=1, admit=stage.check_capacity
+    )
+
+    # The only slot is taken: a new caller is rejected before queueing anything
+    stage._pending = 1
+    with pytest.raises(ExecutorSaturatedError):
+        await batcher.embed_many(["a", "b"])
+    assert batcher._pending == []
+    stage._pending = 0
+    assert await batcher.embed("ccc") == [3.0]
+    pool.shutdown()
+
+def test_cache_lookups_are_counted_by_the_caller():
+    before = dict(metrics.EMBEDDING_CACHE._values)
+    vectors = embedded_vectors({"vectors": [[1.0], [2.0], [3.0]], "cache": ["memory_hit", "miss", None]})
+    assert vectors == [[1.0], [2.0], [3.0]]
+    for result, added in (("memory_hit", 1), ("miss", 1), ("disk_hit", 0)):
+        assert metrics.EMBEDDING_CACHE._values.get((result,), 0) - before.get((result,), 0) == added
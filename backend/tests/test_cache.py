@@ -0,0 +1,65 @@
+"""
+test_cache.py
+-------------
+Unit tests for the two-tier embedding cache.
+"""
+
+import numpy as np
+from src.core.cache import DiskVectorStore, EmbeddingCache, cache_key
+
+DIM = 4
+
+def vec(x):
+    return np.full(DIM, x, dtype=np.float32)
+
+def test_lru_hits_and_eviction():
+    cache = EmbeddingCache("model", max_entries=2)
+    cache.put_many(["a", "b"], [vec(1), vec(2)])
+    assert cache.get_many(["a"])[0][0] == 1.0
+    cache.put_many(["c"], [vec(3)])  # evicts "b" (least recently used)
+
+    sources = []
+    hits = cache.get_many(["a", "b", "c"], sources)
+    assert hits[1] is None
+    assert sources == ["memory_hit", "miss", "memory_hit"]
+    assert cache.stats()["memory_hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+def test_keys_are_model_specific():
+    assert cache_key("model-a", "text") != cache_key("model-b", "text")
+
+def test_disk_tier_survives_restart(tmp_path):
+    disk = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100)
+    EmbeddingCache("model", 10, disk).put_many(["hello"], [vec(7)])
+
+    # A fresh process: empty LRU, same directory
+    reopened = EmbeddingCache("model", 10, DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100))
+    hit = reopened.get_many(["hello"])[0]
+    assert np.allclose(hit, vec(7))
+    assert reopened.stats()["disk_hits"] == 1
+
+def test_disk_tier_sees_other_writers(tmp_path):
+    reader = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100)
+    writer = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100)
+    writer.put_many({cache_key("model", "shared"): vec(5)})
+    assert np.allclose(reader.get(cache_key("model", "shared")), vec(5))
+
+def test_disk_tier_respects_max_entries(tmp_path):
+    disk = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=2)
+    disk.put_many({cache_key("model", str(i)): vec(i) for i in range(5)})
+    assert len(disk) == 2
+
+def test_disk_tier_recovers_from_orphan_rows(tmp_path):
+    disk = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100)
+    disk.put_many({cache_key("model", "first"): vec(1)})
+    # Crash between the two writes: a vector (plus half of another) without a key
+    with open(tmp_path / "model.vec", "ab") as f:
+        f.write(vec(9).tobytes() + vec(9).tobytes()[:6])
+
+    reopened = DiskVectorStore(str(tmp_path), "model", DIM, max_entries=100)
+    reopened.put_many({cache_key("model", "A"): vec(2)})
+    assert np.allclose(reopened.get(cache_key("model", "A")), vec(2))
+    assert np.allclose(reopened.get(cache_key("model", "first")), vec(1))
+    assert (tmp_path / "model.vec").stat().st_size == 2 * DIM * 4
+    # Other processes that mapped the file before the repair agree
+    assert np.allclose(disk.get(cache_key("model", "A")), vec(2))
@@ -0,0 +1,101 @@
+"""
+test_chunker.py
+---------------
+Unit tests for sentence-aware chunking.
+"""
+
+import json
+import string
+import pytest
+import spacy
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+from src.core.chunker import SentenceChunker
+from src.core.embedding_backends import EXPORT_INFO_FILE, TOKENIZER_FILE, load_tokenizer
+
+# A blank pipeline + rule-based sentencizer keeps these tests model-free
+@pytest.fixture(scope="module")
+def nlp():
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+@pytest.fixture(scope="module")
+def wordpiece():
+    # BERT-style WordPiece: a few whole words, every other word spelled out piece by piece
+    chars = string.ascii_lowercase + string.digits
+    tokens = ["[UNK]", "[CLS]", "[SEP]", "see", "part", "and", "the", "valve"]
+    tokens += list(chars) + ["##" + c for c in chars] + list(".,-/:")
+    tokenizer = Tokenizer(models.WordPiece({t: i for i, t in enumerate(tokens)}, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 1), ("[SEP]", 2)]
+    )
+    return tokenizer
+
+def pieces(tokenizer, text):
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+def test_short_text_is_one_chunk(nlp):
+    text = "UPM renews the everyday. Biofore is our strategy."
+    chunks = SentenceChunker(max_tokens=50, overlap_tokens=5).split(nlp(text))
+    assert chunks == [(0, len(text))]
+
+def test_chunks_respect_budget_and_sentence_boundaries(nlp):
+    sentences = [f"Sentence number {i} talks about renewable fibres." for i in range(20)]
+    doc = nlp(" ".join(sentences))
+    chunker = SentenceChunker(max_tokens=24, overlap_tokens=8)
+
+    chunks = chunker.split(doc)
+    assert len(chunks) > 1
+    for start, end in chunks:
+        span = doc.char_span(start, end)
+        assert span is not None and len(span) <= 24
+        assert doc.text[start:end].endswith(".")
+
+    # Consecutive chunks overlap by whole sentences
+    assert chunks[1][0] < chunks[0][1]
+
+def test_every_sentence_is_covered(nlp):
+    doc = nlp(" ".join(f"Fact {i} is important." for i in range(30)))
+    chunks = SentenceChunker(max_tokens=20, overlap_tokens=0).split(doc)
+    joined = " ".join(doc.text[s:e] for s, e in chunks)
+    for i in range(30):
+        assert f"Fact {i} " in joined
+
+def test_long_sentence_is_windowed(nlp):
+    doc = nlp(" ".join(["word"] * 95) + ".")
+    chunks = SentenceChunker(max_tokens=30, overlap_tokens=0).split(doc)
+    assert len(chunks) >= 3  # the token alone needs three windows
+
+def test_budget_counts_embedder_word_pieces(nlp, wordpiece):
+    # Part numbers and URLs: few spaCy tokens, many word pieces
+    sentences = [f"See part XK{i}4471B9QZ and the valve https://example.com/spec/{i}." for i in range(12)]
+    doc = nlp(" ".join(sentences))
+
+    # Counting spaCy tokens lets chunks run past the model's limit
+    spacy_chunks = SentenceChunker(max_tokens=40, overlap_tokens=0).split(doc)
+    assert max(pieces(wordpiece, doc.text[s:e]) for s, e in spacy_chunks) > 40
+
+    chunks = SentenceChunker(max_tokens=40, overlap_tokens=10, tokenizer=wordpiece).split(doc)
+    for start, end in chunks:
+        assert pieces(wordpiece, doc.text[start:end]) <= 40
+    joined = " ".join(doc.text[s:e] for s, e in chunks)
+    for sentence in sentences:
+        assert sentence in joined
+
+def test_long_token_is_cut_at_word_pieces(nlp, wordpiece):
+    blob = "a1" * 45  # one spaCy token, 90 word pieces
+    doc = nlp(f"Checksum {blob} follows.")
+    chunks = SentenceChunker(max_tokens=32, overlap_tokens=0, tokenizer=wordpiece).split(doc)
+    assert len(chunks) >= 3  # the token alone needs three windows
+    assert all(pieces(wordpiece, doc.text[s:e]) <= 32 for s, e in chunks)
+    assert "".join(doc.text[s:e] for s, e in chunks).replace(" ", "") == doc.text.replace(" ", "")
+
+def test_tokenizer_limit_excludes_special_tokens(tmp_path, wordpiece):
+    wordpiece.save(str(tmp_path / TOKENIZER_FILE))
+    (tmp_path / EXPORT_INFO_FILE).write_text(json.dumps({"max_seq_length": 256}))
+    tokenizer, max_pieces = load_tokenizer("onnx", "all-MiniLM-L6-v2", str(tmp_path))
+    assert max_pieces == 254
+    # Truncation is off: over-long chunks are measured, not silently cut
+    assert pieces(tokenizer, "a " * 600) == 600
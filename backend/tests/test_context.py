@@ -0,0 +1,81 @@
+"""
+test_context.py
+---------------
+Tests for the token-budgeted RAG context assembler.
+"""
+
+import types
+import pytest
+import tiktoken
+from src.core import context
+from src.core.context import ContextAssembler, TokenCounter
+
+
+def unavailable_encoding(name):
+    raise OSError(f"{name} is not cached")
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    # Deterministic counts whether or not the encoding is cached here
+    monkeypatch.setattr(context, "tiktoken", types.SimpleNamespace(get_encoding=unavailable_encoding))
+
+def hit(text, filename="manual.pdf"):
+    return {"text": text, "metadata": {"filename": filename}}
+
+async def keyword_embed(texts):
+    # One dimension: does the sentence mention the valve?
+    return [[1.0, 0.0] if "valve" in t else [0.0, 1.0] for t in texts]
+
+QUERY = [1.0, 0.0]
+
+
+def test_approximate_counter_splits_long_words():
+    counter = TokenCounter("o200k_base")
+    assert counter.count("pump") == 1
+    assert counter.count("decommissioning, pump!") == 7
+
+def test_counter_loads_at_warm_up():
+    counter = TokenCounter("o200k_base")
+    # Without the encoding the budget is approximate
+    assert counter.load() is False
+    assert not counter.exact
+    assert counter.count("pump") == 1
+
+def test_exact_counts_with_the_encoding(monkeypatch):
+    monkeypatch.setattr(context, "tiktoken", tiktoken)
+    counter = TokenCounter("o200k_base")
+    if not counter.load():
+        pytest.skip("o200k_base is not cached here (the image fetches it at build time)")
+    assert counter.count("hello world") == 2
+    assert counter.count("Hello, world!") == 4
+    assert counter.count(" ".join(["hello"] * 100)) == 100
+
+@pytest.mark.asyncio
+async def test_overlapping_passages_are_deduplicated():
+    results = [
+        hit("Close the valve. Drain the line. Tag the pump."),
+        # Next chunk of the same document repeats the overlap sentences
+        hit("Drain the line.  Tag the pump. Restart after inspection."),
+        hit("Close the valve.", filename="copy.pdf"),
+    ]
+    assembled = await ContextAssembler(TokenCounter("o200k_base"), 1000).assemble(QUERY, results, keyword_embed)
+
+    assert assembled.text.count("Drain the line.") == 1
+    assert "copy.pdf" not in assembled.text
+    assert assembled.passages == 2 and assembled.trimmed == 0
+    assert assembled.tokens == TokenCounter("o200k_base").count(assembled.text)
+
+@pytest.mark.asyncio
+async def test_budget_keeps_sentences_most_similar_to_query():
+    filler = " ".join(f"Unrelated remark number {i}." for i in range(40))
+    results = [hit(filler + " Torque the valve bolts to 40 Nm. " + filler)]
+    assembled = await ContextAssembler(TokenCounter("o200k_base"), 30).assemble(QUERY, results, keyword_embed)
+
+    assert assembled.tokens <= 30
+    assert "Torque the valve bolts to 40 Nm." in assembled.text
+    assert assembled.trimmed == 1
+
+@pytest.mark.asyncio
+async def test_nothing_fits():
+    assembled = await ContextAssembler(TokenCounter("o200k_base"), 2).assemble(QUERY, [hit("A sentence.")], keyword_embed)
+    assert (assembled.text, assembled.tokens, assembled.passages) == ("", 0, 0)
@@ -0,0 +1,96 @@
+"""
+test_embedded_store.py
+----------------------
+Tests for the in-process NumPy vector backend.
+"""
+
+import numpy as np
+import pytest
+from datetime import datetime, timezone, timedelta
+from src.core import hashing
+from src.db.embedded_store import EmbeddedVectorDB
+from src.db.filters import SearchFilter
+
+
+def unit(i, dim=384):
+    vector = [0.0] * dim
+    vector[i] = 1.0
+    return vector
+
+def document(source_id, chunks, tags=("HR",)):
+    return {
+        "doc_id": hashing.document_id("", source_id),
+        "content_hash": hashing.content_hash(" ".join(chunks)),
+        "chunks": chunks,
+        "vectors": [unit(i) for i in range(len(chunks))],
+        "metadata": {
+            "owner": "QA",
+            "tags": list(tags),
+            "valid_until": datetime.now(timezone.utc) + timedelta(days=30)
+        }
+    }
+
+@pytest.mark.asyncio
+async def test_persists_across_reopen(tmp_path):
+    db = EmbeddedVectorDB(str(tmp_path))
+    doc = document("doc-a", ["first chunk", "second chunk"])
+    await db.upsert_documents([doc])
+    await db.close()
+
+    reopened = EmbeddedVectorDB(str(tmp_path))
+    results = await reopened.search(unit(1), limit=1)
+    assert results[0]["text"] == "second chunk"
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert (await reopened.lookup_documents([doc["doc_id"]]))[doc["doc_id"]]["chunk_count"] == 2
+    await reopened.close()
+
+@pytest.mark.asyncio
+async def test_replace_in_place_recycles_rows(tmp_path):
+    db = EmbeddedVectorDB(str(tmp_path))
+    await db.upsert_documents([document("doc-a", ["one", "two", "three"])])
+    await db.upsert_documents([document("doc-a", ["one"])])
+    assert [r["text"] for r in await db.search(unit(0), limit=5)] == ["one"]
+
+    # Rows freed by the stale chunks are reused instead of growing the matrix
+    capacity = db._capacity
+    await db.upsert_documents([document("doc-b", ["four", "five"])])
+    assert db._capacity == capacity
+    assert len(db._rows) == 3
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_touch_updates_filter_columns(tmp_path):
+    db = EmbeddedVectorDB(str(tmp_path))
+    doc = document("doc-a", ["governed chunk"], tags=["HR"])
+    await db.upsert_documents([doc])
+    await db.touch_documents([(doc["doc_id"], {"owner": "QA", "tags": ["Safety"]})])
+
+    assert await db.search(unit(0), query_filter=SearchFilter().tags(["HR"])) == []
+    hits = await db.search(unit(0), query_filter=SearchFilter().tags(["Safety"]), fields=["tags"])
+    assert hits[0]["metadata"] == {"tags": ["Safety"]}
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_int8_vectors_match_float32(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 384)).tolist()
+    query = rng.normal(size=384).tolist()
+    stores = [EmbeddedVectorDB(str(tmp_path / dtype), dtype=dtype) for dtype in ("float32", "int8")]
+    for store in stores:
+        await store.upsert_documents([{
+            **document("doc", [f"chunk {i}" for i in range(50)]),
+            "vectors": vectors
+        }])
+
+    exact, quantized = [await store.search(query, limit=5) for store in stores]
+    assert [h["score"] for h in quantized] == pytest.approx([h["score"] for h in exact], abs=0.01)
+    assert len({h["id"] for h in exact} & {h["id"] for h in quantized}) >= 4
+
+    stored = (await stores[1].get_vectors([exact[0]["id"]]))[exact[0]["id"]]
+    assert np.dot(stored, query) / np.linalg.norm(query) == pytest.approx(exact[0]["score"], abs=0.01)
+    for store in stores:
+        await store.close()
+
+def test_unknown_dtype():
+    with pytest.raises(RuntimeError):
+        EmbeddedVectorDB("unused", dtype="float16")
@@ -0,0 +1,53 @@
+"""
+test_embedder.py
+----------------
+Parity of the ONNX embedding backends with the reference PyTorch model.
+Exporting needs the all-MiniLM-L6-v2 weights and onnxruntime.
+"""
+
+import numpy as np
+import pytest
+from src.core.embedding_backends import MODEL_NAME, OnnxBackend, TorchBackend, build_backend
+
+SENTENCES = [
+    "UPM is a material solutions company, renewing products with renewable fibres.",
+    "The Kymi mill produces pulp and generates bioenergy.",
+    "Safety first: wear a helmet in the recovery boiler area.",
+    "What is the maintenance interval of the debarking drum?",
+    "Raflatac labels",
+    "A much longer passage about forestry certification, biodiversity programmes, "
+    "water use, carbon sinks and the responsible sourcing of wood from private forest owners. " * 3,
+]
+
+@pytest.fixture(scope="module")
+def reference():
+    return TorchBackend(MODEL_NAME)
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    pytest.importorskip("onnxruntime")
+    from src.core.onnx_export import export
+    return export(MODEL_NAME, str(tmp_path_factory.mktemp("onnx")))
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(RuntimeError, match="EMBED_BACKEND"):
+        build_backend("tensorrt", MODEL_NAME, "models")
+
+@pytest.mark.parametrize("quantized, min_cosine", [(False, 0.9999), (True, 0.98)])
+def test_onnx_backend_matches_reference(onnx_dir, reference, quantized, min_cosine):
+    backend = OnnxBackend(onnx_dir, quantized=quantized, threads=1)
+    expected = reference.encode(SENTENCES)
+    # Small batches: padding and length-sorted batching must not change results
+    actual = backend.encode(SENTENCES, batch_size=4)
+
+    assert actual.shape == expected.shape
+    assert np.allclose(np.linalg.norm(actual, axis=1), 1.0, atol=1e-5)
+    cosine = (actual * expected).sum(axis=1)
+    assert cosine.min() >= min_cosine
+
+def test_quantized_backend_preserves_ranking(onnx_dir, reference):
+    backend = OnnxBackend(onnx_dir, quantized=True)
+    query = "Which mill makes pulp and energy?"
+    expected = reference.encode(SENTENCES) @ reference.encode([query])[0]
+    actual = backend.encode(SENTENCES) @ backend.encode([query])[0]
+    assert np.argmax(actual) == np.argmax(expected)
@@ -0,0 +1,69 @@
+"""
+test_executor.py
+----------------
+Unit tests for the off-loop executor stages.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.core.executor import Stage, ExecutorSaturatedError
+
+@pytest.fixture
+def pool():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True)
+
+@pytest.mark.asyncio
+async def test_stage_runs_off_loop(pool):
+    stage = Stage("test", lambda: pool, concurrency=1, max_queue=1)
+    loop_thread = threading.get_ident()
+    worker_thread = await stage.run(threading.get_ident)
+    assert worker_thread != loop_thread
+    assert stage.pending == 0
+
+@pytest.mark.asyncio
+async def test_stage_limits_concurrency(pool):
+    stage = Stage("test", lambda: pool, concurrency=2, max_queue=10)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*[stage.run(work) for _ in range(6)])
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_stage_sheds_load_when_queue_full(pool):
+    stage = Stage("test", lambda: pool, concurrency=1, max_queue=1)
+    running = [asyncio.create_task(stage.run(time.sleep, 0.1)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await stage.run(time.sleep, 0)
+
+    await asyncio.gather(*running)
+
+@pytest.mark.asyncio
+async def test_stage_map_preserves_order_and_waits_for_room(pool):
+    stage = Stage("test", lambda: pool, concurrency=2, max_queue=0)
+
+    def double(batch):
+        time.sleep(0.01)
+        return [x * 2 for x in batch]
+
+    # Another caller holds a slot; map must wait rather than raise
+    blocker = asyncio.create_task(stage.run(time.sleep, 0.05))
+    await asyncio.sleep(0)
+    assert await stage.map(double, list(range(10)), batch_size=3) == [x * 2 for x in range(10)]
+    await blocker
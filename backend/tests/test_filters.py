@@ -0,0 +1,100 @@
+"""
+test_filters.py
+---------------
+Tests for the composable search filters, evaluated by every backend:
+Qdrant's in-memory mode and the embedded NumPy store (float32 and int8).
+"""
+
+import time
+import pytest
+import pytest_asyncio
+from datetime import datetime, timezone, timedelta
+from src.core import hashing
+from src.db.filters import SearchFilter
+from src.db.embedded_store import EmbeddedVectorDB
+from src.db.qdrant_store import QdrantVectorDB
+
+NOW = datetime.now(timezone.utc)
+
+DOCS = [
+    # (source_id, owner, tags, source_type, expires in days)
+    ("hr-policy", "hr@upm.com", ["HR", "Policy"], "file_pdf", 30),
+    ("hr-faq", "hr@upm.com", ["HR"], "text_json", 300),
+    ("safety", "ehs@upm.com", ["Safety", "Policy"], "text_json", 30),
+    ("expired", "hr@upm.com", ["HR", "Policy"], "text_json", -1),
+]
+
+
+def make_store(backend, directory):
+    if backend == "qdrant":
+        return QdrantVectorDB(location=":memory:")
+    return EmbeddedVectorDB(str(directory), dtype=backend.split("-")[1])
+
+@pytest_asyncio.fixture(params=["qdrant", "embedded-float32", "embedded-int8"])
+async def db(request, tmp_path):
+    store = make_store(request.param, tmp_path)
+    documents = []
+    for i, (source_id, owner, tags, source_type, days) in enumerate(DOCS):
+        vector = [0.0] * 384
+        vector[0], vector[i + 1] = 1.0, 0.1 * (i + 1)
+        documents.append({
+            "doc_id": hashing.document_id("", source_id),
+            "content_hash": source_id,
+            "chunks": [source_id],
+            "vectors": [vector],
+            "metadata": {
+                "owner": owner,
+                "tags": tags,
+                "source_type": source_type,
+                "valid_until": NOW + timedelta(days=days)
+            }
+        })
+    await store.upsert_documents(documents)
+    yield store
+    await store.close()
+
+async def found(db, query_filter, **kwargs):
+    query = [1.0] + [0.0] * 383
+    return [hit["text"] for hit in await db.search(query, limit=10, query_filter=query_filter, **kwargs)]
+
+@pytest.mark.asyncio
+async def test_lifecycle_filter_always_applies(db):
+    assert "expired" not in await found(db, SearchFilter())
+    assert "expired" not in await found(db, SearchFilter().tags(["HR"]))
+
+@pytest.mark.asyncio
+async def test_tags_any_and_all(db):
+    assert sorted(await found(db, SearchFilter().tags(["Safety", "HR"], match="any"))) == ["hr-faq", "hr-policy", "safety"]
+    assert sorted(await found(db, SearchFilter().tags(["HR", "Policy"], match="all"))) == ["hr-policy"]
+    with pytest.raises(ValueError):
+        SearchFilter().tags(["HR"], match="some")
+
+@pytest.mark.asyncio
+async def test_owner_source_type_and_expiry_window(db):
+    assert sorted(await found(db, SearchFilter().owner("hr@upm.com"))) == ["hr-faq", "hr-policy"]
+    assert await found(db, SearchFilter().owner("hr@upm.com").source_type("file_pdf")) == ["hr-policy"]
+    window = SearchFilter().expires_between(after=NOW + timedelta(days=100))
+    assert await found(db, window) == ["hr-faq"]
+
+def test_naive_datetimes_are_utc(monkeypatch):
+    naive = datetime(2030, 1, 1, 12, 0)
+    expected = int(naive.replace(tzinfo=timezone.utc).timestamp())
+    # The same request filters the same way whatever the host's timezone
+    try:
+        for tz in ("UTC", "America/New_York", "Asia/Tokyo"):
+            monkeypatch.setenv("TZ", tz)
+            time.tzset()
+            condition = SearchFilter().expires_between(after=naive, before=naive + timedelta(days=1)).must[0]
+            assert (condition.range.gte, condition.range.lt) == (expected, expected + 86400)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+@pytest.mark.asyncio
+async def test_offset_and_score_threshold(db):
+    everything = await found(db, SearchFilter())
+    assert await found(db, SearchFilter(), offset=1) == everything[1:]
+
+    query = [1.0] + [0.0] * 383
+    first, second = [h["score"] for h in await db.search(query, limit=2, query_filter=SearchFilter())]
+    assert await found(db, SearchFilter(), score_threshold=(first + second) / 2) == everything[:1]
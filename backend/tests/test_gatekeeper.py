@@ -46,4 +46,22 @@ def test_scorer_low_quality(scorer):
     # but the lack of structure usually lowers the score vs full sentences.
     # However, for this test, let's use pure noise.
     noise = "the a an and or but with on in at ... ,,, !!!"
-    assert scorer.calculate_score(noise) == 0.0
\ No newline at end of file
+    assert scorer.calculate_score(noise) == 0.0
+
+def test_shared_pipeline(scrubber, scorer):
+    # Both helpers reuse the one process-wide spaCy pipeline
+    assert scrubber.pipeline is scorer.pipeline
+
+def test_scrub_reuses_scored_doc(scrubber, scorer):
+    text = "Contact Anna-Leena Terhemaa at anna@upm.com about the Raflatac expansion plans."
+    doc = scorer.pipeline.analyze(text, scorer.components)
+    score = scorer.calculate_score(text, doc)
+    assert score == scorer.calculate_score(text)
+    assert scrubber.scrub(text, doc) == scrubber.scrub(text)
+
+def test_redact_range_matches_full_scrub(scrubber):
+    text = "Email anna@upm.com today. John Smith approved the budget."
+    spans = scrubber.find_spans(text)
+    split = text.index("John")
+    parts = scrubber.redact(text, spans, 0, split) + scrubber.redact(text, spans, split)
+    assert parts == scrubber.scrub(text)
@@ -0,0 +1,33 @@
+"""
+test_hashing.py
+---------------
+Unit tests for deterministic document and chunk identities.
+"""
+
+from src.core import hashing
+
+def test_content_hash_ignores_whitespace_layout():
+    a = "UPM Biofore\nstrategy   for 2030."
+    b = "  UPM Biofore strategy for 2030.\n"
+    assert hashing.content_hash(a) == hashing.content_hash(b)
+    assert hashing.content_hash(a) != hashing.content_hash("UPM Biofore strategy for 2031.")
+
+def test_document_id_prefers_source_id():
+    h1 = hashing.content_hash("version one")
+    h2 = hashing.content_hash("version two")
+    # Same source, new content -> same id (replace in place)
+    assert hashing.document_id(h1, "sp://sop-42") == hashing.document_id(h2, "sp://sop-42")
+    # No source -> content addressed
+    assert hashing.document_id(h1) != hashing.document_id(h2)
+    assert hashing.document_id(h1) == hashing.document_id(h1)
+
+def test_chunk_ids_survive_insertions():
+    doc_id = hashing.document_id(hashing.content_hash("x"), "sp://manual")
+    before = hashing.chunk_ids(doc_id, ["intro", "safety", "appendix"])
+    after = hashing.chunk_ids(doc_id, ["intro", "new section", "safety", "appendix"])
+    assert set(before) <= set(after)
+
+def test_repeated_chunks_get_distinct_ids():
+    doc_id = hashing.document_id(hashing.content_hash("y"))
+    ids = hashing.chunk_ids(doc_id, ["disclaimer", "body", "disclaimer"])
+    assert len(set(ids)) == 3
@@ -0,0 +1,73 @@
+"""
+test_ingestion.py
+-----------------
+Tests for the shared ingestion pipeline, with fake NLP and embedding stages
+and both vector backends.
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+from src.core import ingestion
+from src.db.embedded_store import EmbeddedVectorDB
+from src.db.qdrant_store import QdrantVectorDB
+
+
+def fake_analyze(texts, threshold, isolate_errors=False):
+    # One chunk per document, always accepted
+    return [
+        {"quality_score": 0.9, "accepted": True, "chunks": [text], "sparse": [None],
+         "cleaned_length": len(text), "pii_redacted": False, "pii_spans": 0, "timings": {}}
+        for text in texts
+    ]
+
+class FakeBatcher:
+    async def embed_many(self, texts):
+        return [[1.0] + [0.0] * 383 for _ in texts]
+
+@pytest.fixture(params=["embedded", "qdrant"])
+async def db(request, tmp_path, monkeypatch):
+    store = EmbeddedVectorDB(str(tmp_path)) if request.param == "embedded" else QdrantVectorDB(":memory:")
+    monkeypatch.setattr(ingestion, "vector_db", store)
+    monkeypatch.setattr(ingestion, "analyze_documents", fake_analyze)
+    monkeypatch.setattr(ingestion, "embedding_batcher", FakeBatcher())
+    yield store
+    await store.close()
+
+def metadata(owner="QA"):
+    return {"owner": owner, "tags": [], "valid_until": datetime.now(timezone.utc) + timedelta(days=30)}
+
+@pytest.mark.asyncio
+async def test_last_version_in_a_batch_wins(db):
+    records = [
+        ingestion.make_record("First version of the manual.", metadata(), "sp://manual"),
+        ingestion.make_record("Second version of the manual.", metadata(), "sp://manual"),
+        ingestion.make_record("Second version of the manual.", metadata(), "sp://manual"),
+    ]
+    results = await ingestion.ingest_records(records, threshold=0.1)
+
+    assert [r["status"] for r in results] == ["superseded", "duplicate", "ingested"]
+    doc_id = records[0]["doc_id"]
+    head = (await db.lookup_documents([doc_id]))[doc_id]
+    # The document survives, with the content of the last record
+    assert head["chunk_count"] == 1
+    assert head["content_hash"] == records[-1]["content_hash"]
+
+@pytest.mark.asyncio
+async def test_identical_upload_by_another_owner_keeps_metadata(db):
+    text = "Mill safety procedure for the debarking line."
+    first = ingestion.make_record(text, {**metadata("safety@upm.com"), "tags": ["SAFETY"]})
+    assert (await ingestion.ingest_records([first], threshold=0.1))[0]["status"] == "ingested"
+
+    # Same owner: governance metadata is refreshed
+    again = ingestion.make_record(text, {**metadata("safety@upm.com"), "tags": ["SAFETY", "2024"]})
+    assert (await ingestion.ingest_records([again], threshold=0.1))[0]["status"] == "unchanged"
+
+    # Another owner: reported as a duplicate, the stored document is untouched
+    other = ingestion.make_record(text, {**metadata("intruder@example.com"), "tags": ["PUBLIC"]})
+    result = (await ingestion.ingest_records([other], threshold=0.1))[0]
+    assert result["status"] == "duplicate" and "another owner" in result["reason"]
+
+    doc_id = first["doc_id"]
+    assert (await db.lookup_documents([doc_id]))[doc_id]["owner"] == "safety@upm.com"
+    hits = await db.search([1.0] + [0.0] * 383, limit=1, fields=["owner", "tags"])
+    assert (hits[0]["metadata"]["owner"], hits[0]["metadata"]["tags"]) == ("safety@upm.com", ["SAFETY", "2024"])
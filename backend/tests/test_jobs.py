@@ -0,0 +1,208 @@
+"""
+test_jobs.py
+------------
+Tests for the SQLite-backed background job queue.
+"""
+
+import asyncio
+import io
+import os
+import time
+import pytest
+from src.core.jobs import JobQueue
+
+
+def make_queue(tmp_path, **overrides):
+    options = dict(workers=2, max_attempts=3, retry_backoff=0.01, lease_seconds=60, poll_interval=0.05)
+    return JobQueue(str(tmp_path), **{**options, **overrides})
+
+async def wait_for(queue, job_id, statuses=("completed", "failed"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Job stuck in '{job['status']}'")
+
+@pytest.mark.asyncio
+async def test_job_reports_stages_and_result(tmp_path):
+    queue = make_queue(tmp_path)
+
+    async def handler(job):
+        with open(job.spool_path, "rb") as f:
+            content = f.read()
+        async with job.stage("read"):
+            await asyncio.sleep(0.01)
+        async with job.stage("count"):
+            pass
+        return {"bytes": len(content), "owner": job.params["owner"]}
+
+    queue.register("count", handler, stages=["read", "count"])
+    job_id = await queue.submit("count", {"owner": "QA"}, upload=io.BytesIO(b"x" * 1000))
+    job = await wait_for(queue, job_id)
+
+    assert job["status"] == "completed" and job["progress"] == 1.0
+    assert job["result"] == {"bytes": 1000, "owner": "QA"}
+    assert list(job["stages"]) == ["read", "count"]
+    assert job["stages"]["read"]["seconds"] >= 0.01
+    # Spooled upload is removed once the job is done
+    assert os.listdir(queue.spool_dir) == []
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_failed_attempts_are_retried(tmp_path):
+    queue = make_queue(tmp_path)
+    calls = []
+
+    async def flaky(job):
+        calls.append(job.attempts)
+        async with job.stage("work"):
+            if len(calls) < 3:
+                raise RuntimeError("vector store unavailable")
+        return {"ok": True}
+
+    queue.register("flaky", flaky, stages=["work"])
+    job = await wait_for(queue, await queue.submit("flaky", {}))
+    assert job["status"] == "completed" and job["attempts"] == 3 and calls == [1, 2, 3]
+    assert job["error"] is None
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_job_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+
+    async def broken(job):
+        async with job.stage("parse"):
+            raise ValueError("not a PDF")
+
+    queue.register("broken", broken, stages=["parse", "store"])
+    job = await wait_for(queue, await queue.submit("broken", {}, upload=io.BytesIO(b"junk")))
+    assert job["status"] == "failed" and job["attempts"] == 2
+    assert job["error"] == "not a PDF"
+    assert job["stages"]["parse"]["status"] == "failed" and job["stages"]["store"]["status"] == "pending"
+    assert os.listdir(queue.spool_dir) == []
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(tmp_path):
+    # A worker that died mid-job (simulated by a queue that never finishes it)
+    crashed = make_queue(tmp_path, lease_seconds=0.2)
+    started = asyncio.Event()
+
+    async def hang(job):
+        started.set()
+        await asyncio.sleep(3600)
+
+    crashed.register("work", hang, stages=["work"])
+    job_id = await crashed.submit("work", {})
+    await asyncio.wait_for(started.wait(), 5)
+    await crashed.stop()
+
+    survivor = make_queue(tmp_path)
+
+    async def finish(job):
+        return {"attempt": job.attempts}
+
+    survivor.register("work", finish, stages=["work"])
+    survivor.start()
+    job = await wait_for(survivor, job_id)
+    assert job["result"] == {"attempt": 2}
+    await survivor.stop()
+
+@pytest.mark.asyncio
+async def test_lost_job_without_attempts_left_is_failed(tmp_path):
+    crashed = make_queue(tmp_path, max_attempts=1, lease_seconds=0.2)
+    started = asyncio.Event()
+
+    async def hang(job):
+        started.set()
+        await asyncio.sleep(3600)
+
+    crashed.register("work", hang, stages=["work"])
+    job_id = await crashed.submit("work", {}, upload=io.BytesIO(b"poison"))
+    await asyncio.wait_for(started.wait(), 5)
+    await crashed.stop()
+
+    survivor = make_queue(tmp_path, max_attempts=1)
+    calls = []
+
+    async def finish(job):
+        calls.append(job.attempts)
+        return {}
+
+    survivor.register("work", finish, stages=["work"])
+    survivor.start()
+    job = await wait_for(survivor, job_id)
+    assert job["status"] == "failed" and job["attempts"] == 1 and calls == []
+    assert os.listdir(survivor.spool_dir) == []
+    await survivor.stop()
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_long_stage_leased(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.3)
+    calls = []
+
+    async def slow(job):
+        calls.append(job.attempts)
+        async with job.stage("work"):
+            # Outlasts the lease several times over
+            await asyncio.sleep(1.0)
+        return {}
+
+    queue.register("slow", slow, stages=["work"])
+    job = await wait_for(queue, await queue.submit("slow", {}))
+    assert job["status"] == "completed" and job["attempts"] == 1 and calls == [1]
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_stalled_worker_abandons_reclaimed_job(tmp_path):
+    stalled = make_queue(tmp_path, workers=1, lease_seconds=0.2)
+    started, resume = asyncio.Event(), asyncio.Event()
+
+    async def no_heartbeat(job):
+        pass  # The worker stalls: its lease is not renewed
+
+    async def late(job):
+        started.set()
+        await resume.wait()
+        async with job.stage("work"):
+            pass
+        return {"worker": "stalled"}
+
+    stalled._heartbeat = no_heartbeat
+    stalled.register("work", late, stages=["work"])
+    job_id = await stalled.submit("work", {}, upload=io.BytesIO(b"data"))
+    await asyncio.wait_for(started.wait(), 5)
+    await asyncio.sleep(0.3)
+
+    other = make_queue(tmp_path)
+    seen = []
+
+    async def finish(job):
+        seen.append(os.path.exists(job.spool_path))
+        async with job.stage("work"):
+            pass
+        return {"worker": "other"}
+
+    other.register("work", finish, stages=["work"])
+    other.start()
+    reclaimed = await wait_for(other, job_id)
+    assert reclaimed["result"] == {"worker": "other"} and reclaimed["attempts"] == 2 and seen == [True]
+
+    # The stalled worker wakes up: its writes no longer match its claim
+    resume.set()
+    await asyncio.sleep(0.2)
+    job = await stalled.get(job_id)
+    assert job["status"] == "completed" and job["result"] == {"worker": "other"}
+    assert job["finished_at"] == reclaimed["finished_at"]
+    await stalled.stop()
+    await other.stop()
+
+@pytest.mark.asyncio
+async def test_unknown_job(tmp_path):
+    queue = make_queue(tmp_path)
+    assert await queue.get("missing") is None
+    with pytest.raises(RuntimeError):
+        await queue.submit("nope", {})
+    await queue.stop()
@@ -0,0 +1,96 @@
+"""
+test_lifecycle.py
+-----------------
+Tests for the expired-content sweeper against both vector backends.
+"""
+
+import fcntl
+import gzip
+import json
+import time
+import pytest
+from datetime import datetime, timezone, timedelta
+from src.core import hashing
+from src.core.lifecycle import LifecycleSweeper, SweepInProgressError
+from src.db.embedded_store import EmbeddedVectorDB
+from src.db.qdrant_store import QdrantVectorDB
+
+DAY = 86400
+
+
+def unit(i, dim=384):
+    vector = [0.0] * dim
+    vector[i] = 1.0
+    return vector
+
+def document(source_id, chunks, days):
+    return {
+        "doc_id": hashing.document_id("", source_id),
+        "content_hash": hashing.content_hash(" ".join(chunks)),
+        "chunks": chunks,
+        "vectors": [unit(i) for i in range(len(chunks))],
+        "metadata": {"owner": "QA", "valid_until": datetime.now(timezone.utc) + timedelta(days=days)}
+    }
+
+@pytest.fixture(params=["embedded", "qdrant"])
+async def db(request, tmp_path):
+    store = EmbeddedVectorDB(str(tmp_path / "store")) if request.param == "embedded" else QdrantVectorDB(":memory:")
+    await store.upsert_documents([
+        document("long-expired", ["old one", "old two", "old three"], days=-10),
+        document("just-expired", ["recent"], days=-0.5),
+        document("current", ["live one", "live two"], days=30),
+    ])
+    yield store
+    await store.close()
+
+@pytest.mark.asyncio
+async def test_dry_run_only_counts(db, tmp_path):
+    sweeper = LifecycleSweeper(db, grace_seconds=DAY, batch_size=2, archive_dir=str(tmp_path / "archive"), interval=0)
+    report = await sweeper.sweep(dry_run=True)
+    assert (report["points"], report["documents"]) == (3, 1)
+    # Nothing deleted, nothing archived
+    assert (await db.count_expired(int(time.time())))["points"] == 4
+    assert not (tmp_path / "archive").exists()
+    assert sweeper.last_sweep is None
+
+@pytest.mark.asyncio
+async def test_sweep_honours_grace_period_and_archives(db, tmp_path):
+    sweeper = LifecycleSweeper(db, grace_seconds=DAY, batch_size=2, archive_dir=str(tmp_path / "archive"), interval=0)
+    report = await sweeper.sweep()
+    assert (report["points"], report["documents"]) == (3, 1)
+    assert sweeper.last_sweep["points"] == 3
+
+    # Points still inside the grace period survive, and so does current content
+    remaining = await db.count_expired(int(time.time()))
+    assert (remaining["points"], remaining["documents"]) == (1, 1)
+    current = hashing.document_id("", "current")
+    assert (await db.lookup_documents([current]))[current]["chunk_count"] == 2
+    assert [r["text"] for r in await db.search(unit(1), limit=1)] == ["live two"]
+
+    # Batches are appended to one gzip archive that reads back as JSON lines
+    with gzip.open(report["archive"], "rt", encoding="utf-8") as f:
+        archived = [json.loads(line) for line in f]
+    assert sorted(a["payload"]["text"] for a in archived) == ["old one", "old three", "old two"]
+    assert {a["payload"]["doc_id"] for a in archived} == {hashing.document_id("", "long-expired")}
+
+    # A second sweep has nothing left to do
+    assert (await sweeper.sweep())["points"] == 0
+
+@pytest.mark.asyncio
+async def test_sweep_without_archive(db):
+    sweeper = LifecycleSweeper(db, grace_seconds=0, batch_size=256, archive_dir="", interval=0)
+    report = await sweeper.sweep()
+    assert (report["points"], report["documents"], report["archive"]) == (4, 2, None)
+    assert (await db.count_expired(int(time.time())))["points"] == 0
+
+@pytest.mark.asyncio
+async def test_one_sweep_per_node(db, tmp_path):
+    lock_path = str(tmp_path / "lifecycle.lock")
+    sweeper = LifecycleSweeper(db, grace_seconds=0, batch_size=256, archive_dir="", interval=0, lock_path=lock_path)
+    # Another process holds the node's sweep lock
+    with open(lock_path, "w") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        with pytest.raises(SweepInProgressError):
+            await sweeper.sweep()
+        assert (await sweeper.sweep(dry_run=True))["points"] == 4
+    assert (await sweeper.sweep())["points"] == 4
@@ -4,10 +4,14 @@ test_main.py
 Comprehensive Integration Tests for Axiom Backend.
 """
 
+import json
 import pytest
 import pytest_asyncio
+from types import SimpleNamespace
 from httpx import AsyncClient, ASGITransport
+from src.config import settings
 from src.main import app
+from src.api import routes
 from src.core.security import PIIScrubber
 from src.core.scorer import ContentScorer
 
@@ -25,6 +29,35 @@ async def client():
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
 
+class FakeOpenAI:
+    """
+    Local stand-in for an OpenAI-compatible streaming chat endpoint.
+    Records how often the upstream stream was closed.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.closed = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        assert kwargs.get("stream") is True
+        return self
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+    async def close(self):
+        self.closed += 1
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
 # ------------------------------------------------------------------------------
 # Integration Tests (API Endpoints)
 # ------------------------------------------------------------------------------
@@ -48,7 +81,8 @@ async def test_ingest_text_valid(client):
     
     assert response.status_code == 200
     data = response.json()
-    assert data["status"] == "ingested"
+    # Re-running against a populated store finds the same content unchanged
+    assert data["status"] in ("ingested", "unchanged")
     assert "id" in data
     assert data["quality_score"] >= 0.1 
 
@@ -73,6 +107,134 @@ async def test_ingest_text_governance_rejection(client):
     assert response.status_code == 400
     assert "Document rejected" in response.json()["detail"]
 
+@pytest.mark.asyncio
+async def test_ingest_bulk_ndjson(client):
+    """Test Bulk Path: one streamed result line per NDJSON record."""
+    records = [
+        {"text": "UPM Raflatac produces self-adhesive label materials for renewable packaging solutions.", "owner": "bulk@upm.com", "tags": ["bulk"]},
+        {"text": "the a an and or but if with at from ... ,,, ;;; ... ... ... ... ... ...", "owner": "spambot"},
+    ]
+    body = "\n".join(json.dumps(r) for r in records) + "\n{not json}\n"
+
+    response = await client.post("/api/v1/ingest/bulk", content=body)
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2, 3]
+    assert results[0]["status"] in ("ingested", "unchanged") and "id" in results[0]
+    assert results[1]["status"] == "rejected"
+    assert results[2]["status"] == "error"
+
+@pytest.mark.asyncio
+async def test_ingest_bulk_isolates_record_failures(client, monkeypatch):
+    """Test Bulk Path: a record whose analysis raises gets its own error line."""
+    from src.core import tasks
+    analyze = tasks.analyze_document
+
+    def flaky(text, threshold):
+        if "explode" in text:
+            raise ValueError("parser exploded")
+        return analyze(text, threshold)
+
+    # conftest runs the CPU stages on threads, so the patch reaches the worker
+    monkeypatch.setattr(tasks, "analyze_document", flaky)
+    records = [
+        {"text": "Please explode while analyzing this perfectly reasonable record about pulp.", "owner": "bulk@upm.com"},
+        {"text": "UPM Raflatac produces self-adhesive label materials for renewable packaging solutions.", "owner": "bulk@upm.com"},
+    ]
+    # Streamed in small pieces, split mid-line
+    body = ("\n".join(json.dumps(r) for r in records) + "\n").encode()
+    async def pieces():
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    response = await client.post("/api/v1/ingest/bulk", content=pieces())
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2]
+    assert results[0]["status"] == "error" and "parser exploded" in results[0]["reason"]
+    assert results[1]["status"] in ("ingested", "unchanged")
+
+@pytest.mark.asyncio
+async def test_chat_stream_sse(client, monkeypatch):
+    """Test Streaming Path: context first, then tokens, then done."""
+    await client.post("/api/v1/ingest", json={
+        "text": "UPM Biofore is leading the forest-based bioindustry into a sustainable, innovation-driven future.",
+        "owner": "test_user@upm.com",
+    })
+    fake = FakeOpenAI(["Biofore ", "is ", "UPM's strategy."])
+    monkeypatch.setattr(routes, "openai_client", fake)
+
+    response = await client.post("/api/v1/chat/stream", json={"query": "What is the Biofore streaming test?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0][0] == "context" and events[0][1]["context"]
+    assert events[-1][0] == "done"
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    assert tokens == "Biofore is UPM's strategy."
+    assert fake.closed == 1
+
+class FakeBatcher:
+    async def embed(self, text):
+        return [1.0] + [0.0] * 383
+
+    async def embed_many(self, texts):
+        return [await self.embed(t) for t in texts]
+
+@pytest.fixture
+def retrieval(monkeypatch):
+    """Retrieval without models: fixed query vector, one search hit, empty answer cache."""
+    hit = {"id": "p1", "score": 0.9, "text": "Biofore is UPM's strategy.", "doc_id": "d1", "chunk_index": 0, "metadata": {}}
+
+    async def search(**kwargs):
+        return [hit]
+
+    async def no_answer(*args):
+        return None
+
+    monkeypatch.setattr(routes, "embedding_batcher", FakeBatcher())
+    monkeypatch.setattr(routes.vector_db, "search", search)
+    monkeypatch.setattr(routes.answer_cache, "get", no_answer)
+
+@pytest.mark.asyncio
+async def test_chat_stream_disconnect_closes_upstream(monkeypatch, retrieval):
+    """Test Streaming Path: a client disconnect aborts the upstream completion."""
+    fake = FakeOpenAI(["one ", "two ", "three"])
+    monkeypatch.setattr(routes, "openai_client", fake)
+
+    events = routes._stream_answer(routes.ChatRequest(query="Biofore?"))
+    assert (await events.__anext__()).startswith(b"event: context")
+    assert (await events.__anext__()).startswith(b"event: token")
+    # What Starlette does when the client goes away mid-stream
+    await events.aclose()
+    assert fake.closed == 1
+
+@pytest.mark.asyncio
+async def test_chat_stream_early_failure_is_an_event(client, monkeypatch, retrieval):
+    """Test Streaming Path: a failure before the first event still ends with an SSE error."""
+    async def unavailable(**kwargs):
+        raise ConnectionError("vector store unavailable")
+
+    monkeypatch.setattr(routes.vector_db, "search", unavailable)
+    response = await client.post("/api/v1/chat/stream", json={"query": "Biofore?"})
+
+    assert response.status_code == 200
+    events = parse_sse(response.text)
+    assert events == [("error", {"detail": "Error generating response: vector store unavailable"})]
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_need_a_token(client, monkeypatch):
+    """Test Admin Gate: disabled by default, then only with the configured token."""
+    assert (await client.get("/api/v1/admin/profiler")).status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert (await client.get("/api/v1/admin/profiler")).status_code == 401
+    assert (await client.get("/api/v1/admin/profiler", headers={"X-Admin-Token": "wrong"})).status_code == 401
+    response = await client.get("/api/v1/admin/profiler", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and response.json()["running"] is False
+
 # ------------------------------------------------------------------------------
 # Unit Tests (Core Logic)
 # ------------------------------------------------------------------------------
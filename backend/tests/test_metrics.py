@@ -0,0 +1,117 @@
+"""
+test_metrics.py
+---------------
+Unit tests for the metrics registry, stage timing and the request metrics middleware.
+"""
+
+import asyncio
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from src.api.middleware import MetricsMiddleware
+from src.core import metrics
+from src.core.metrics import MetricsRegistry, Stopwatch
+
+def test_counter_and_gauge_rendering():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests.", ["route"])
+    in_flight = registry.gauge("test_in_flight", "In flight.")
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"')
+    with in_flight.track():
+        assert in_flight.samples() == [("", (), 1.0)]
+
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a"} 1\n' in text
+    # Label values are escaped
+    assert 'test_requests_total{route="/b\\""} 2\n' in text
+    # Unlabelled metrics are exported before their first update
+    assert "test_in_flight 0\n" in text
+
+    with pytest.raises(ValueError):
+        requests.inc(-1, route="/a")
+    with pytest.raises(ValueError):
+        requests.inc(method="GET")
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="embed")
+
+    text = registry.render()
+    assert 'test_seconds_bucket{stage="embed",le="0.1"} 2\n' in text
+    assert 'test_seconds_bucket{stage="embed",le="1"} 3\n' in text
+    assert 'test_seconds_bucket{stage="embed",le="+Inf"} 4\n' in text
+    assert 'test_seconds_sum{stage="embed"} 3.65\n' in text
+    assert 'test_seconds_count{stage="embed"} 4\n' in text
+
+def test_callback_metrics_read_at_scrape_time():
+    registry = MetricsRegistry()
+    stats = {"hits": 1}
+    registry.callback("test_hits_total", "Hits.", lambda: stats["hits"], kind="counter")
+    registry.callback("test_broken", "Fails.", lambda: 1 / 0)
+    stats["hits"] = 5
+    text = registry.render()
+    assert "test_hits_total 5\n" in text
+    # A failing callback does not fail the scrape
+    assert "test_broken" not in text
+    with pytest.raises(ValueError):
+        registry.gauge("test_hits_total", "Duplicate.")
+
+def test_stopwatch_accumulates_laps():
+    clock = Stopwatch()
+    clock.lap("score")
+    clock.lap("scrub")
+    clock.lap("score")
+    assert set(clock.timings) == {"score", "scrub"}
+    assert all(seconds >= 0 for seconds in clock.timings.values())
+
+@pytest.mark.asyncio
+async def test_stage_records_histogram_and_request_timings():
+    def count():
+        samples = metrics.STAGE_SECONDS.samples()
+        return next((v for s, k, v in samples if s == "_count" and k == ("test_stage",)), 0)
+
+    before = count()
+    timings = metrics.start_request_timings()
+    with metrics.stage("test_stage"):
+        assert ("", ("test_stage",), 1.0) in metrics.STAGE_IN_FLIGHT.samples()
+        await asyncio.sleep(0.01)
+    metrics.record_stages({"test_stage": 0.5})
+
+    assert count() == before + 2
+    assert timings["test_stage"] >= 0.51
+    assert ("", ("test_stage",), 0.0) in metrics.STAGE_IN_FLIGHT.samples()
+
+def make_app(timing_headers):
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def item(item_id: str):
+        with metrics.stage("test_lookup"):
+            await asyncio.sleep(0)
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, timing_headers=timing_headers)
+    app.include_router(router, prefix="/api")
+    return app
+
+def test_middleware_labels_route_templates():
+    with TestClient(make_app(timing_headers=False)) as client:
+        response = client.get("/api/items/42")
+        assert "server-timing" not in response.headers
+        client.get("/missing")
+
+    requests = {key: value for _, key, value in metrics.HTTP_REQUESTS.samples()}
+    # The path parameter is not a label value: one series per route
+    assert requests[("GET", "/api/items/{item_id}", "200")] >= 1
+    assert requests[("GET", "unmatched", "404")] >= 1
+
+def test_middleware_server_timing_header():
+    with TestClient(make_app(timing_headers=True)) as client:
+        header = client.get("/api/items/1").headers["server-timing"]
+    names = [entry.split(";")[0] for entry in header.split(", ")]
+    assert names == ["test_lookup", "total"]
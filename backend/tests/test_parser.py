@@ -0,0 +1,106 @@
+"""
+test_parser.py
+--------------
+Tests for page-parallel PDF extraction.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from pypdf import PageObject
+from src.core import parser
+from src.core.executor import Stage
+
+
+def write_pdf(path, pages):
+    """
+    Minimal PDF with one line of Helvetica text per page.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+    return str(path)
+
+@pytest.fixture
+def thread_stage(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(parser, "executors", SimpleNamespace(parse=Stage("parse", lambda: pool, 2, 4)))
+    monkeypatch.setattr(parser.settings, "PDF_PAGES_PER_TASK", 3)
+    yield
+    pool.shutdown()
+
+
+def test_extract_page_range(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(5)])
+    assert parser.count_pdf_pages(path) == 5
+    assert parser.extract_pdf_pages(path, 1, 3, page_timeout=5) == ["Page 1", "Page 2"]
+    assert parser._local.pdf is not None
+
+def test_last_range_releases_reader(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(5)])
+    assert parser.extract_pdf_pages(path, 3, 6, page_timeout=5) == ["Page 3", "Page 4"]
+    assert parser._local.pdf is None
+
+def test_slow_page_is_skipped(tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "doc.pdf", ["Fast", "Slow"])
+    original = PageObject.extract_text
+
+    def extract_text(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        if text == "Slow":
+            time.sleep(5)
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+    started = time.monotonic()
+    assert parser.extract_pdf_pages(path, 0, 2, page_timeout=0.2) == ["Fast", None]
+    assert time.monotonic() - started < 2
+
+@pytest.mark.asyncio
+async def test_pages_are_yielded_in_order(tmp_path, thread_stage):
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(10)])
+    pages = [text async for text in parser.iter_pdf_pages(path)]
+    assert pages == [f"Page {i}" for i in range(10)]
+    assert await parser.read_pdf(path) == ("\n".join(pages), 0)
+
+@pytest.mark.asyncio
+async def test_failed_pages_are_counted(tmp_path, thread_stage, monkeypatch):
+    path = write_pdf(tmp_path / "doc.pdf", ["Good", "Broken", "Fine"])
+    original = PageObject.extract_text
+
+    def extract_text(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        if text == "Broken":
+            raise ValueError("bad content stream")
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+    assert await parser.read_pdf(path) == ("Good\nFine", 1)
+
+@pytest.mark.asyncio
+async def test_early_stop_cancels_pending_ranges(tmp_path, thread_stage):
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(30)])
+    pages = parser.iter_pdf_pages(path)
+    assert await pages.__anext__() == "Page 0"
+    await pages.aclose()
+    assert parser.executors.parse.pending <= 2
@@ -0,0 +1,45 @@
+"""
+test_profiler.py
+----------------
+Unit tests for the runtime-toggled sampling profiler.
+"""
+
+import threading
+import time
+import pytest
+from src.core.profiler import SamplingProfiler
+
+def busy_wait(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_contains_sampled_stacks():
+    profiler = SamplingProfiler(interval_ms=1, max_seconds=10)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_wait, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        profiler.start()
+        assert profiler.running
+        with pytest.raises(RuntimeError, match="already running"):
+            profiler.start()
+        time.sleep(0.1)
+        folded = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not profiler.running
+    assert profiler.status()["samples"] > 0
+    lines = [line.rsplit(" ", 1) for line in folded.splitlines()]
+    busy = [int(count) for stack, count in lines if stack.startswith("busy_worker;") and "busy_wait" in stack]
+    assert sum(busy) > 0
+
+def test_profile_stops_after_its_duration():
+    profiler = SamplingProfiler(interval_ms=1, max_seconds=10)
+    profiler.start(seconds=0.05)
+    time.sleep(0.3)
+    assert not profiler.running
+    assert profiler.status()["stopped_at"] is not None
+    # Stopping an expired profile still returns it
+    assert profiler.stop() == profiler.folded()
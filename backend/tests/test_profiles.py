@@ -0,0 +1,59 @@
+"""
+test_profiles.py
+----------------
+Tests for the Settings-driven collection profiles and the migration diff.
+"""
+
+import pytest
+from qdrant_client.http import models
+from src.config import settings
+from src.db import profiles
+
+
+def collection_config(on_disk=False, m=16, ef_construct=100, quantization=None, size=384):
+    return models.CollectionConfig(
+        params=models.CollectionParams(
+            vectors=models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=on_disk)
+        ),
+        hnsw_config=models.HnswConfig(m=m, ef_construct=ef_construct, full_scan_threshold=10000),
+        optimizer_config=models.OptimizersConfig(
+            deleted_threshold=0.2, vacuum_min_vector_number=1000, default_segment_number=0,
+            indexing_threshold=20000, flush_interval_sec=5
+        ),
+        wal_config=models.WalConfig(wal_capacity_mb=32, wal_segments_ahead=0),
+        quantization_config=quantization
+    )
+
+def test_default_profile_matches_plain_collection():
+    assert profiles.quantization_config() is None
+    assert profiles.search_params().quantization is None
+    assert profiles.profile_diff(collection_config()) == {}
+
+def test_scalar_profile_with_on_disk_originals(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_QUANTIZATION", "scalar")
+    monkeypatch.setattr(settings, "QDRANT_ON_DISK_VECTORS", True)
+
+    assert profiles.quantization_config().scalar.type == models.ScalarType.INT8
+    assert profiles.vectors_config().on_disk is True
+    assert profiles.search_params().quantization.rescore is True
+
+    changes = profiles.profile_diff(collection_config())
+    assert set(changes) == {"vectors_config", "quantization_config"}
+    assert changes["vectors_config"][""].on_disk is True
+
+def test_migration_disables_quantization_and_retunes_hnsw(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_HNSW_M", 32)
+    binary = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+
+    changes = profiles.profile_diff(collection_config(quantization=binary))
+    assert changes["quantization_config"] == models.Disabled.DISABLED
+    assert changes["hnsw_config"].m == 32
+
+def test_dimension_mismatch_is_not_migratable():
+    with pytest.raises(RuntimeError):
+        profiles.profile_diff(collection_config(size=768))
+
+def test_unknown_quantization_mode(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_QUANTIZATION", "product")
+    with pytest.raises(RuntimeError):
+        profiles.quantization_config()
@@ -0,0 +1,100 @@
+"""
+test_qdrant_store.py
+--------------------
+Tests for the async Qdrant backend against Qdrant's embedded in-memory mode.
+"""
+
+import httpx
+import pytest
+from datetime import datetime, timezone, timedelta
+from src.config import settings
+from src.core import hashing
+from src.db.qdrant_store import QdrantVectorDB, is_transient
+
+
+def unit(i, dim=384):
+    vector = [0.0] * dim
+    vector[i] = 1.0
+    return vector
+
+def document(doc_id, chunks, days=30):
+    return {
+        "doc_id": doc_id,
+        "content_hash": hashing.content_hash(" ".join(chunks)),
+        "chunks": chunks,
+        "vectors": [unit(i) for i in range(len(chunks))],
+        "metadata": {"owner": "QA", "valid_until": datetime.now(timezone.utc) + timedelta(days=days)}
+    }
+
+@pytest.mark.asyncio
+async def test_upsert_and_search_in_memory():
+    db = QdrantVectorDB(location=":memory:")
+    doc_id = hashing.document_id("a", "doc-a")
+    await db.upsert_documents([document(doc_id, ["first chunk", "second chunk"])])
+
+    results = await db.search(unit(1), limit=1)
+    assert results[0]["text"] == "second chunk"
+    assert results[0]["doc_id"] == doc_id
+    assert (await db.lookup_documents([doc_id]))[doc_id]["chunk_count"] == 2
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_search_hides_expired_documents():
+    db = QdrantVectorDB(location=":memory:")
+    await db.upsert_documents([document(hashing.document_id("x", "old"), ["expired chunk"], days=-1)])
+
+    assert await db.search(unit(0), limit=5) == []
+
+@pytest.mark.asyncio
+async def test_replace_in_place_removes_stale_chunks():
+    db = QdrantVectorDB(location=":memory:")
+    doc_id = hashing.document_id("a", "doc-a")
+    await db.upsert_documents([document(doc_id, ["one", "two", "three"])])
+    await db.upsert_documents([document(doc_id, ["one"])])
+
+    results = await db.search(unit(0), limit=5)
+    assert [r["text"] for r in results] == ["one"]
+
+@pytest.mark.asyncio
+async def test_search_projects_metadata():
+    db = QdrantVectorDB(location=":memory:")
+    doc = document(hashing.document_id("a", "doc-a"), ["projected chunk"])
+    doc["metadata"]["filename"] = "policy.pdf"
+    await db.upsert_documents([doc])
+
+    full = (await db.search(unit(0), limit=1))[0]
+    assert "text" not in full["metadata"]
+    assert full["metadata"]["owner"] == "QA"
+
+    slim = (await db.search(unit(0), limit=1, fields=["filename"]))[0]
+    assert slim["text"] == "projected chunk"
+    assert slim["metadata"] == {"filename": "policy.pdf"}
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_RETRY_BACKOFF", 0.0)
+    db = QdrantVectorDB(location=":memory:")
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection refused")
+        return "ok"
+
+    assert await db._call(flaky) == "ok"
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_permanent_failures_are_not_retried():
+    db = QdrantVectorDB(location=":memory:")
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await db._call(broken)
+    assert len(calls) == 1
+    assert not is_transient(ValueError())
@@ -0,0 +1,80 @@
+"""
+test_readiness.py
+-----------------
+Unit tests for the background warm-up and readiness reporting.
+"""
+
+import asyncio
+import pytest
+from src.core.readiness import Readiness, READY, FAILED, PENDING
+
+@pytest.mark.asyncio
+async def test_components_load_in_background():
+    readiness = Readiness(retry_max_seconds=1)
+    loaded = asyncio.Event()
+
+    async def slow_model():
+        await loaded.wait()
+
+    readiness.register("model", slow_model)
+    assert not readiness.ready
+    assert readiness.report()["components"]["model"]["state"] == PENDING
+
+    readiness.start()
+    await asyncio.sleep(0)
+    assert readiness.report()["status"] == "starting"
+
+    loaded.set()
+    await asyncio.sleep(0.01)
+    assert readiness.ready
+    report = readiness.report()
+    assert report["status"] == "ready"
+    assert report["components"]["model"]["seconds"] is not None
+    await readiness.stop()
+
+@pytest.mark.asyncio
+async def test_failed_component_is_retried():
+    readiness = Readiness(retry_max_seconds=0)
+    calls = []
+
+    async def flaky_store():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("Qdrant is not up yet")
+
+    readiness.register("vector_db", flaky_store)
+    readiness.start()
+    # The first failure is reported while the component waits for its retry
+    await asyncio.sleep(0.01)
+    component = readiness.components["vector_db"]
+    assert component.state == FAILED
+    assert readiness.report()["status"] == "failed"
+    assert "not up yet" in component.error
+
+    # Backoff starts at 1s, then is capped at retry_max_seconds
+    await asyncio.sleep(1.2)
+    assert readiness.ready
+    assert component.attempts == 3
+    assert component.error is None
+    await readiness.stop()
+
+@pytest.mark.asyncio
+async def test_optional_components_do_not_gate_readiness():
+    readiness = Readiness(retry_max_seconds=1)
+
+    async def ok():
+        pass
+
+    async def broken():
+        raise RuntimeError("optional cache unavailable")
+
+    readiness.register("required", ok)
+    readiness.register("optional", broken, required=False)
+    readiness.start()
+    await asyncio.sleep(0.01)
+    assert readiness.ready
+    assert readiness.report()["components"]["optional"]["state"] == FAILED
+    await readiness.stop()
+
+def test_nothing_registered_is_ready():
+    assert Readiness(retry_max_seconds=1).ready
@@ -0,0 +1,108 @@
+"""
+test_scorer.py
+--------------
+Unit tests for the tiered density scorer (heuristic, sampled, full pass).
+"""
+
+import pytest
+import spacy
+from src.core.nlp import NLPPipeline
+from src.core.scorer import TIER_FULL, TIER_HEURISTIC, ContentScorer
+
+THRESHOLD = 0.3
+
+PROSE = (
+    "UPM is a material solutions company, renewing products and entire value chains with renewable fibres. "
+    "The Kymi mill produces pulp and generates bioenergy for the surrounding region. "
+    "Engineers inspect the recovery boiler before every scheduled maintenance shutdown. "
+)
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ContentScorer()
+
+# A tokenizer-only pipeline: tier 1 must decide without any tagger
+@pytest.fixture(scope="module")
+def blank_scorer():
+    return ContentScorer(pipeline=NLPPipeline(nlp=spacy.blank("en")))
+
+def test_boilerplate_rejected_from_token_statistics(blank_scorer):
+    noise = "Click here. Go to the top of the page. It is on the left and we are here. " * 5
+    assert blank_scorer.calculate_score(noise, threshold=THRESHOLD) < THRESHOLD
+    # The stored score says it is an estimate
+    assert blank_scorer.score(noise, threshold=THRESHOLD)[1] == TIER_HEURISTIC
+
+def test_numbers_and_lexicon_words_are_not_content(blank_scorer):
+    doc = blank_scorer.pipeline.analyze("Pump 42 usually needs valves, etc.", ())
+    # Candidates: Pump, 42, usually, needs, valves, etc -> 3 likely content words
+    assert blank_scorer._estimate("", doc, 1.0) == (round(6 / 8 * 3 / 6, 4), TIER_HEURISTIC)
+
+def test_letterless_symbols_are_not_content(blank_scorer):
+    doc = blank_scorer.pipeline.analyze("Pump | needs valves at 10:30 ===", ())
+    # Candidates: Pump, |, needs, valves, 10:30, =, =, = -> 3 likely content words
+    assert blank_scorer._estimate("", doc, 1.0) == (round(8 / 9 * 3 / 8, 4), TIER_HEURISTIC)
+
+def test_untiered_score_is_unchanged(scorer):
+    doc = scorer.pipeline.analyze(PROSE, scorer.components)
+    assert scorer.calculate_score(PROSE) == scorer.calculate_score(PROSE, doc)
+
+@pytest.mark.parametrize("text", [
+    PROSE,
+    "Click here. Menu. Home. Contact. Copyright 2023. Back to top. " * 4,
+    "Renewable fibres, biochemicals, pulp, timber, labels, plywood, graphic papers. " * 3,
+])
+def test_tiered_score_within_tolerance(scorer, text):
+    exact = scorer.calculate_score(text)
+    assert abs(scorer.calculate_score(text, threshold=THRESHOLD) - exact) <= 0.1
+    # Never flips a decision the full pass would make with a clear margin
+    if abs(exact - THRESHOLD) > 0.1:
+        assert scorer.is_passable(text, THRESHOLD) == (exact >= THRESHOLD)
+
+def test_sampled_long_document_within_tolerance(scorer):
+    # Long enough to be scored from a sample of lines, with repeated footers
+    lines = []
+    for i in range(300):
+        lines.append(PROSE.split(". ")[i % 3].strip() + f" in year {2000 + i % 20}.")
+        if i % 10 == 0:
+            lines.append("Page footer. Copyright UPM.")
+    text = "\n".join(lines)
+    doc = scorer.pipeline.analyze(text, ())
+    upper = sum(1 for t in doc if not (t.is_stop or t.is_punct or t.is_space)) / len(doc)
+    share, error = scorer._sample_share(text)
+    assert abs(upper * share - scorer.calculate_score(text)) <= 0.03
+    assert error < 0.05
+
+def test_near_threshold_uses_full_pass(scorer):
+    exact = scorer.calculate_score(PROSE)
+    assert scorer.score(PROSE, threshold=exact) == (exact, TIER_FULL)
+
+BOILERPLATE = (
+    "Click here to go back to the top of the page. ",
+    "It is on the left and we are here for you. ",
+    "Copyright 2023, all rights reserved. ",
+    "Go to the home page or contact us. ",
+)
+
+def mixed(content, lines=40):
+    # `content` of every `lines` lines are prose, the rest boilerplate, interleaved
+    prose = PROSE.split(". ")
+    return "\n".join(
+        prose[i % 3].strip().rstrip(".") + "." if i * content // lines != (i + 1) * content // lines
+        else BOILERPLATE[i % 4].strip()
+        for i in range(lines)
+    )
+
+# Densities from pure boilerplate to pure prose in small steps: several land near the threshold
+CORPUS = [mixed(k) for k in range(0, 41, 2)] + [mixed(k, lines=400) for k in range(0, 401, 40)]
+
+def test_tiered_scores_on_corpus(scorer):
+    exact = [scorer.calculate_score(text) for text in CORPUS]
+    assert sum(1 for e in exact if abs(e - THRESHOLD) < 0.03) >= 2
+
+    for text, full in zip(CORPUS, exact):
+        score, tier = scorer.score(text, threshold=THRESHOLD)
+        # Same gate decision as the full pass, also next to the threshold
+        assert (score >= THRESHOLD) == (full >= THRESHOLD)
+        assert abs(score - full) <= 0.1
+        if tier == TIER_FULL:
+            assert score == full
@@ -0,0 +1,95 @@
+"""
+test_security.py
+----------------
+Unit tests for the compiled redaction engine (combined rules, allow-list
+automaton, single-pass output).
+"""
+
+import pytest
+import spacy
+from src.core.nlp import NLPPipeline
+from src.core.security import PIIScrubber, TermMatcher
+
+# A blank pipeline with a rule-based "ner" keeps these tests model-free
+@pytest.fixture(scope="module")
+def pipeline():
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([
+        {"label": "PERSON", "pattern": "John Smith"},
+        {"label": "ORG", "pattern": "UPM Biofuels"},
+        {"label": "ORG", "pattern": "Acme Paper"},
+        {"label": "PERSON", "pattern": "Anna"},
+        {"label": "DATE", "pattern": "Monday"},
+    ])
+    return NLPPipeline(nlp=nlp)
+
+@pytest.fixture
+def scrubber(pipeline):
+    return PIIScrubber(
+        pipeline=pipeline,
+        allow_list=["UPM", "Raflatac"],
+        rules={"REDACTED_IBAN": r"\bFI\d{16}\b"}
+    )
+
+def test_term_matcher_finds_any_term():
+    matcher = TermMatcher(["he", "she", "his", "hers", "UPM"])
+    assert len(matcher) == 5
+    assert matcher.search("ushers")
+    assert matcher.search("The UPM Kymi mill")
+    assert not matcher.search("upm")  # Case-sensitive, like the allow list always was
+    assert not matcher.search("")
+    assert not TermMatcher([]).search("anything")
+
+def test_term_matcher_scales_to_large_lists():
+    matcher = TermMatcher([f"Unit{i:05d}" for i in range(5000)])
+    assert matcher.search("Report of Unit04999 operations")
+    assert not matcher.search("Report of Unit5 operations")
+
+def test_scrub_combines_rules_entities_and_allow_list(scrubber):
+    text = "John Smith (john@upm.com, 0401234567) moved FI1234567890123456 to UPM Biofuels on Monday."
+    assert scrubber.scrub(text) == (
+        "<PERSON> (<REDACTED_EMAIL>, <REDACTED_PHONE>) moved <REDACTED_IBAN> to UPM Biofuels on Monday."
+    )
+
+def test_regex_takes_precedence_over_entities(scrubber):
+    spans = scrubber.find_spans("Mail Anna@upm.com now")
+    assert spans == [(5, 17, "REDACTED_EMAIL")]
+
+def test_spans_are_sorted_and_disjoint(scrubber):
+    text = " ".join(["Acme Paper pays John Smith via FI1234567890123456."] * 50)
+    spans = scrubber.find_spans(text)
+    assert len(spans) == 150
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+
+def test_redact_ranges_match_full_scrub(scrubber):
+    text = "Anna called. " * 5 + "Acme Paper replied to John Smith."
+    spans = scrubber.find_spans(text)
+    for split in (0, 12, 13, text.index(" Acme"), len(text)):
+        assert scrubber.redact(text, spans, 0, split) + scrubber.redact(text, spans, split) == scrubber.scrub(text)
+    # A boundary inside an entity redacts it in full on both sides
+    inside = text.index("Smith")
+    assert scrubber.redact(text, spans, 0, inside).endswith("<PERSON>")
+    assert scrubber.redact(text, spans, inside) == "<PERSON>."
+
+def test_invalid_rule_is_reported(pipeline):
+    with pytest.raises(RuntimeError, match="BROKEN"):
+        PIIScrubber(pipeline=pipeline, allow_list=[], rules={"BROKEN": "(unclosed"})
+
+def test_combined_rule_conflict_names_the_rule(pipeline):
+    rules = {"FIRST": r"(?P<code>A\d)", "SECOND": r"(?P<code>B\d)"}
+    with pytest.raises(RuntimeError, match="SECOND"):
+        PIIScrubber(pipeline=pipeline, allow_list=[], rules=rules)
+
+def test_global_flags_stay_with_their_rule(pipeline):
+    rules = {"REDACTED_KEY": r"(?i)secret-\d+", "REDACTED_IBAN": r"\bFI\d{16}\b"}
+    scrubber = PIIScrubber(pipeline=pipeline, allow_list=[], rules=rules)
+    text = "SECRET-42 and Secret-7, fi1234567890123456 FI1234567890123456"
+    assert scrubber.scrub(text) == "<REDACTED_KEY> and <REDACTED_KEY>, fi1234567890123456 <REDACTED_IBAN>"
+
+def test_backreference_rule_is_scanned_separately(pipeline):
+    rules = {"REDACTED_IBAN": r"\bFI\d{16}\b", "REDACTED_RUN": r"(\w)\1{5}"}
+    scrubber = PIIScrubber(pipeline=pipeline, allow_list=[], rules=rules)
+    text = "FI1111111111111111 then zzzzzz but not abcdef"
+    # The IBAN (earlier rule) wins over the run of ones inside it
+    assert scrubber.scrub(text) == "<REDACTED_IBAN> then <REDACTED_RUN> but not abcdef"
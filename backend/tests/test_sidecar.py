@@ -0,0 +1,125 @@
+"""
+test_sidecar.py
+---------------
+Unit tests for the shared inference sidecar (Unix socket RPC + cross-worker batching).
+"""
+
+import asyncio
+import os
+import pickle
+import stat
+import sys
+import types
+import pytest
+from src.config import settings
+from src.core import tasks
+from src.core.executor import Stage
+from src.core.sidecar import _HEADER, InferenceServer, SidecarClient, SidecarUnavailableError, decode_frame, encode_frame
+
+class FakeEmbedder:
+    """Records the batches it encodes and returns [len(text)] per text."""
+
+    def __init__(self):
+        self.batches = []
+        self.model = types.SimpleNamespace(encode=lambda texts: None, dim=1)
+
+    def embed_batch(self, texts, batch_size=32, sources=None):
+        self.batches.append(list(texts))
+        if sources is not None:
+            sources.extend(["miss"] * len(texts))
+        return [[float(len(t))] for t in texts]
+
+@pytest.fixture
+def fake_embedder(monkeypatch):
+    embedder = FakeEmbedder()
+    # embed_texts imports the singleton lazily: serve it a fake model
+    monkeypatch.setitem(sys.modules, "src.core.embedder", types.SimpleNamespace(embedder=embedder))
+    return embedder
+
+@pytest.fixture
+async def sidecar(tmp_path, monkeypatch, fake_embedder):
+    monkeypatch.setattr(settings, "EMBED_BATCH_MAX_WAIT_MS", 50.0)
+    path = str(tmp_path / "inference.sock")
+    task = asyncio.ensure_future(InferenceServer(path).serve())
+    while not os.path.exists(path):
+        await asyncio.sleep(0.01)
+    yield path
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+def stage(client):
+    return Stage("embed", lambda: client, concurrency=4, max_queue=4)
+
+@pytest.mark.asyncio
+async def test_workers_share_embedding_batches(sidecar, fake_embedder):
+    # Two clients stand for two API worker processes
+    workers = [SidecarClient(sidecar), SidecarClient(sidecar)]
+    results = await asyncio.gather(
+        stage(workers[0]).run(tasks.embed_texts, ["a", "bb"]),
+        stage(workers[1]).run(tasks.embed_texts, ["ccc"]),
+    )
+    assert [r["vectors"] for r in results] == [[[1.0], [2.0]], [[3.0]]]
+    # Cache lookups travel back with each caller's own texts
+    assert [r["cache"] for r in results] == [["miss", "miss"], ["miss"]]
+    assert sorted(fake_embedder.batches[-1]) == ["a", "bb", "ccc"]
+    for client in workers:
+        client.shutdown()
+
+def test_socket_is_private(sidecar):
+    assert stat.S_IMODE(os.stat(sidecar).st_mode) == 0o600
+
+@pytest.mark.asyncio
+async def test_only_pipeline_tasks_are_served(sidecar):
+    client = SidecarClient(sidecar)
+    with pytest.raises(RuntimeError, match="does not run"):
+        await stage(client).run(os.getcwd)
+    client.shutdown()
+
+class Exploit:
+    """Would create a file when unpickled."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (open, (self.path, "w"))
+
+async def send_raw(path, payload):
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+    header = await reader.read(_HEADER.size)
+    reply = decode_frame(await reader.readexactly(_HEADER.unpack(header)[0])) if header else None
+    writer.close()
+    return reply
+
+@pytest.mark.asyncio
+async def test_server_never_unpickles_requests(sidecar, tmp_path):
+    marker = tmp_path / "pwned"
+    # A pickle is not a call frame: the connection is dropped and nothing runs
+    assert await send_raw(sidecar, pickle.dumps((0, Exploit(str(marker))))) is None
+    assert not marker.exists()
+
+    # Names outside the allow-list are refused before any lookup
+    reply = await send_raw(sidecar, encode_frame({"id": 1, "call": "_get_helpers", "args": []})[_HEADER.size:])
+    assert reply["ok"] is False and "does not run" in reply["message"]
+
+def test_frames_keep_sparse_vector_keys():
+    frame = encode_frame({"result": [{"sparse": [{7: 0.5, 11: 1.25}], "chunks": ["a"]}]})
+    assert decode_frame(frame[_HEADER.size:]) == {"result": [{"sparse": [{7: 0.5, 11: 1.25}], "chunks": ["a"]}]}
+
+@pytest.mark.asyncio
+async def test_errors_are_returned_to_the_caller(sidecar):
+    client = SidecarClient(sidecar)
+    # Exceptions raised in the sidecar are re-raised in the worker
+    with pytest.raises(TypeError):
+        await stage(client).run(tasks.analyze_documents, None, 0.1)
+    # The connection stays usable after a failed call
+    assert (await stage(client).run(tasks.embed_texts, ["dddd"]))["vectors"] == [[4.0]]
+    client.shutdown()
+
+@pytest.mark.asyncio
+async def test_unreachable_sidecar(tmp_path):
+    client = SidecarClient(str(tmp_path / "missing.sock"))
+    with pytest.raises(SidecarUnavailableError):
+        await stage(client).run(tasks.embed_texts, ["x"])
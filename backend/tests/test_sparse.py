@@ -0,0 +1,87 @@
+"""
+test_sparse.py
+--------------
+Tests for the BM25 term weights and hybrid (dense + BM25) retrieval on
+every backend.
+"""
+
+import pytest
+import spacy
+from datetime import datetime, timezone, timedelta
+from src.core import hashing
+from src.core.sparse import bm25_vector, chunk_terms, query_vector, term_id
+from src.db.base import reciprocal_rank_fusion
+from src.db.embedded_store import EmbeddedVectorDB
+from src.db.qdrant_store import QdrantVectorDB
+
+NLP = spacy.blank("en")
+
+
+def test_bm25_saturates_term_frequency():
+    weights = bm25_vector(["valve"] * 3 + ["pump"])
+    assert weights[term_id("valve")] > weights[term_id("pump")]
+    # Saturation: three occurrences weigh far less than three times one
+    assert weights[term_id("valve")] < 3 * weights[term_id("pump")]
+    assert bm25_vector([]) == {}
+
+def test_chunk_terms_skip_stop_words_and_pii():
+    doc = NLP("Contact John Smith about SOP-4471 today.")
+    start = doc.text.index("John")
+    spans = [(start, start + len("John Smith"), "PERSON")]
+    terms = chunk_terms(doc, 0, len(doc.text), spans)
+    assert "john" not in terms and "smith" not in terms
+    assert "about" not in terms and "." not in terms
+    assert "contact" in terms and "sop-4471" in terms
+
+def test_query_vector():
+    assert query_vector("What is SOP-4471?") == {term_id("sop-4471"): 1.0}
+    assert query_vector("what is the") is None
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "b"]], k=60)
+    assert [key for key, _ in fused] == ["c", "b", "a"]
+
+
+def make_store(backend, directory):
+    if backend == "qdrant":
+        return QdrantVectorDB(location=":memory:")
+    return EmbeddedVectorDB(str(directory), dtype=backend.split("-")[1])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["qdrant", "embedded-float32", "embedded-int8"])
+async def test_exact_term_match_outranks_dense_neighbours(backend, tmp_path):
+    db = make_store(backend, tmp_path)
+    texts = [f"General maintenance guidance number {i}." for i in range(5)] + ["Lockout steps per SOP-4471."]
+    vectors = []
+    for i in range(len(texts)):
+        vector = [0.0] * 384
+        # The SOP chunk is the dense vector furthest from the query
+        vector[0], vector[i + 1] = 1.0, 0.2 * (i + 1)
+        vectors.append(vector)
+    await db.upsert_documents([{
+        "doc_id": hashing.document_id("", "manual"),
+        "content_hash": hashing.content_hash("".join(texts)),
+        "chunks": texts,
+        "vectors": vectors,
+        "sparse": [bm25_vector(chunk_terms(NLP(t), 0, len(t))) for t in texts],
+        "metadata": {"valid_until": datetime.now(timezone.utc) + timedelta(days=30)}
+    }])
+    query = [1.0] + [0.0] * 383
+
+    dense = await db.search(query, limit=3)
+    assert "SOP-4471" not in " ".join(hit["text"] for hit in dense)
+
+    hybrid = await db.search(query, limit=3, query_terms=query_vector("Where is SOP-4471?"))
+    assert hybrid[0]["text"] == texts[-1]
+    assert len(hybrid) == 3
+    # Hits are ordered by fusion score but report their cosine similarity
+    assert all(hit["fusion_score"] is not None for hit in hybrid)
+    assert hybrid[0]["score"] == pytest.approx(1 / (1 + 1.2 ** 2) ** 0.5, abs=0.01)
+    assert all(hit["fusion_score"] is None for hit in dense)
+
+    # A similarity threshold drops the BM25-only hit instead of ignoring it
+    threshold = dense[-1]["score"] - 0.01
+    thresholded = await db.search(query, limit=3, score_threshold=threshold, query_terms=query_vector("SOP-4471"))
+    assert [hit["text"] for hit in thresholded] == [hit["text"] for hit in dense]
+    assert all(hit["score"] >= threshold for hit in thresholded)
+    await db.close()